@@ -12,12 +12,16 @@ from flask import (
     redirect,
     session,
     send_from_directory,
-    make_response
+    Response,
+    stream_with_context,
+    g
 )
 import secrets
 import json
 import os
 import re
+import shutil
+import tempfile
 import time  # PAKAI import module, bukan fungsi
 
 try:
@@ -38,25 +42,40 @@ from datetime import timedelta, datetime, timezone
 
 from flask_cors import CORS
 
-from chatbot_engine import get_response
+from chatbot_engine import get_response, get_responses, upsert_faq, remove_faq, clear_faq_category, WARMING_UP_MESSAGE, get_faq_stats
 
 from db import faq_collection, categories_collection
-from services.intent_service import generate_intents_from_db
+from services.intent_service import schedule_intents_regeneration, get_intents_status
+from services import admin_log_service, backup_service, content_version, faq_service, log_feed, log_retention, restore_service
 from utils.reload_model import refresh_chatbot
+from utils import metrics
+from utils.log_pipeline import get_logger
+from utils.audit_sink import AuditSink
+from utils.rate_limit import create_limiter
 from bson import ObjectId
 from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
 from db import users_collection, admin_logs_collection
 
+logger = get_logger(__name__)
+
 # ========== ANTI BRUTE FORCE LOGIN =============
-login_attempts = {}
+# Maksimal LOGIN_RATE_LIMIT percobaan per IP per LOGIN_RATE_WINDOW_SECONDS.
+# Default dihitung bersama di MongoDB (collection rate_limits, TTL) supaya
+# batasnya sama untuk semua worker; RATE_LIMIT_BACKEND=memory memakai
+# token bucket per proses (lihat utils/rate_limit.py).
+LOGIN_RATE_LIMIT = int(os.environ.get("LOGIN_RATE_LIMIT", "5"))
+LOGIN_RATE_WINDOW_SECONDS = int(os.environ.get("LOGIN_RATE_WINDOW_SECONDS", "60"))
+
+login_limiter = create_limiter(
+    "login",
+    LOGIN_RATE_LIMIT,
+    LOGIN_RATE_WINDOW_SECONDS,
+    collection=db["rate_limits"] if db is not None else None,
+)
 
 def too_many_attempts(ip):
-    now = time.time()  # PAKAI time.time()
-    attempts = login_attempts.get(ip, [])
-    attempts = [t for t in attempts if now - t < 60]  # 1 menit
-    attempts.append(now)
-    login_attempts[ip] = attempts
-    return len(attempts) > 5
+    return not login_limiter.hit(ip)
 
 # Gunakan environment variables dengan fallback
 SECRET_KEY = os.environ.get("SECRET_KEY", secrets.token_urlsafe(32))
@@ -77,6 +96,37 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 # ========== TIMEDELTA ==================
 app.permanent_session_lifetime = timedelta(minutes=30)
 
+# ========== METRICS LATENCY HTTP ==================
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds",
+    "Durasi request HTTP per endpoint",
+    ["endpoint", "method", "status"],
+)
+
+# Jika diset, /metrics butuh header "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def start_background_jobs():
+    # Thread dibuat di worker (setelah fork gunicorn), bukan saat import
+    log_retention.ensure_rollup_worker()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.get("request_start")
+    if start is not None:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or "-",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
 # =========================
 # STATE CHATBOT (WAJIB)
 # =========================
@@ -113,13 +163,20 @@ def save_json(path, data):
 # =========================
 # LOG ADMIN ACTION
 # =======================
+# Entry audit ditulis batch oleh thread background (insert_many); saat
+# MongoDB tidak bisa dihubungi, entry disimpan di journal ini lalu diputar ulang
+AUDIT_JOURNAL_PATH = os.environ.get(
+    "AUDIT_JOURNAL_PATH", os.path.join(BASE_DIR, "data", "audit", "journal.jsonl")
+)
+audit_sink = AuditSink(admin_logs_collection, AUDIT_JOURNAL_PATH) if admin_logs_collection is not None else None
+
 def log_admin_action(action, detail=""):
     """
     Fungsi yang ditingkatkan untuk logging aktivitas admin.
     """
     try:
         if not session.get("user"):
-            print(f"⚠️  LOG WARNING: No session for action '{action}' - detail: {detail}")
+            logger.warning("⚠️  LOG WARNING: No session for action '%s' - detail: %s", action, detail)
             return
 
         # Pastikan detail tidak terlalu panjang
@@ -139,20 +196,22 @@ def log_admin_action(action, detail=""):
         }
 
         # CEK JIKA admin_logs_collection TERSEDIA
-        if admin_logs_collection is None:
-            print(f"📝 LOG (NO DB): {log_entry['username']} - {action} - {detail}")
+        if audit_sink is None:
+            logger.info("📝 LOG (NO DB): %s - %s - %s", log_entry['username'], action, detail)
             return True
             
-        # Masuk ke database
-        admin_logs_collection.insert_one(log_entry)
+        # Masuk ke queue audit (ditulis ke database di background)
+        audit_sink.submit(log_entry)
+        # Dashboard yang terhubung ke /admin/logs/stream menerima entry ini langsung
+        log_feed.publish_log(log_entry)
         
         # Juga tampilkan di console untuk debugging
-        print(f"📝 LOG: {log_entry['username']} ({log_entry['role']}) - {action} - {detail}")
+        logger.info("📝 LOG: %s (%s) - %s - %s", log_entry['username'], log_entry['role'], action, detail)
         
         return True
         
     except Exception as e:
-        print(f"❌ LOG ERROR: {str(e)}")
+        logger.error("❌ LOG ERROR: %s", e)
         # Fallback: simpan ke file jika database error
         try:
             with open("admin_errors.log", "a", encoding="utf-8") as f:
@@ -293,15 +352,56 @@ def admin_login_api():
 
     return jsonify({"success": False}), 401
 
+# =========================
+# CONDITIONAL GET (ETag / Last-Modified)
+# =========================
+def content_response(build):
+    """
+    Response GET /faq dan /categories dengan ETag dari versi konten.
+    If-None-Match (atau If-Modified-Since) yang masih cocok dijawab 304
+    tanpa memanggil build(), jadi tanpa query MongoDB.
+    """
+    state = content_version.current()
+    if state is None:
+        return build()
+    version, modified = state
+    etag = content_version.etag(version)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and modified is not None and modified <= since
+
+    response = Response(status=304) if not_modified else build()
+    response.set_etag(etag, weak=True)
+    if modified is not None:
+        response.last_modified = modified
+    response.cache_control.public = True
+    response.cache_control.max_age = content_version.CONTENT_MAX_AGE
+    response.cache_control.must_revalidate = True
+    return response
+
 # =========================
 # FAQ API
 # =========================
 @app.route("/faq", methods=["GET"])
 def get_faq():
-    data = list(faq_collection.find({}))
-    for f in data:
-        f["_id"] = str(f["_id"])
-    return jsonify(data)
+    # limit/cursor, category_id, q dan fields opsional (lihat faq_service);
+    # response tetap array, cursor halaman berikutnya di header X-Next-Cursor
+    try:
+        params = faq_service.parse_faq_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build():
+        data, next_cursor = faq_service.find_faq_page(params)
+        response = jsonify(data)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+
+    return content_response(build)
 
 @app.route("/faq", methods=["POST"])
 @login_required
@@ -321,13 +421,14 @@ def add_faq():
         if category:
             log_detail_before += f" (Kategori: {category.get('name', 'Unknown')})"
 
-    result = faq_collection.insert_one({
+    new_faq = {
         "question": question,
         "answer": answer,
         "category_id": category_id,
         "created_at": datetime.now(timezone.utc),  # PERBAIKAN DI SINI
         "created_by": session["user"]["username"]
-    })
+    }
+    result = faq_collection.insert_one(new_faq)
     
     # 🔥 LOG SETELAH INSERT DENGAN ID
     faq_id = str(result.inserted_id)
@@ -335,9 +436,11 @@ def add_faq():
     
     log_admin_action("ADD_FAQ", f"{log_detail_before} - {log_detail_after}")
 
-    # Sinkronisasi AI
-    generate_intents_from_db()
-    refresh_chatbot()
+    # Sinkronisasi AI (index chatbot diupdate inkremental, tanpa reload penuh;
+    # intents.json dibangun ulang di background)
+    content_version.bump("ADD_FAQ")
+    schedule_intents_regeneration("ADD_FAQ")
+    upsert_faq(new_faq)
 
     return jsonify({"success": True, "id": faq_id})
 
@@ -377,8 +480,15 @@ def edit_faq(id):
     
     log_admin_action("EDIT_FAQ", detail)
 
-    generate_intents_from_db()
-    refresh_chatbot()
+    content_version.bump("EDIT_FAQ")
+    schedule_intents_regeneration("EDIT_FAQ")
+    if old_faq:
+        upsert_faq({
+            **old_faq,
+            "question": data.get("question"),
+            "answer": data.get("answer"),
+            "category_id": data.get("category_id")
+        })
 
     return jsonify({"success": True})
 
@@ -409,6 +519,11 @@ def delete_faq(id):
             )
             
             log_admin_action("DELETE_FAQ", log_detail)
+
+            # Sinkronisasi AI
+            content_version.bump("DELETE_FAQ")
+            remove_faq(id)
+            schedule_intents_regeneration("DELETE_FAQ")
             
             return jsonify({
                 "success": True,
@@ -430,10 +545,13 @@ def delete_faq(id):
 # =========================
 @app.route("/categories", methods=["GET"])
 def get_categories():
-    data = list(categories_collection.find({}))
-    for c in data:
-        c["_id"] = str(c["_id"])
-    return jsonify(data)
+    def build():
+        data = list(categories_collection.find({}))
+        for c in data:
+            c["_id"] = str(c["_id"])
+        return jsonify(data)
+
+    return content_response(build)
 
 @app.route("/categories", methods=["POST"])
 def add_category():
@@ -447,6 +565,7 @@ def add_category():
         return jsonify({"error": "Nama kategori kosong"}), 400
 
     result = categories_collection.insert_one({"name": name})
+    content_version.bump("ADD_CATEGORY")
     
     # 🔥 LOG DENGAN ID KATEGORI BARU
     category_id = str(result.inserted_id)
@@ -478,6 +597,10 @@ def edit_category(id):
     
     log_admin_action("EDIT_CATEGORY", detail)
 
+    # Nama kategori = tag intents
+    content_version.bump("EDIT_CATEGORY")
+    schedule_intents_regeneration("EDIT_CATEGORY")
+
     return jsonify({"success": True})
 
 @app.route("/categories/<id>", methods=["DELETE"])
@@ -502,15 +625,16 @@ def delete_category(id):
     
     # Hapus kategori
     categories_collection.delete_one({"_id": ObjectId(id)})
+    content_version.bump("DELETE_CATEGORY")
     
     if cat:
         # 🔥 LOG DETAIL: Jumlah FAQ yang terpengaruh
         detail = f"Hapus kategori: '{cat['name']}' (ID: {id}) - {affected_faqs} FAQ kehilangan kategori"
         log_admin_action("DELETE_CATEGORY", detail)
         
-        # 🔥 Sinkronisasi AI setelah update FAQ
-        generate_intents_from_db()
-        refresh_chatbot()
+        # 🔥 Sinkronisasi AI setelah update FAQ (pertanyaan tidak berubah, vektor tetap)
+        schedule_intents_regeneration("DELETE_CATEGORY")
+        clear_faq_category(id)
 
     return jsonify({
         "success": True,
@@ -532,6 +656,12 @@ def get_intents():
     with open(INTENTS_FILE, "r", encoding="utf-8") as f:
         return jsonify({"content": f.read()})
 
+@app.route("/intents/status")
+@login_required
+def intents_status():
+    """Status regenerasi intents.json di background (generation, pending, error)"""
+    return jsonify(get_intents_status())
+
 # =========================
 # CHATBOT API
 # =========================
@@ -546,6 +676,13 @@ def chat():
         user_message = data["message"]
         bot_reply = get_response(user_message)
 
+        # Index chatbot masih dibangun (cold start)
+        if bot_reply == WARMING_UP_MESSAGE:
+            return jsonify({
+                "response": bot_reply,
+                "warming_up": True
+            }), 503, {"Retry-After": "2"}
+
         return jsonify({
             "response": bot_reply
         })
@@ -556,6 +693,55 @@ def chat():
             "detail": str(e)
         }), 500
 
+# Batas jumlah pesan per request batch
+CHAT_BATCH_MAX = int(os.environ.get("CHAT_BATCH_MAX", "1000"))
+
+@app.route("/chat/batch", methods=["POST"])
+@login_required
+def chat_batch():
+    """Jawab banyak pesan sekaligus (replay log chat / evaluasi offline)"""
+    data = request.get_json(force=True)
+    messages = data.get("messages") if isinstance(data, dict) else None
+
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "messages harus berupa list yang tidak kosong"}), 400
+
+    if len(messages) > CHAT_BATCH_MAX:
+        return jsonify({"error": f"Maksimal {CHAT_BATCH_MAX} pesan per request"}), 413
+
+    try:
+        replies = get_responses(messages)
+
+        if replies and all(r == WARMING_UP_MESSAGE for r in replies):
+            return jsonify({
+                "responses": replies,
+                "warming_up": True
+            }), 503, {"Retry-After": "2"}
+
+        return jsonify({
+            "responses": replies,
+            "count": len(replies)
+        })
+
+    except Exception as e:
+        return jsonify({
+            "error": "Chatbot error",
+            "detail": str(e)
+        }), 500
+
+@app.route("/admin/chatbot/stats")
+@login_required
+def chatbot_stats():
+    """Status index chatbot + counter cache jawaban (hits/misses/evictions)"""
+    return jsonify(get_faq_stats())
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Histogram latency (chat, MongoDB, HTTP) dalam format teks Prometheus"""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
 # =========================
 # STATIC FILES
 # =========================
@@ -611,15 +797,20 @@ def add_admin_with_email():
     expires_at = int(time.time()) + 300  # 5 menit
 
     # === SAVE TO DATABASE ===
-    users_collection.insert_one({
-        "username": username,
-        "email": email,
-        "role": role,
-        "activation_token": activation_token,
-        "activation_expires_at": expires_at,
-        "status": "pending",
-        "created_at": datetime.now(timezone.utc)  # PERBAIKAN DI SINI
-    })
+    # Index unique username/email (db.ensure_indexes) menolak request
+    # bersamaan yang lolos cek find_one di atas
+    try:
+        users_collection.insert_one({
+            "username": username,
+            "email": email,
+            "role": role,
+            "activation_token": activation_token,
+            "activation_expires_at": expires_at,
+            "status": "pending",
+            "created_at": datetime.now(timezone.utc)  # PERBAIKAN DI SINI
+        })
+    except DuplicateKeyError:
+        return jsonify({"error": "Username atau email sudah digunakan"}), 400
 
     # === BUILD ACTIVATION LINK ===
     BASE_URL = os.environ.get("BASE_URL", "https://chatbotdatabase-production.up.railway.app")
@@ -673,29 +864,33 @@ def add_admin_with_email():
 @superadmin_required
 def clear_old_logs():
     """
-    Hapus logs yang lebih dari 30 hari
+    Hapus logs yang melewati masa retensi sekarang juga, tanpa menunggu
+    TTL index (ADMIN_LOG_RETENTION_DAYS, default 30 hari). Jika arsip
+    aktif, logs diringkas dulu ke admin_logs_archive.
     """
     try:
-        # Hitung tanggal 30 hari yang lalu
-        thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)  # PERBAIKAN
-        
-        # Hapus logs lama
-        result = admin_logs_collection.delete_many({
-            "timestamp": {"$lt": thirty_days_ago}
-        })
-        
+        result = log_retention.clear_old_logs()
+        if result is None:
+            return jsonify({"error": "Roll-up logs sedang berjalan, coba lagi nanti"}), 409
+        deleted_count = result["deleted"]
+        archived_count = result["archived"]
+        retention_days = result["retention_days"]
+
         # Log aksi ini
         log_admin_action(
-            "CLEAR_OLD_LOGS", 
-            f"Menghapus {result.deleted_count} logs yang lebih dari 30 hari"
+            "CLEAR_OLD_LOGS",
+            f"Menghapus {deleted_count} logs yang lebih dari {retention_days} hari"
+            + (f" ({archived_count} diarsipkan)" if archived_count else "")
         )
-        
+
         return jsonify({
             "success": True,
-            "deleted_count": result.deleted_count,
-            "message": f"Berhasil menghapus {result.deleted_count} logs lama"
+            "deleted_count": deleted_count,
+            "archived_count": archived_count,
+            "retention_days": retention_days,
+            "message": f"Berhasil menghapus {deleted_count} logs lama"
         })
-        
+
     except Exception as e:
         log_admin_action("CLEAR_LOGS_ERROR", f"Gagal menghapus logs lama: {str(e)}")
         return jsonify({"error": f"Gagal menghapus logs: {str(e)}"}), 500
@@ -794,30 +989,62 @@ def me():
 # =========================
 # BACKUP API
 # =========================
+BACKUP_MIMETYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+def backup_options(with_cursor=True, kind=None):
+    """
+    Opsi export dari query string:
+      format=json|ndjson        (default json, array seperti sebelumnya)
+      gzip=1                    kirim dengan Content-Encoding: gzip
+      after_id / since / limit  cursor untuk export bertahap (lihat backup_service)
+    Raise ValueError jika ada parameter yang tidak valid.
+    """
+    fmt = request.args.get("format", "json").lower()
+    if fmt not in backup_service.BACKUP_FORMATS:
+        raise ValueError(f"format harus salah satu dari: {', '.join(backup_service.BACKUP_FORMATS)}")
+    cursor = backup_service.parse_cursor(request.args, kind) if with_cursor else None
+    compress = request.args.get("gzip", "").lower() in ("1", "true", "yes")
+    return fmt, cursor, compress
+
+def backup_download(chunks, name, fmt="json", compress=False, next_cursor=None):
+    """Response download yang dikirim sepotong-sepotong dari generator"""
+    if compress:
+        chunks = backup_service.gzip_chunks(chunks)
+    response = Response(chunks, mimetype=BACKUP_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={name}.{fmt}"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+    if next_cursor:
+        # Lanjutkan dengan ?after_id=<nilai ini> sampai hasilnya kosong
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def backup_collection(kind, name):
+    """Export satu collection sesuai opsi format / gzip / cursor di query string"""
+    fmt, cursor, compress = backup_options(kind=kind)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return backup_download(
+        backup_service.export(kind, fmt, cursor),
+        f"{name}_{timestamp}",
+        fmt,
+        compress,
+        backup_service.next_cursor(kind, cursor),
+    )
+
 @app.route("/backup/categories", methods=["GET"])
 @login_required
 def backup_categories():
     try:
-        # Ambil data dari database
-        categories = list(categories_collection.find({}))
-        for cat in categories:
-            cat["_id"] = str(cat["_id"])
-        
-        # Buat timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Konversi ke JSON string
-        json_data = json.dumps(categories, indent=2, ensure_ascii=False)
-        
-        # Buat response untuk download
-        response = make_response(json_data)
-        response.headers["Content-Type"] = "application/json"
-        response.headers["Content-Disposition"] = f"attachment; filename=categories_backup_{timestamp}.json"
+        # Stream langsung dari cursor (tidak dikumpulkan di memori)
+        response = backup_collection("categories", "categories_backup")
         
         log_admin_action("BACKUP_CATEGORIES", "Download backup kategori")
         
         return response
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Gagal membuat backup: {str(e)}"}), 500
 
@@ -825,46 +1052,15 @@ def backup_categories():
 @login_required
 def backup_faq():
     try:
-        # Ambil data dari database
-        faqs = list(faq_collection.find({}))
-        
-        # Format data
-        formatted_faqs = []
-        for faq in faqs:
-            formatted_faq = {
-                "_id": str(faq["_id"]),
-                "question": faq.get("question", ""),
-                "answer": faq.get("answer", ""),
-                "category_id": faq.get("category_id", ""),
-                "category_name": "-"
-            }
-            
-            # Cari nama kategori jika ada category_id
-            if faq.get("category_id"):
-                try:
-                    category = categories_collection.find_one({"_id": ObjectId(faq["category_id"])})
-                    if category:
-                        formatted_faq["category_name"] = category.get("name", "-")
-                except:
-                    pass
-            
-            formatted_faqs.append(formatted_faq)
-        
-        # Buat timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Konversi ke JSON string
-        json_data = json.dumps(formatted_faqs, indent=2, ensure_ascii=False)
-        
-        # Buat response untuk download
-        response = make_response(json_data)
-        response.headers["Content-Type"] = "application/json"
-        response.headers["Content-Disposition"] = f"attachment; filename=faq_backup_{timestamp}.json"
+        # Nama kategori dari satu map yang di-prefetch, FAQ di-stream per batch
+        response = backup_collection("faq", "faq_backup")
         
         log_admin_action("BACKUP_FAQ", "Download backup FAQ")
         
         return response
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Gagal membuat backup: {str(e)}"}), 500
 
@@ -872,55 +1068,25 @@ def backup_faq():
 @login_required
 def backup_all():
     try:
-        # Ambil semua data
-        categories = list(categories_collection.find({}))
-        faqs = list(faq_collection.find({}))
-        
-        # Format data
-        formatted_categories = []
-        for cat in categories:
-            formatted_categories.append({
-                "_id": str(cat["_id"]),
-                "name": cat.get("name", "")
-            })
-        
-        formatted_faqs = []
-        for faq in faqs:
-            formatted_faq = {
-                "_id": str(faq["_id"]),
-                "question": faq.get("question", ""),
-                "answer": faq.get("answer", ""),
-                "category_id": faq.get("category_id", "")
-            }
-            formatted_faqs.append(formatted_faq)
-        
-        # Gabungkan semua data
-        backup_data = {
-            "timestamp": datetime.now().isoformat(),
-            "categories": formatted_categories,
-            "faqs": formatted_faqs,
-            "metadata": {
-                "categories_count": len(formatted_categories),
-                "faqs_count": len(formatted_faqs),
-                "backup_version": "1.0"
-            }
-        }
+        fmt, _, compress = backup_options(with_cursor=False)
         
         # Buat timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Konversi ke JSON string
-        json_data = json.dumps(backup_data, indent=2, ensure_ascii=False)
-        
-        # Buat response untuk download
-        response = make_response(json_data)
-        response.headers["Content-Type"] = "application/json"
-        response.headers["Content-Disposition"] = f"attachment; filename=full_backup_{timestamp}.json"
+        # Kategori + FAQ di-stream; metadata (jumlah) ditulis di akhir dokumen
+        response = backup_download(
+            backup_service.export_all(datetime.now().isoformat(), fmt),
+            f"full_backup_{timestamp}",
+            fmt,
+            compress,
+        )
         
         log_admin_action("BACKUP_ALL", "Download backup lengkap")
         
         return response
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Gagal membuat backup: {str(e)}"}), 500
     
@@ -931,41 +1097,91 @@ def backup_all():
 @login_required
 def backup_logs():
     try:
-        # Ambil data logs dari database
-        logs = list(admin_logs_collection.find().sort("timestamp", -1))
-        
-        # Format data
-        formatted_logs = []
-        for log in logs:
-            formatted_log = {
-                "_id": str(log["_id"]),
-                "username": log.get("username", ""),
-                "role": log.get("role", ""),
-                "action": log.get("action", ""),
-                "detail": log.get("detail", ""),
-                "ip": log.get("ip", ""),
-                "timestamp": log.get("timestamp", "").isoformat() if log.get("timestamp") else ""
-            }
-            formatted_logs.append(formatted_log)
-        
-        # Buat timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Tanpa cursor: logs terbaru dulu. Dengan after_id/since/limit: urut waktu
+        # ditulis (inserted_at), jadi backup besar bisa diambil bertahap atau dilanjutkan
+        response = backup_collection("logs", "admin_logs_backup")
         
-        # Konversi ke JSON string
-        json_data = json.dumps(formatted_logs, indent=2, ensure_ascii=False)
-        
-        # Buat response untuk download
-        response = make_response(json_data)
-        response.headers["Content-Type"] = "application/json"
-        response.headers["Content-Disposition"] = f"attachment; filename=admin_logs_backup_{timestamp}.json"
-        
-        log_admin_action("BACKUP_LOGS", "Download backup admin logs")
+        detail = "Download backup admin logs"
+        if request.args:
+            detail += f" ({request.query_string.decode('utf-8', 'replace')})"
+        log_admin_action("BACKUP_LOGS", detail)
         
         return response
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Gagal membuat backup logs: {str(e)}"}), 500
 
+# =========================
+# RESTORE / IMPORT BACKUP
+# =========================
+@app.route("/restore", methods=["POST"])
+@superadmin_required
+def restore_backup():
+    """
+    Import file backup (format /backup/all, /backup/faq, /backup/categories;
+    json atau ndjson, boleh gzip). File dikirim sebagai multipart "file"
+    atau langsung sebagai body request.
+      collection=faq|categories  tujuan untuk array/ndjson tanpa "_collection"
+      dry_run=1                  hanya validasi, tidak ada yang ditulis
+    Response berupa NDJSON: satu baris progres per chunk, baris terakhir
+    berisi ringkasan ("event": "done" atau "error").
+    """
+    collection = request.args.get("collection") or None
+    if collection not in (None, *restore_service.COLLECTIONS):
+        return jsonify({"error": "collection harus faq atau categories"}), 400
+    dry_run = request.args.get("dry_run", "").lower() in ("1", "true", "yes")
+
+    upload = request.files.get("file")
+    if upload is not None:
+        # File upload ditutup werkzeug saat request selesai, padahal response
+        # masih di-stream: salin ke file sementara milik generator
+        source, filename = tempfile.TemporaryFile(), upload.filename or "upload"
+        shutil.copyfileobj(upload.stream, source)
+        source.seek(0)
+    else:
+        # Body mentah dibaca langsung dari socket; gzip dikenali dari magic byte
+        source, filename = request.stream, "body"
+
+    def progress():
+        last = None
+        try:
+            for event in restore_service.restore(
+                restore_service.iter_text(source),
+                {"faq": faq_collection, "categories": categories_collection},
+                collection=collection,
+                dry_run=dry_run,
+            ):
+                last = event
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.exception("❌ Restore %s gagal", filename)
+            # Statistik terakhir dipertahankan supaya chunk yang sudah ditulis tetap diproses
+            last = {**(last or {}), "event": "error", "message": f"Restore gagal: {e}"}
+            yield json.dumps(last, ensure_ascii=False, default=str) + "\n"
+        finally:
+            if upload is not None:
+                source.close()
+
+            # Index chatbot dan intents dibangun ulang sekali saja, setelah semua
+            # chunk; juga jika restore berhenti di tengah setelah ada yang ditulis
+            if last is not None and restore_service.changed(last):
+                content_version.bump("RESTORE")
+                refresh_chatbot()
+                schedule_intents_regeneration("RESTORE")
+
+            if last is not None and not dry_run:
+                log_admin_action(
+                    "RESTORE_BACKUP",
+                    f"Restore {filename}: {last.get('processed', 0)} record, "
+                    f"{last.get('upserted', 0)} baru, {last.get('modified', 0)} diubah, "
+                    f"{last.get('invalid', 0)} tidak valid, {last.get('write_errors', 0)} gagal"
+                    + (f" ({last['message']})" if last.get("event") == "error" else ""),
+                )
+
+    return Response(stream_with_context(progress()), mimetype="application/x-ndjson")
+
 # =========================
 # UPDATE INTENTS - Tambahkan logging yang lebih detail
 # =========================
@@ -1073,12 +1289,55 @@ def delete_user(id):
 @app.route("/admin/logs")
 @superadmin_required
 def get_logs():
-    logs = list(admin_logs_collection.find().sort("timestamp", -1).limit(200))
+    # Tanpa parameter: 200 log terbaru seperti sebelumnya. Filter, cursor dan
+    # since opsional (lihat admin_log_service); response tetap array
+    try:
+        params = admin_log_service.parse_log_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    for l in logs:
-        l["_id"] = str(l["_id"])
+    logs, next_cursor, latest_cursor = admin_log_service.find_logs(params)
 
-    return jsonify(logs)
+    response = jsonify(logs)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if latest_cursor:
+        # Dipakai sebagai ?since= pada auto-refresh berikutnya
+        response.headers["X-Latest-Cursor"] = latest_cursor
+    return response
+
+@app.route("/admin/logs/stream")
+@superadmin_required
+def stream_logs():
+    """
+    Server-Sent Events: satu event "log" per entry baru (id = cursor yang
+    sama dengan X-Latest-Cursor). Backlog sejak ?since= atau header
+    Last-Event-ID (dikirim EventSource saat menyambung ulang) dikirim
+    dulu. Filter username / action sama seperti /admin/logs.
+    """
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    filters = {
+        field: [v.strip() for v in request.args.get(field, "").split(",") if v.strip()]
+        for field in ("username", "action")
+    }
+    if since:
+        try:
+            admin_log_service.decode_cursor(since, "since")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    if not log_feed.acquire_client():
+        return jsonify({"error": "Terlalu banyak koneksi live log, gunakan polling"}), 503
+
+    response = Response(
+        stream_with_context(log_feed.stream(since, filters)),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # nginx / proxy jangan buffer stream
+    # Slot dilepas saat koneksi ditutup, juga jika generator belum sempat jalan
+    response.call_on_close(log_feed.release_client)
+    return response
 
 # =========================
 # INIT FILE & RUN
@@ -0,0 +1,214 @@
+# benchmarks/bench_chatbot.py
+# Benchmark engine retrieval dan jalur HTTP /chat dengan korpus FAQ sintetis
+# (skema faq.json) berukuran 100, 1k, 10k dan 100k. MongoDB diganti
+# stand-in in-memory (benchmarks/memory_db.py), jadi tidak butuh server.
+#
+# Yang diukur per ukuran korpus:
+#   - load_faq: waktu fetch + fit TF-IDF + publish index
+#   - memori: puncak alokasi selama load_faq dan sisa setelahnya (tracemalloc)
+#   - get_response: latency p50/p95/p99
+#   - POST /chat lewat Flask test client: request per detik
+#
+#   python benchmarks/bench_chatbot.py
+#   python benchmarks/bench_chatbot.py --sizes 100 1000 --queries 500 --requests 500
+#   python benchmarks/bench_chatbot.py --json > hasil.json   # untuk dibandingkan antar commit
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import memory_db  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# Pertanyaan di luar topik FAQ (jalur "tidak ditemukan" juga ikut diukur)
+OFF_TOPIC = [
+    "cuaca hari ini bagaimana",
+    "resep nasi goreng",
+    "jadwal pertandingan bola",
+    "harga tiket pesawat ke bali",
+]
+
+
+def load_seed_faq():
+    with open(os.path.join(BASE_DIR, "faq.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_corpus(size, seed_faq, rng):
+    """Korpus sintetis skema faq.json: pertanyaan seed + variasi kata dari korpus"""
+    words = sorted({w for f in seed_faq for w in re.findall(r"\w+", f["question"].lower())})
+    categories = sorted({f["category_id"] for f in seed_faq})
+    corpus = []
+    for i in range(size):
+        base = seed_faq[i % len(seed_faq)]
+        extra = " ".join(rng.sample(words, rng.randint(1, 3)))
+        corpus.append({
+            "question": f"{base['question']} {extra}",
+            "answer": f"{base['answer']} (#{i})",
+            "category_id": rng.choice(categories),
+        })
+    return corpus
+
+
+def make_queries(count, corpus, rng):
+    """Campuran pertanyaan mirip FAQ (sebagian kata diacak) dan pertanyaan di luar topik"""
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            queries.append(rng.choice(OFF_TOPIC))
+            continue
+        words = rng.choice(corpus)["question"].split()
+        rng.shuffle(words)
+        queries.append(" ".join(words[: max(2, len(words) - rng.randint(0, 2))]))
+    return queries
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Matikan log INFO/DEBUG (pipeline queue di utils/log_pipeline) dan print
+    selama bagian yang diukur; WARNING ke atas tetap tampil. redirect_stdout
+    saja tidak cukup karena StreamHandler listener memegang sys.stdout asli.
+    """
+    logging.disable(logging.INFO)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def bench_size(size, args, seed_faq, db, engine, client):
+    rng = random.Random(args.seed + size)
+    corpus = make_corpus(size, seed_faq, rng)
+    queries = make_queries(args.queries, corpus, rng)
+    db.faq_collection.replace_all(corpus)
+
+    # Waktu load_faq (tanpa tracemalloc, yang memperlambat alokasi)
+    with quiet():
+        t0 = time.perf_counter()
+        engine.load_faq()
+        load_seconds = time.perf_counter() - t0
+
+    # Memori: ulangi load_faq di bawah tracemalloc
+    with quiet():
+        tracemalloc.start()
+        engine.load_faq()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # Latency get_response
+    latencies = []
+    with quiet():
+        for q in queries:
+            t0 = time.perf_counter()
+            engine.get_response(q)
+            latencies.append(time.perf_counter() - t0)
+
+    # Throughput HTTP /chat
+    requests = [queries[i % len(queries)] for i in range(args.requests)]
+    errors = 0
+    with quiet():
+        t0 = time.perf_counter()
+        for q in requests:
+            if client.post("/chat", json={"message": q}).status_code != 200:
+                errors += 1
+        http_seconds = time.perf_counter() - t0
+
+    return {
+        "size": size,
+        "terms": len(engine.get_index().vectorizer.vocabulary_),
+        "load_faq_ms": load_seconds * 1000,
+        "mem_peak_mb": peak / 1024 / 1024,
+        "mem_retained_mb": current / 1024 / 1024,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "chat_rps": len(requests) / http_seconds if http_seconds else 0.0,
+        "chat_errors": errors,
+    }
+
+
+def print_table(results):
+    header = (
+        f"{'FAQ':>7} {'terms':>6} {'load_faq':>10} {'mem peak':>9} {'retained':>9} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8} {'/chat rps':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['size']:>7} {r['terms']:>6} {r['load_faq_ms']:>8.1f}ms {r['mem_peak_mb']:>7.1f}MB "
+            f"{r['mem_retained_mb']:>7.1f}MB {r['p50_ms']:>6.2f}ms {r['p95_ms']:>6.2f}ms "
+            f"{r['p99_ms']:>6.2f}ms {r['chat_rps']:>10.1f}"
+            + (f"  ({r['chat_errors']} error)" if r["chat_errors"] else "")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engine chatbot dan endpoint /chat")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--queries", type=int, default=1000, help="jumlah query get_response per ukuran")
+    parser.add_argument("--requests", type=int, default=1000, help="jumlah POST /chat per ukuran")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="aktifkan cache jawaban (default: nonaktif)")
+    parser.add_argument("--json", action="store_true", help="cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    # Konfigurasi engine harus diset sebelum import
+    os.environ.setdefault("FAQ_INDEX_DIR", "")        # jangan tulis artifact ke repo
+    os.environ["ENGINE_INIT_MODE"] = "lazy"
+    if not args.cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    # Pipeline log dipasang di luar quiet(): StreamHandler-nya memegang
+    # sys.stdout saat itu, jadi harus stdout asli, bukan buffer redirect
+    from utils.log_pipeline import setup_logging
+    setup_logging()
+
+    db = memory_db.install()
+    seed_faq = load_seed_faq()
+    db.faq_collection.replace_all(seed_faq)
+
+    with quiet():
+        import app
+        import chatbot_engine as engine
+        engine.init_engine()
+
+    client = app.app.test_client()
+    results = []
+    for size in args.sizes:
+        results.append(bench_size(size, args, seed_faq, db, engine, client))
+        if not args.json:
+            print(f"✅ {size} FAQ selesai", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"\n📊 Benchmark chatbot ({args.queries} query, {args.requests} request /chat per ukuran)")
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_startup.py
+# Ukur cold start: berapa lama `import app` (yang dijalankan setiap worker
+# gunicorn saat spawn) dan berapa lama sampai index chatbot siap menjawab.
+# Setiap run memakai interpreter baru supaya tidak ada cache import.
+#
+# Tanpa MONGO_URI (atau dengan --memory-db) proses anak memakai stand-in
+# in-memory benchmarks/memory_db.py berisi faq.json, seperti bench_chatbot.py;
+# waktu koneksi ke MongoDB sungguhan tidak ikut terukur.
+#
+#   python benchmarks/bench_startup.py --runs 5
+#   ENGINE_INIT_MODE=eager python benchmarks/bench_startup.py   # bandingkan dengan init saat import
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Dijalankan sebelum pengukuran dimulai (mode --memory-db)
+MEMORY_DB_PRELUDE = """
+import json, sys
+sys.path.insert(0, {bench_dir!r})
+import memory_db
+with open("faq.json", encoding="utf-8") as f:
+    memory_db.install().faq_collection.replace_all(json.load(f))
+"""
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import app
+t_import = time.perf_counter() - t0
+import chatbot_engine
+ready = chatbot_engine.wait_until_ready({timeout})
+t_ready = time.perf_counter() - t0
+print("BENCH " + json.dumps({{"import": t_import, "ready": t_ready if ready else None}}), flush=True)
+"""
+
+
+def run_once(module, timeout, memory_db=False):
+    code = CHILD.format(timeout=timeout).replace("import app", f"import {module}")
+    env = dict(os.environ)
+    if memory_db:
+        code = MEMORY_DB_PRELUDE.format(bench_dir=BENCH_DIR) + code
+        env.setdefault("FAQ_INDEX_DIR", "")  # jangan tulis artifact dari data stand-in ke repo
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    # Hasil ada di baris berawalan "BENCH " (baris lain log startup)
+    line = next((l for l in out.stdout.splitlines() if l.startswith("BENCH ")), None)
+    if out.returncode != 0 or line is None:
+        sys.stderr.write(out.stderr)
+        sys.exit(f"❌ Proses startup gagal (exit {out.returncode}), lihat stderr di atas")
+    return json.loads(line[len("BENCH "):])
+
+
+def summarize(label, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        print(f"{label:<22} -")
+        return
+    print(
+        f"{label:<22} min {min(values) * 1000:8.1f} ms   "
+        f"median {statistics.median(values) * 1000:8.1f} ms   "
+        f"max {max(values) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu startup aplikasi")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="app", help="modul yang di-import (default: app)")
+    parser.add_argument("--timeout", type=float, default=120, help="batas tunggu index siap (detik)")
+    parser.add_argument("--memory-db", action="store_true",
+                        help="pakai MongoDB in-memory (otomatis jika MONGO_URI tidak diset)")
+    args = parser.parse_args()
+
+    memory_db = args.memory_db or not os.environ.get("MONGO_URI")
+    if memory_db and not args.memory_db:
+        print("ℹ️ MONGO_URI tidak diset: memakai MongoDB in-memory (benchmarks/memory_db.py)", file=sys.stderr)
+
+    results = [run_once(args.module, args.timeout, memory_db) for _ in range(args.runs)]
+
+    source = "memory_db" if memory_db else "MongoDB"
+    print(f"📊 Startup {args.module} ({args.runs} run, {source}, ENGINE_INIT_MODE={os.environ.get('ENGINE_INIT_MODE', 'background')})")
+    summarize(f"import {args.module}", [r["import"] for r in results])
+    summarize("index siap", [r["ready"] for r in results])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/memory_db.py
+# Pengganti MongoDB in-memory untuk benchmark. install() memasang modul
+# "db" palsu di sys.modules dengan nama yang sama seperti db.py, jadi
+# app.py dan chatbot_engine.py bisa di-import tanpa server MongoDB.
+# Hanya operasi yang dipakai jalur chat yang didukung (filter kesamaan).
+import sys
+import types
+
+from bson import ObjectId
+
+
+def _matches(doc, query):
+    return all(doc.get(k) == v for k, v in (query or {}).items())
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self.docs = []
+
+    def find(self, query=None, projection=None, *args, **kwargs):
+        return [dict(d) for d in self.docs if _matches(d, query)]
+
+    def find_one(self, query=None, *args, **kwargs):
+        return next((dict(d) for d in self.docs if _matches(d, query)), None)
+
+    def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(dict(doc))
+        return _Result(inserted_id=doc["_id"])
+
+    def insert_many(self, docs):
+        return _Result(inserted_ids=[self.insert_one(d).inserted_id for d in docs])
+
+    def update_one(self, query, update, *args, **kwargs):
+        for d in self.docs:
+            if _matches(d, query):
+                d.update(update.get("$set", {}))
+                return _Result(matched_count=1, modified_count=1)
+        return _Result(matched_count=0, modified_count=0)
+
+    def delete_one(self, query):
+        for i, d in enumerate(self.docs):
+            if _matches(d, query):
+                del self.docs[i]
+                return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if not _matches(d, query)]
+        return _Result(deleted_count=before - len(self.docs))
+
+    def count_documents(self, query=None, *args, **kwargs):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def replace_all(self, docs):
+        """Ganti seluruh isi collection (dipakai antar ukuran korpus)"""
+        self.docs = []
+        self.insert_many([dict(d) for d in docs])
+
+
+class MemoryDatabase:
+    def __init__(self, name):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+
+class MemoryClient:
+    def __init__(self):
+        self._databases = {}
+        self.admin = types.SimpleNamespace(command=lambda *args, **kwargs: {"ok": 1.0})
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name)
+        return self._databases[name]
+
+
+def install(db_name="faq_app"):
+    """Pasang modul db palsu; harus dipanggil sebelum import app / chatbot_engine"""
+    client = MemoryClient()
+    db = client[db_name]
+
+    module = types.ModuleType("db")
+    module.client = client
+    module.db = db
+    module.DB_NAME = db_name
+    module.users_collection = db["users"]
+    module.admin_logs_collection = db["admin_logs"]
+    module.faq_collection = db["faq"]
+    module.categories_collection = db["categories"]
+    module.check_connection = lambda: True
+    # Konfigurasi retensi admin log (db.py); roll-up arsip tidak aktif
+    module.ADMIN_LOG_RETENTION_DAYS = 30
+    module.ADMIN_LOG_ARCHIVE = False
+    module.ADMIN_LOG_ARCHIVE_GRACE_DAYS = 7
+    module.INDEXES = []
+    module.ensure_indexes = lambda collections=None, verbose=True: {}
+
+    sys.modules["db"] = module
+    return module
+
@@ -0,0 +1,21 @@
+# build_index.py
+# Build artifact index FAQ (TF-IDF) ke disk sebelum gunicorn start.
+# Worker cukup mmap artifact ini: tanpa query MongoDB & tanpa fit model.
+#
+#   python build_index.py
+import os
+import sys
+
+# Paksa fit dari MongoDB (jangan pakai artifact lama), langsung saat import
+os.environ["FAQ_INDEX_SOURCE"] = "mongo"
+os.environ["ENGINE_INIT_MODE"] = "eager"
+
+import chatbot_engine
+
+index = chatbot_engine.get_index()
+
+if index.artifact_version is None:
+    print("❌ Index artifact tidak dibuat (FAQ kosong, FAQ_INDEX_DIR kosong, atau gagal menulis)")
+    sys.exit(1)
+
+print(f"✅ Index artifact {index.artifact_version}: {len(index.data)} FAQ di {chatbot_engine.FAQ_INDEX_DIR}")
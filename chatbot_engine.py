@@ -1,10 +1,21 @@
 from pymongo import MongoClient
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import numpy as np
+from scipy import sparse
 import os
 import time
 import re
+import threading
+
+from services.content_version import META_ID as CONTENT_VERSION_ID
+from utils.index_artifact import artifact_lock, current_version, read_artifact, write_artifact
+from utils.keyword_rules import load_keyword_rules
+from utils.metrics import histogram, timer
+from utils.log_pipeline import SAMPLED, get_logger
+from utils.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
 
 # =========================
 # CONFIG - GUNAKAN ENVIRONMENT VARIABLES
@@ -19,12 +30,54 @@ FAQ_COLLECTION = "faq"
 SIMILARITY_THRESHOLD = 0.38  # Threshold yang sama dengan model pertama
 MULTI_INTENT_GAP = 0.08      # Gap yang sama
 MAX_ANSWERS = 2              # Maksimal jawaban yang sama
+CANDIDATE_TOP_K = 32         # Kandidat teratas (argpartition) sebelum keyword adjustment
+
+# =========================
+# UPDATE INKREMENTAL INDEX
+# =========================
+# Refit penuh dijadwalkan jika proporsi term baru (di luar vocabulary hasil
+# fit terakhir) atau proporsi FAQ yang berubah melewati batas ini.
+REFIT_OOV_RATIO = float(os.environ.get("REFIT_OOV_RATIO", "0.1"))
+REFIT_CHANGE_RATIO = float(os.environ.get("REFIT_CHANGE_RATIO", "0.25"))
+
+# =========================
+# ARTIFACT INDEX (dibagi antar worker gunicorn via mmap)
+# =========================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FAQ_INDEX_DIR = os.environ.get("FAQ_INDEX_DIR", os.path.join(BASE_DIR, "data", "index"))  # kosong = nonaktif
+FAQ_INDEX_SOURCE = os.environ.get("FAQ_INDEX_SOURCE", "auto")  # auto: artifact jika ada, mongo: selalu fit
+FAQ_INDEX_POLL_SECONDS = float(os.environ.get("FAQ_INDEX_POLL_SECONDS", "5"))
+
+# =========================
+# INISIALISASI ENGINE
+# =========================
+# background: import langsung selesai, index dibangun oleh thread warm-up
+# lazy: index dibangun saat get_response pertama
+# eager: index dibangun saat import (perilaku lama)
+ENGINE_INIT_MODE = os.environ.get("ENGINE_INIT_MODE", "background")
+ENGINE_WARMUP_TIMEOUT = float(os.environ.get("ENGINE_WARMUP_TIMEOUT", "3"))  # detik
+WARMING_UP_MESSAGE = "Chatbot sedang bersiap, silakan coba lagi beberapa detik lagi."
 
 # =========================
-# KEYWORDS UNTUK PENYESUAIAN SCORE (sama seperti model pertama)
+# CACHE JAWABAN
 # =========================
-KEYWORD_BARU = ["baru", "bikin", "pertama"]
-KEYWORD_CETAK_ULANG = ["hilang", "rusak", "cetak ulang"]
+# Key = (versi index, teks hasil preprocess_text). Setiap reload/update index
+# menaikkan versi, jadi entry lama otomatis tidak terpakai lagi.
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "300"))  # detik
+
+# =========================
+# KEYWORD RULES UNTUK PENYESUAIAN SCORE (default sama seperti model pertama)
+# =========================
+# KEYWORD_RULES_FILE: JSON opsional dengan "query_features", "faq_features"
+# dan "adjustments" untuk mengganti tabel default di utils/keyword_rules.py
+KEYWORD_RULES_FILE = os.environ.get("KEYWORD_RULES_FILE", "")
+KEYWORD_RULES = load_keyword_rules(KEYWORD_RULES_FILE)
+
+# Rentang skor di bawah skor terbaik yang masih bisa terpilih setelah
+# keyword adjustment + gap multi intent. Kandidat di luar rentang ini
+# tidak mungkin masuk jawaban, jadi aman dibuang oleh top-k.
+SCORE_WINDOW = MULTI_INTENT_GAP + KEYWORD_RULES.max_span
 
 # =========================
 # GLOBAL VARIABLES
@@ -49,11 +102,11 @@ def connect_to_mongo():
         
         # Test connection
         client.admin.command('ping')
-        print("✅ Connected to MongoDB from chatbot_engine")
+        logger.info("✅ Connected to MongoDB from chatbot_engine")
         
     except ImportError:
         # Jika db.py tidak ada, buat koneksi baru
-        print("⚠️ db.py not found, creating new MongoDB connection...")
+        logger.warning("⚠️ db.py not found, creating new MongoDB connection...")
         try:
             client = MongoClient(
                 MONGO_URI,
@@ -63,9 +116,9 @@ def connect_to_mongo():
                 tls=False  # Nonaktifkan TLS untuk lokal
             )
             client.admin.command('ping')
-            print("✅ New MongoDB connection created")
+            logger.info("✅ New MongoDB connection created")
         except Exception as e:
-            print(f"❌ New connection failed: {e}")
+            logger.error(f"❌ New connection failed: {e}")
             client = None
     
     # Setup database dan collection
@@ -73,12 +126,12 @@ def connect_to_mongo():
         try:
             db = client[DB_NAME]
             faq_collection = db[FAQ_COLLECTION]
-            print(f"✅ Database '{DB_NAME}' and collection '{FAQ_COLLECTION}' ready")
+            logger.info(f"✅ Database '{DB_NAME}' and collection '{FAQ_COLLECTION}' ready")
         except Exception as e:
-            print(f"❌ Failed to setup database: {e}")
+            logger.error(f"❌ Failed to setup database: {e}")
     else:
         # Buat dummy client untuk offline mode
-        print("⚠️ Using dummy MongoDB client (offline mode)")
+        logger.warning("⚠️ Using dummy MongoDB client (offline mode)")
         class DummyMongoClient:
             def __getitem__(self, name):
                 class DummyCollection:
@@ -94,6 +147,9 @@ def connect_to_mongo():
                         return type('obj', (object,), {'deleted_count': 0})
                     def count_documents(self, *args, **kwargs):
                         return 0
+                    def __getitem__(self, name):
+                        # client[db][collection] tetap mengembalikan dummy collection
+                        return self
                 return DummyCollection()
         
         client = DummyMongoClient()
@@ -102,13 +158,10 @@ def connect_to_mongo():
     
     return client
 
-# Panggil fungsi koneksi saat module di-load
-connect_to_mongo()
-
 # =========================
 # LOAD MODEL - TF-IDF RINGAN
 # =========================
-print("⚙️ Loading TF-IDF model...")
+logger.info("⚙️ Loading TF-IDF model...")
 
 # Preprocessing function sederhana
 def preprocess_text(text):
@@ -120,163 +173,766 @@ def preprocess_text(text):
     text = ' '.join(text.split())
     return text
 
-# TF-IDF Vectorizer yang ringan
-vectorizer = TfidfVectorizer(
-    lowercase=False,  # Already lowercase in preprocessing
-    stop_words=None,  # Tidak pakai stop words agar lebih akurat
-    ngram_range=(1, 2),  # Bisa single word atau 2 kata
-    min_df=1,  # Minimal 1 dokumen
-    max_features=1000  # Batasi features untuk lebih ringan
-)
+# TF-IDF Vectorizer yang ringan (instance baru per snapshot, tidak pernah di-refit di tempat)
+def build_vectorizer():
+    return TfidfVectorizer(
+        lowercase=False,  # Already lowercase in preprocessing
+        stop_words=None,  # Tidak pakai stop words agar lebih akurat
+        ngram_range=(1, 2),  # Bisa single word atau 2 kata
+        min_df=1,  # Minimal 1 dokumen
+        max_features=1000  # Batasi features untuk lebih ringan
+    )
 
-print("✅ TF-IDF ready")
+logger.info("✅ TF-IDF ready")
+
+# =========================
+# SNAPSHOT INDEX FAQ
+# =========================
+class FaqIndex:
+    """
+    Snapshot index FAQ yang tidak pernah diubah setelah dipublikasikan.
+    Row store, vectorizer hasil fit, matriks TF-IDF (CSR, L2-normalised)
+    dan inverted index selalu berpasangan. Setiap perubahan membuat
+    snapshot baru, jadi pembaca cukup memegang satu referensi.
+    """
+
+    def __init__(self, data, vectorizer=None, embeddings=None, is_dummy=False, drift=None,
+                 postings=None, positions=None, artifact_version=None, keyword_flags=None,
+                 source=None):
+        self.data = data
+        self.vectorizer = vectorizer
+        self.embeddings = embeddings
+        # Flag fitur keyword per FAQ (jumlah FAQ x fitur FAQ), dihitung sekali per snapshot
+        if keyword_flags is None:
+            keyword_flags = KEYWORD_RULES.faq_flags([f["question"] for f in data])
+        self.keyword_flags = keyword_flags
+        # Inverted index: vocabulary_[term] -> baris posting berisi FAQ yang memuat term itu
+        if postings is None and embeddings is not None:
+            postings = embeddings.T.tocsr()
+        self.postings = postings
+        if positions is None:
+            positions = {str(f["_id"]): i for i, f in enumerate(data)}
+        self.positions = positions
+        self.is_dummy = is_dummy
+        # Statistik drift sejak fit terakhir (untuk update inkremental)
+        self.drift = drift or {"changed": 0, "terms": 0, "oov": 0}
+        # Versi artifact di disk yang menjadi dasar snapshot ini
+        self.artifact_version = artifact_version
+        # Sidik jari koleksi FAQ saat fit terakhir (lihat fetch_faq_source)
+        self.source = source
+        self.version = 0
+
+    @property
+    def ready(self):
+        return self.postings is not None and len(self.data) > 0
+
+    def encode(self, texts):
+        """Vektor TF-IDF (CSR, L2-normalised) untuk teks yang sudah di-preprocess"""
+        return normalize(self.vectorizer.transform(texts), norm="l2", copy=False).tocsr()
+
+    def score(self, user_vecs):
+        """
+        Skor cosine query lewat inverted index: hanya posting dari term yang
+        ada di query yang disentuh, jadi biayanya sebanding dengan jumlah FAQ
+        yang cocok, bukan ukuran koleksi. FAQ tanpa term yang sama skornya
+        pasti 0 dan tidak mungkin lolos SIMILARITY_THRESHOLD.
+        Return CSR (jumlah query x jumlah FAQ) yang hanya berisi skor tidak nol.
+        """
+        return (user_vecs @ self.postings).tocsr()
+
+    def with_upsert(self, doc):
+        """Snapshot baru dengan satu FAQ ditambah/diganti, tanpa refit"""
+        processed = preprocess_text(doc["question"])
+        terms = self.vectorizer.build_analyzer()(processed)
+        oov = sum(1 for t in terms if t not in self.vectorizer.vocabulary_)
+        vec = self.encode([processed])
+        flags = KEYWORD_RULES.faq_flags([doc["question"]])
+
+        pos = self.positions.get(str(doc["_id"]))
+        data = list(self.data)
+        if pos is None:
+            data.append(doc)
+            embeddings = sparse.vstack([self.embeddings, vec], format="csr")
+            keyword_flags = np.vstack([self.keyword_flags, flags])
+        else:
+            data[pos] = doc
+            embeddings = sparse.vstack(
+                [self.embeddings[:pos], vec, self.embeddings[pos + 1:]], format="csr"
+            )
+            keyword_flags = np.array(self.keyword_flags)
+            keyword_flags[pos] = flags[0]
+
+        drift = {
+            "changed": self.drift["changed"] + 1,
+            "terms": self.drift["terms"] + len(terms),
+            "oov": self.drift["oov"] + oov,
+        }
+        return FaqIndex(data, self.vectorizer, embeddings, drift=drift,
+                        artifact_version=self.artifact_version, keyword_flags=keyword_flags,
+                        source=self.source)
+
+    def with_removal(self, faq_id):
+        """Snapshot baru tanpa FAQ faq_id (None jika tidak ada di index)"""
+        pos = self.positions.get(str(faq_id))
+        if pos is None:
+            return None
+
+        data = self.data[:pos] + self.data[pos + 1:]
+        embeddings = sparse.vstack([self.embeddings[:pos], self.embeddings[pos + 1:]], format="csr")
+        keyword_flags = np.delete(self.keyword_flags, pos, axis=0)
+        drift = dict(self.drift, changed=self.drift["changed"] + 1)
+        return FaqIndex(data, self.vectorizer, embeddings, drift=drift,
+                        artifact_version=self.artifact_version, keyword_flags=keyword_flags,
+                        source=self.source)
+
+    def with_category_cleared(self, category_id):
+        """Snapshot baru dengan category_id dikosongkan (vektor tidak berubah)"""
+        data = [
+            {**f, "category_id": None} if f.get("category_id") == category_id else f
+            for f in self.data
+        ]
+        return FaqIndex(data, self.vectorizer, self.embeddings, self.is_dummy, self.drift,
+                        self.postings, self.positions, self.artifact_version, self.keyword_flags,
+                        self.source)
+
+DUMMY_FAQ = [
+    {"_id": "1", "question": "cara buat ktp", "answer": "Untuk membuat KTP baru, bawa KK asli, surat pengantar RT/RW, dan fotokopi akta kelahiran ke kelurahan.", "category_id": "ktp"},
+    {"_id": "2", "question": "syarat ktp baru", "answer": "Syarat KTP baru: KK asli, surat pengantar RT/RW, fotokopi akta kelahiran, pas foto ukuran 3x4.", "category_id": "ktp"},
+    {"_id": "3", "question": "cetak ulang ktp", "answer": "Untuk cetak ulang KTP yang hilang/rusak: bawa KK asli, surat kehilangan dari kepolisian, dan bayar biaya administrasi.", "category_id": "ktp"}
+]
+
+def build_index(faq_data, source=None):
+    """Fit vectorizer baru dan bangun snapshot index di samping (belum dipublikasikan)"""
+    is_dummy = not faq_data
+    if is_dummy:
+        logger.warning("⚠️ FAQ kosong")
+        # Tambahkan data dummy untuk testing jika kosong
+        faq_data = list(DUMMY_FAQ)
+        logger.info("✅ Using dummy FAQ data for testing")
+
+    # Preprocess questions
+    questions = [preprocess_text(f["question"]) for f in faq_data]
+
+    try:
+        # Fit and transform FAQ questions - tetap sparse (CSR), tidak di-.toarray()
+        vectorizer = build_vectorizer()
+        embeddings = normalize(vectorizer.fit_transform(questions), norm="l2", copy=False).tocsr()
+        logger.info(f"✅ {len(faq_data)} FAQ loaded and vectorized ({len(vectorizer.vocabulary_)} terms)")
+        return FaqIndex(faq_data, vectorizer, embeddings, is_dummy, source=source)
+
+    except Exception as e:
+        logger.error(f"❌ Failed to encode FAQ: {e}")
+        return FaqIndex(faq_data, is_dummy=is_dummy, source=source)
 
 # =========================
 # LOAD FAQ
 # =========================
-faq_data = []
-faq_embeddings = None
+_index = FaqIndex([])    # snapshot aktif; diganti hanya lewat _publish()
+_index_version = 0
+_index_lock = threading.RLock()   # serialisasi writer (publish / upsert / remove)
+_reload_lock = threading.Lock()   # satu reload penuh pada satu waktu
+_pending_ops = None               # update inkremental selama reload berjalan
+
+def fetch_faq():
+    """Semua FAQ dari MongoDB, atau None jika gagal dibaca (beda dengan koleksi kosong)"""
+    logger.info("📥 Loading FAQ from MongoDB...")
+    try:
+        if faq_collection is None:
+            # Koneksi dibuat saat pertama kali benar-benar butuh MongoDB
+            connect_to_mongo()
+        return list(faq_collection.find({}))
+    except Exception as e:
+        logger.error(f"❌ Failed to load FAQ from collection: {e}")
+        return None
+
+def fetch_faq_source():
+    """
+    Sidik jari koleksi FAQ: versi konten (dinaikkan oleh admin, restore,
+    load_db dan sync_faq_intents), jumlah dokumen dan _id terbesar.
+    Dibaca sebelum fetch_faq, jadi perubahan sesudahnya pasti membuat
+    sidik jari berbeda. None jika MongoDB tidak bisa dibaca.
+    """
+    try:
+        if faq_collection is None:
+            connect_to_mongo()
+        meta = db["meta"].find_one({"_id": CONTENT_VERSION_ID}) or {}
+        last = faq_collection.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        return {
+            "content_version": meta.get("version", 0),
+            "count": faq_collection.count_documents({}),
+            "max_id": str(last["_id"]) if last else None,
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Sidik jari FAQ tidak bisa dibaca: {e}")
+        return None
+
+def _publish(index):
+    """Pasang snapshot baru dengan satu assignment referensi"""
+    global _index, _index_version
+    with _index_lock:
+        _index_version += 1
+        index.version = _index_version
+        _index = index
+
+def get_index():
+    """Snapshot index yang sedang aktif (jangan diubah)"""
+    return _index
 
 def load_faq():
-    global faq_data, faq_embeddings
-    print("📥 Loading FAQ from MongoDB...")
-    
+    """Index pertama: jika MongoDB gagal dibaca, data dummy dipakai (tidak ditulis ke artifact)"""
+    source = fetch_faq_source()
+    index = build_index(fetch_faq() or [], source)
+    save_index_artifact(index)
+    _publish(index)
+
+def _refit():
+    """Fetch + fit untuk reload; None jika FAQ gagal dibaca"""
+    source = fetch_faq_source()
+    faq_data = fetch_faq()
+    if faq_data is None:
+        return None
+    return build_index(faq_data, source)
+
+# =========================
+# ARTIFACT INDEX DI DISK
+# =========================
+def save_index_artifact(index=None):
+    """
+    Tulis snapshot (default: yang aktif) sebagai artifact versi baru agar
+    worker lain dan proses berikutnya bisa langsung mmap tanpa MongoDB.
+    """
+    index = index or _index
+    if not FAQ_INDEX_DIR or not index.ready or index.is_dummy:
+        return None
+
     try:
-        faq_data = list(faq_collection.find({}))
+        version = write_artifact(
+            FAQ_INDEX_DIR,
+            index.data,
+            index.vectorizer.vocabulary_,
+            index.vectorizer.idf_,
+            index.embeddings,
+            index.postings,
+            index.keyword_flags,
+            params={**index.vectorizer.get_params(), "keyword_rules": KEYWORD_RULES.signature},
+            drift=index.drift,
+            source=index.source,
+        )
+        index.artifact_version = version
+        logger.info(f"💾 Index artifact {version} ditulis ke {FAQ_INDEX_DIR}")
+        return version
     except Exception as e:
-        print(f"❌ Failed to load FAQ from collection: {e}")
-        faq_data = []
+        logger.warning(f"⚠️ Gagal menulis index artifact: {e}")
+        return None
 
-    if not faq_data:
-        faq_embeddings = None
-        print("⚠️ FAQ kosong")
-        # Tambahkan data dummy untuk testing jika kosong
-        faq_data = [
-            {"_id": "1", "question": "cara buat ktp", "answer": "Untuk membuat KTP baru, bawa KK asli, surat pengantar RT/RW, dan fotokopi akta kelahiran ke kelurahan.", "category_id": "ktp"},
-            {"_id": "2", "question": "syarat ktp baru", "answer": "Syarat KTP baru: KK asli, surat pengantar RT/RW, fotokopi akta kelahiran, pas foto ukuran 3x4.", "category_id": "ktp"},
-            {"_id": "3", "question": "cetak ulang ktp", "answer": "Untuk cetak ulang KTP yang hilang/rusak: bawa KK asli, surat kehilangan dari kepolisian, dan bayar biaya administrasi.", "category_id": "ktp"}
-        ]
-        print("✅ Using dummy FAQ data for testing")
+def load_index_artifact(version=None, verify=False):
+    """
+    Pasang index dari artifact di disk (read-only mmap). Return True jika berhasil.
+    verify=True: tolak artifact yang sidik jari FAQ-nya tidak sama dengan
+    MongoDB saat ini (FAQ berubah selama aplikasi mati); jika MongoDB tidak
+    bisa dibaca, artifact tetap dipakai.
+    """
+    if not FAQ_INDEX_DIR:
+        return False
 
-    # Preprocess questions
-    questions = [preprocess_text(f["question"]) for f in faq_data]
-    
     try:
-        # Fit and transform FAQ questions
-        faq_embeddings = vectorizer.fit_transform(questions).toarray()
-        print(f"✅ {len(faq_data)} FAQ loaded and vectorized")
-        
+        artifact = read_artifact(FAQ_INDEX_DIR, version)
+        if artifact is None:
+            return False
+
+        manifest = artifact["manifest"]
+        if verify:
+            source = fetch_faq_source()
+            if source is not None and source != manifest.get("source"):
+                logger.info(f"🔁 Artifact {manifest['version']} tidak sesuai isi MongoDB, fit ulang")
+                return False
+
+        vectorizer = build_vectorizer()
+        vectorizer.set_params(vocabulary=artifact["vocabulary"])
+        vectorizer.idf_ = np.asarray(artifact["idf"])
+
+        # Flag keyword dari artifact hanya dipakai jika dibuat dengan rule yang sama
+        keyword_flags = artifact["keyword_flags"]
+        if artifact["manifest"]["params"].get("keyword_rules") != KEYWORD_RULES.signature:
+            keyword_flags = None
+
+        index = FaqIndex(
+            artifact["rows"],
+            vectorizer,
+            artifact["embeddings"],
+            postings=artifact["postings"],
+            positions={faq_id: i for i, faq_id in enumerate(artifact["ids"])},
+            artifact_version=artifact["manifest"]["version"],
+            keyword_flags=keyword_flags,
+            drift=manifest.get("drift"),
+            source=manifest.get("source"),
+        )
     except Exception as e:
-        print(f"❌ Failed to encode FAQ: {e}")
-        faq_embeddings = None
+        logger.warning(f"⚠️ Gagal membaca index artifact: {e}")
+        return False
+
+    _publish(index)
+    logger.info(f"✅ {len(index.data)} FAQ loaded from index artifact {index.artifact_version}")
+    return True
+
+def sync_index_artifact():
+    """Pasang artifact versi CURRENT jika berbeda dari dasar snapshot aktif"""
+    version = current_version(FAQ_INDEX_DIR) if FAQ_INDEX_DIR else None
+    if version and version != _index.artifact_version:
+        return load_index_artifact(version)
+    return False
+
+_last_artifact_poll = 0.0
+
+def _poll_index_artifact():
+    """Cek murah (baca file CURRENT) paling sering tiap FAQ_INDEX_POLL_SECONDS"""
+    global _last_artifact_poll
+    if not FAQ_INDEX_DIR or _index.artifact_version is None:
+        return
+    now = time.monotonic()
+    if now - _last_artifact_poll < FAQ_INDEX_POLL_SECONDS:
+        return
+    _last_artifact_poll = now
+    version = current_version(FAQ_INDEX_DIR)
+    if version is None:
+        # CURRENT dihapus (load_db / sync_faq_intents): fit ulang dari MongoDB
+        _wake_worker("reload")
+    elif version != _index.artifact_version:
+        _wake_worker("sync")
+
+# =========================
+# INISIALISASI (LAZY / WARM-UP)
+# =========================
+_ready_event = threading.Event()
+_init_started = False
+
+def init_engine():
+    """
+    Bangun index pertama secara sinkron: artifact di disk jika ada dan
+    masih sesuai isi MongoDB (tanpa fit), kalau tidak baru fit dari MongoDB.
+    Snapshot inkremental mewarisi sidik jari fit terakhir, jadi setelah FAQ
+    diubah admin boot berikutnya fit ulang sekali. Di bawah artifact_lock
+    hanya worker pertama yang fit; worker lain memakai hasilnya.
+    """
+    global _init_started
+    _init_started = True
+    try:
+        with _reload_lock, _index_lock, artifact_lock(FAQ_INDEX_DIR):
+            if not _ready_event.is_set():
+                if FAQ_INDEX_SOURCE == "mongo" or not load_index_artifact(verify=True):
+                    load_faq()
+    finally:
+        _ready_event.set()
+
+def start_warmup():
+    """Mulai init di background worker (sekali saja), tidak memblokir"""
+    global _init_started
+    if not _init_started:
+        _init_started = True
+        _wake_worker("init")
 
-# Load FAQ on startup
-load_faq()
+def is_ready():
+    return _ready_event.is_set()
+
+def wait_until_ready(timeout=None):
+    """Tunggu index pertama siap; return False jika timeout"""
+    start_warmup()
+    return _ready_event.wait(timeout)
 
 # =========================
 # HELPER: KEYWORD SCORE - SAMA PERSIS DENGAN MODEL PERTAMA
 # =========================
 def keyword_adjustment(user_text, faq_question):
-    u = user_text.lower()
-    q = faq_question.lower()
-    score = 0.0
+    """Adjustment untuk satu pasangan teks (di jalur chat dipakai versi vektornya)"""
+    return KEYWORD_RULES.adjustment(user_text, faq_question)
 
-    if any(k in u for k in KEYWORD_BARU):
-        if "baru" in q:
-            score += 0.05
-        if "cetak ulang" in q or "hilang" in q:
-            score -= 0.10
+# =========================
+# RETRIEVAL SPARSE + TOP-K
+# =========================
+def top_k_candidates(rows, scores):
+    """
+    Saring kandidat dengan threshold lalu ambil top-k via argpartition.
+    Jika batas top-k masih di dalam SCORE_WINDOW dari skor terbaik,
+    semua kandidat di dalam window ikut supaya hasil tetap sama
+    dengan scan penuh.
+    """
+    mask = scores >= SIMILARITY_THRESHOLD
+    rows, scores = rows[mask], scores[mask]
 
-    if any(k in u for k in KEYWORD_CETAK_ULANG):
-        if "cetak ulang" in q or "hilang" in q:
-            score += 0.05
-        if "baru" in q:
-            score -= 0.10
+    if len(scores) > CANDIDATE_TOP_K:
+        top = np.argpartition(-scores, CANDIDATE_TOP_K - 1)[:CANDIDATE_TOP_K]
+        floor = scores.max() - SCORE_WINDOW
+        if scores[top].min() >= floor:
+            top = np.flatnonzero(scores >= floor)
+        rows, scores = rows[top], scores[top]
 
-    return score
+    return rows, scores
 
 # =========================
 # CHAT FUNCTION - SAMA PERSIS LOGIKANYA DENGAN MODEL PERTAMA
 # =========================
+NOT_FOUND_MESSAGE = "Maaf, saya belum menemukan jawaban yang sesuai.\n\nCoba tanya tentang:\n• Cara membuat KTP\n• Syarat KTP baru\n• Cetak ulang KTP\n• Layanan kelurahan"
+ERROR_MESSAGE = "Maaf, terjadi kesalahan dalam memproses pertanyaan Anda."
+
+_response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# Instrumentasi jalur chat (lihat /metrics)
+STAGE_SECONDS = histogram(
+    "chatbot_stage_seconds",
+    "Durasi tiap tahap get_response (preprocess, vectorise, score, select, format)",
+    ["stage"],
+)
+RESPONSE_SECONDS = histogram(
+    "chatbot_response_seconds", "Durasi total get_response", ["cache"],
+)
+MAX_SIMILARITY = histogram(
+    "chatbot_max_similarity", "Skor cosine tertinggi per pertanyaan", [],
+    buckets=(0.1, 0.2, 0.3, SIMILARITY_THRESHOLD, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
 def get_response(user_text: str) -> str:
     if not user_text.strip():
         return "Silakan ketik pertanyaan Anda."
 
-    if faq_embeddings is None or len(faq_data) == 0:
+    # Index pertama belum siap: tunggu sebentar, jangan blokir worker terlalu lama
+    if not _ready_event.is_set() and not wait_until_ready(ENGINE_WARMUP_TIMEOUT):
+        return WARMING_UP_MESSAGE
+
+    _poll_index_artifact()
+
+    # Satu snapshot untuk seluruh request: data & vektor selalu konsisten
+    index = _index
+    if not index.ready:
         return "Data FAQ belum tersedia. Coba lagi nanti."
 
-    try:
-        # Preprocess user input
+    start = time.perf_counter()
+
+    # Preprocess user input
+    with timer(STAGE_SECONDS, stage="preprocess"):
         processed_input = preprocess_text(user_text)
-        
-        # Transform user input to vector
-        user_vec = vectorizer.transform([processed_input]).toarray()[0]
-        
-        # Calculate similarities
-        sims = cosine_similarity([user_vec], faq_embeddings)[0]
-        
-        # Debug info (opsional)
-        print(f"📊 Max similarity: {max(sims):.3f}")
-        
-        # Apply threshold and keyword adjustment - LOGIKA SAMA
-        scored = []
-        for idx, base_score in enumerate(sims):
-            if base_score < SIMILARITY_THRESHOLD:
-                continue
-
-            adjust = keyword_adjustment(user_text, faq_data[idx]["question"])
-            final_score = base_score + adjust
-            scored.append((idx, final_score))
-
-        if not scored:
-            return "Maaf, saya belum menemukan jawaban yang sesuai.\n\nCoba tanya tentang:\n• Cara membuat KTP\n• Syarat KTP baru\n• Cetak ulang KTP\n• Layanan kelurahan"
-
-        # Sort by score
-        scored.sort(key=lambda x: x[1], reverse=True)
-
-        # Get top answer(s) - LOGIKA SAMA
-        best_score = scored[0][1]
-        selected = [
-            (idx, score)
-            for idx, score in scored
-            if score >= best_score - MULTI_INTENT_GAP
-        ][:MAX_ANSWERS]
+
+    # Pertanyaan yang sama pada versi index yang sama -> jawaban yang sama
+    cache_key = (index.version, processed_input)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        RESPONSE_SECONDS.observe(time.perf_counter() - start, cache="hit")
+        return cached
+
+    response = _answer(index, processed_input)
+    if response != ERROR_MESSAGE:
+        _response_cache.set(cache_key, response)
+    RESPONSE_SECONDS.observe(time.perf_counter() - start, cache="miss")
+    return response
+
+def _answer(index, processed_input):
+    """Cari jawaban untuk teks yang sudah di-preprocess pada satu snapshot index"""
+    return _answer_batch(index, [processed_input])[0]
+
+def _answer_batch(index, texts):
+    """
+    Jawab beberapa teks (sudah di-preprocess) pada satu snapshot index:
+    satu transform, satu sparse matrix product, lalu threshold, keyword
+    adjustment dan gap rule dengan operasi array per baris.
+    """
+    try:
+        faq_data = index.data
+
+        # Transform semua input sekaligus (sparse), lalu skor lewat inverted index
+        with timer(STAGE_SECONDS, stage="vectorise"):
+            user_vecs = index.encode(texts)
+        with timer(STAGE_SECONDS, stage="score"):
+            sims = index.score(user_vecs)
+
+        select_start = time.perf_counter()
+
+        # Threshold + top-k per baris - LOGIKA SAMA
+        cand_rows, cand_faq, cand_base = [], [], []
+        for r in range(len(texts)):
+            start, end = sims.indptr[r], sims.indptr[r + 1]
+            faq_idx, scores = sims.indices[start:end], sims.data[start:end]
+
+            # Debug info (opsional)
+            max_similarity = scores.max() if len(scores) else 0.0
+            MAX_SIMILARITY.observe(max_similarity)
+            # INFO + SAMPLED: hanya ~LOG_SAMPLE_RATE request yang benar-benar ditulis
+            logger.info("📊 Max similarity: %.3f", max_similarity, extra=SAMPLED)
+
+            faq_idx, scores = top_k_candidates(faq_idx, scores)
+            cand_rows.append(np.full(len(faq_idx), r))
+            cand_faq.append(faq_idx)
+            cand_base.append(scores)
+
+        rows = np.concatenate(cand_rows).astype(np.int64)
+        faq_idx = np.concatenate(cand_faq).astype(np.int64)
+        base = np.concatenate(cand_base).astype(np.float64)
+
+        # Keyword adjustment: flag query sekali per teks, flag FAQ dari index,
+        # lalu satu operasi vektor untuk semua kandidat
+        query_flags = KEYWORD_RULES.query_flags(texts)
+        final = base + KEYWORD_RULES.adjust(query_flags[rows], index.keyword_flags[faq_idx])
+
+        # Urutkan per baris: skor tertinggi dulu, skor sama -> urutan FAQ (seperti scan penuh)
+        order = np.lexsort((faq_idx, -final, rows))
+        rows, faq_idx, final = rows[order], faq_idx[order], final[order]
+
+        # Gap rule: skor terbaik = elemen pertama tiap baris, maksimal MAX_ANSWERS
+        positions = np.arange(len(rows))
+        is_first = np.ones(len(rows), dtype=bool)
+        is_first[1:] = rows[1:] != rows[:-1]
+        group_start = np.maximum.accumulate(np.where(is_first, positions, 0))
+        keep = (final >= final[group_start] - MULTI_INTENT_GAP) & (positions - group_start < MAX_ANSWERS)
+
+        STAGE_SECONDS.observe(time.perf_counter() - select_start, stage="select")
 
         # Format response
-        responses = []
-        for idx, _ in selected:
-            responses.append(f"📌 {faq_data[idx]['answer']}")
+        with timer(STAGE_SECONDS, stage="format"):
+            answers = [[] for _ in texts]
+            for r, j in zip(rows[keep], faq_idx[keep]):
+                answers[r].append(f"📌 {faq_data[j]['answer']}")
 
-        return "\n\n".join(responses)
+            return ["\n\n".join(parts) if parts else NOT_FOUND_MESSAGE for parts in answers]
     
     except Exception as e:
-        print(f"❌ Chatbot error: {e}")
-        return "Maaf, terjadi kesalahan dalam memproses pertanyaan Anda."
+        logger.exception("❌ Chatbot error: %s", e)
+        return [ERROR_MESSAGE] * len(texts)
+
+def get_responses(texts):
+    """
+    Versi batch dari get_response untuk replay log / evaluasi offline.
+    Hasil sama persis dengan memanggil get_response satu per satu, tapi
+    semua pertanyaan yang belum ada di cache diproses dalam satu batch.
+    """
+    results = [None] * len(texts)
+    if not texts:
+        return results
+
+    if not _ready_event.is_set() and not wait_until_ready(ENGINE_WARMUP_TIMEOUT):
+        return [WARMING_UP_MESSAGE] * len(texts)
+
+    _poll_index_artifact()
+
+    index = _index
+    if not index.ready:
+        return ["Data FAQ belum tersedia. Coba lagi nanti."] * len(texts)
+
+    pending = {}  # teks hasil preprocess -> posisi di hasil
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i] = "Silakan ketik pertanyaan Anda."
+            continue
+
+        processed_input = preprocess_text(text)
+        cached = _response_cache.get((index.version, processed_input))
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(processed_input, []).append(i)
+
+    if pending:
+        unique_texts = list(pending)
+        for processed_input, response in zip(unique_texts, _answer_batch(index, unique_texts)):
+            if response != ERROR_MESSAGE:
+                _response_cache.set((index.version, processed_input), response)
+            for i in pending[processed_input]:
+                results[i] = response
+
+    return results
 
 # =========================
-# RELOAD FUNCTION - SAMA
+# RELOAD FUNCTION
 # =========================
 def reload_chatbot():
-    print("🔄 Reload chatbot...")
-    load_faq()
-    print("✅ Reload selesai")
+    """
+    Reload penuh: index baru dibangun di samping tanpa lock, lalu
+    dipublikasikan sekaligus. /chat tetap memakai snapshot lama selama
+    proses build dan tidak pernah melihat index setengah jadi. Jika FAQ
+    gagal dibaca dari MongoDB, snapshot lama tetap dipakai (bukan data
+    dummy). Return True jika snapshot baru dipublikasikan.
+    """
+    global _pending_ops
+    with _reload_lock:
+        logger.info("🔄 Reload chatbot...")
+        with _index_lock:
+            _pending_ops = []
+        base_version = current_version(FAQ_INDEX_DIR) if FAQ_INDEX_DIR else None
+
+        try:
+            index = _refit()
+
+            with _index_lock, artifact_lock(FAQ_INDEX_DIR):
+                if index is not None and base_version != (current_version(FAQ_INDEX_DIR) if FAQ_INDEX_DIR else None):
+                    # Worker lain menulis artifact selama fetch/fit: perubahannya
+                    # belum tentu ikut terbaca, fetch ulang di dalam lock
+                    index = _refit()
+                if index is None:
+                    logger.warning("⚠️ Reload dibatalkan: FAQ gagal dibaca, snapshot lama tetap dipakai")
+                    return False
+                # Update inkremental yang masuk selama build diterapkan ulang
+                for op, arg in _pending_ops:
+                    index = _apply_op(index, op, arg) or index
+                save_index_artifact(index)
+                _publish(index)
+        finally:
+            with _index_lock:
+                _pending_ops = None
+        _ready_event.set()
+        logger.info("✅ Reload selesai")
+        return True
+
+# =========================
+# BACKGROUND INDEX WORKER
+# =========================
+_worker_event = threading.Event()
+_worker_tasks = set()   # "init" (index pertama) / "reload" (fit ulang dari MongoDB) / "sync" (pasang artifact baru)
+_worker_thread = None
+
+def _index_worker():
+    while True:
+        _worker_event.wait()
+        # Permintaan yang masuk selama tugas berjalan digabung jadi satu putaran berikutnya
+        with _index_lock:
+            _worker_event.clear()
+            tasks = set(_worker_tasks)
+            _worker_tasks.clear()
+        try:
+            if "init" in tasks:
+                init_engine()
+            if "reload" in tasks:
+                reload_chatbot()
+            elif "sync" in tasks:
+                sync_index_artifact()
+        except Exception as e:
+            logger.error(f"❌ Reload chatbot gagal: {e}")
+
+def _wake_worker(task):
+    global _worker_thread
+    with _index_lock:
+        _worker_tasks.add(task)
+        _worker_event.set()
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_index_worker, name="faq-index", daemon=True)
+            _worker_thread.start()
+
+def request_reload(reason=""):
+    """Jadwalkan reload penuh di background worker (tidak memblokir)"""
+    if reason:
+        logger.info(f"🔁 Reload index dijadwalkan: {reason}")
+    _wake_worker("reload")
+
+# =========================
+# UPDATE INKREMENTAL (add/edit/delete FAQ)
+# =========================
+def _apply_op(index, op, arg):
+    if not index.ready or index.is_dummy:
+        return None
+    if op == "upsert":
+        return index.with_upsert(arg)
+    if op == "remove":
+        return index.with_removal(arg)
+    if op == "clear_category":
+        return index.with_category_cleared(arg)
+    return None
+
+def _update_index(op, arg):
+    """
+    Terapkan satu perubahan ke snapshot aktif lalu publikasikan snapshot baru.
+    Di bawah artifact_lock snapshot lebih dulu disamakan dengan artifact
+    CURRENT: worker lain bisa saja sudah menulis perubahan yang belum
+    terlihat oleh poll di worker ini, dan tidak boleh tertimpa.
+    """
+    with _index_lock, artifact_lock(FAQ_INDEX_DIR):
+        sync_index_artifact()
+        index = _index
+        if not index.ready or index.is_dummy:
+            request_reload("index belum di-fit dari database")
+            return False
+
+        try:
+            new_index = _apply_op(index, op, arg)
+        except Exception as e:
+            logger.error(f"❌ Failed to update FAQ index: {e}")
+            request_reload("gagal update inkremental")
+            return False
+
+        if new_index is None:
+            return False
+        if _pending_ops is not None:
+            _pending_ops.append((op, arg))
+        # Worker lain melihat perubahan lewat artifact dari snapshot hasil update
+        # inkremental ini (tanpa fit ulang); ditulis di dalam lock supaya urutan
+        # versi artifact sama dengan urutan publikasi
+        if FAQ_INDEX_DIR and save_index_artifact(new_index) is None:
+            request_reload("artifact index gagal ditulis")
+        _publish(new_index)
+
+    _check_drift(new_index)
+    return True
+
+def _check_drift(index):
+    """Refit penuh jika vocabulary/IDF hasil fit terakhir sudah terlalu usang"""
+    drift = index.drift
+    if drift["terms"] and drift["oov"] / drift["terms"] > REFIT_OOV_RATIO:
+        request_reload(f"{drift['oov']}/{drift['terms']} term di luar vocabulary")
+    elif drift["changed"] > REFIT_CHANGE_RATIO * max(len(index.data), 1):
+        request_reload(f"{drift['changed']} FAQ berubah sejak fit terakhir")
+
+def upsert_faq(doc):
+    """
+    Tambah atau ganti satu FAQ di index tanpa membaca ulang koleksi dan
+    tanpa refit vectorizer. Refit penuh hanya dijadwalkan jika drift
+    vocabulary melewati batas.
+    """
+    if not doc or not doc.get("question"):
+        return False
+    return _update_index("upsert", doc)
+
+def remove_faq(faq_id):
+    """Hapus satu FAQ dari index tanpa reload penuh"""
+    index = _index
+    if index.ready and len(index.data) == 1 and str(faq_id) in index.positions:
+        # Index kosong -> biarkan build_index yang menentukan (data dummy)
+        request_reload("FAQ terakhir dihapus")
+        return True
+    return _update_index("remove", faq_id)
+
+def clear_faq_category(category_id):
+    """Kosongkan category_id di row store (vektor tidak berubah)"""
+    return _update_index("clear_category", category_id)
 
 # =========================
 # UTILITY FUNCTIONS
 # =========================
 def get_faq_stats():
     """Get FAQ statistics"""
-    if not faq_data:
+    index = _index
+    if not _ready_event.is_set():
+        return {"count": 0, "status": "warming_up"}
+    if not index.data:
         return {"count": 0, "status": "empty"}
     
     return {
-        "count": len(faq_data),
+        "count": len(index.data),
         "status": "loaded",
-        "categories": len(set(f.get("category_id", "") for f in faq_data))
+        "version": index.version,
+        "categories": len(set(f.get("category_id", "") for f in index.data)),
+        "cache": get_cache_stats()
     }
 
+def get_cache_stats():
+    """Counter cache jawaban: hits, misses, evictions, ukuran"""
+    return _response_cache.stats()
+
+# =========================
+# STARTUP
+# =========================
+if ENGINE_INIT_MODE == "eager":
+    init_engine()
+elif ENGINE_INIT_MODE == "background":
+    start_warmup()
+
 # Test the chatbot on load
 if __name__ == "__main__":
+    init_engine()
     print("🧪 Testing chatbot...")
     test_questions = [
         "Halo",
@@ -1,9 +1,12 @@
 import os
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import sys
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
 from dotenv import load_dotenv
 import certifi
 
+from utils.metrics import MongoCommandMetrics
+
 # Load .env (untuk lokal)
 load_dotenv()
 
@@ -12,18 +15,17 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("❌ MONGO_URI belum diset di environment variable!")
 
-try:
-    client = MongoClient(
-        MONGO_URI,
-        tls=True,
-        tlsCAFile=certifi.where(),
-        serverSelectionTimeoutMS=5000
-    )
-    client.admin.command('ping')
-    print("✅ MongoDB connected successfully")
-except ConnectionFailure as e:
-    print(f"❌ MongoDB connection failed: {e}")
-    raise e
+# MongoClient tidak melakukan round trip saat dibuat; koneksi dibuka di
+# background dan dipakai saat query pertama. Import modul ini jadi tidak
+# memblokir cold start / spawn worker gunicorn.
+# MongoCommandMetrics mencatat durasi setiap command untuk /metrics.
+client = MongoClient(
+    MONGO_URI,
+    tls=True,
+    tlsCAFile=certifi.where(),
+    serverSelectionTimeoutMS=5000,
+    event_listeners=[MongoCommandMetrics()]
+)
 
 DB_NAME = os.getenv("DB_NAME", "faq_app")
 db = client[DB_NAME]
@@ -34,8 +36,159 @@ admin_logs_collection = db["admin_logs"]
 faq_collection = db["faq"]
 categories_collection = db["categories"]
 
-print("DB name:", db.name)
-print("Collections:", db.list_collection_names())
+# =========================
+# RETENSI ADMIN LOG
+# =========================
+# Log lebih tua dari ADMIN_LOG_RETENTION_DAYS dihapus MongoDB lewat TTL index
+# (0 = simpan selamanya). Dengan ADMIN_LOG_ARCHIVE=true, log lama diringkas
+# dulu ke admin_logs_archive (services/log_retention.py); TTL diberi jeda
+# ADMIN_LOG_ARCHIVE_GRACE_DAYS supaya tidak mendahului roll-up.
+ADMIN_LOG_RETENTION_DAYS = int(os.getenv("ADMIN_LOG_RETENTION_DAYS", "30"))
+ADMIN_LOG_ARCHIVE = os.getenv("ADMIN_LOG_ARCHIVE", "false").lower() == "true"
+ADMIN_LOG_ARCHIVE_GRACE_DAYS = int(os.getenv("ADMIN_LOG_ARCHIVE_GRACE_DAYS", "7"))
+
+
+def admin_log_ttl_seconds():
+    if ADMIN_LOG_RETENTION_DAYS <= 0:
+        return 0
+    days = ADMIN_LOG_RETENTION_DAYS + (ADMIN_LOG_ARCHIVE_GRACE_DAYS if ADMIN_LOG_ARCHIVE else 0)
+    return days * 86400
+
+
+def _ttl_option():
+    ttl = admin_log_ttl_seconds()
+    return {"expireAfterSeconds": ttl} if ttl else {}
+
+
+# =========================
+# INDEX
+# =========================
+# (collection, keys, opsi create_index). Nama eksplisit supaya pembuatan
+# ulang idempoten; ubah nama jika definisi index diubah.
+INDEXES = [
+    # Login dan cek username saat tambah admin
+    ("users", [("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+    # Owner default tidak punya email: unique hanya untuk email yang terisi
+    ("users", [("email", ASCENDING)], {
+        "name": "email_unique",
+        "unique": True,
+        "partialFilterExpression": {"email": {"$type": "string"}},
+    }),
+    # Aktivasi akun: find_one({activation_token, status: "pending"}); token
+    # di-$unset setelah aktif, jadi index hanya berisi user yang pending
+    ("users", [("activation_token", ASCENDING), ("status", ASCENDING)], {
+        "name": "activation_token_pending",
+        "partialFilterExpression": {"status": "pending"},
+    }),
+    # Upsert restore / load_db untuk record tanpa _id (berdasarkan question / name)
+    ("faq", [("question", ASCENDING)], {"name": "question_1"}),
+    ("categories", [("name", ASCENDING)], {"name": "name_1"}),
+    # delete_category (count_documents / update_many) dan GET /faq?category_id=
+    # (urut _id untuk pagination)
+    ("faq", [("category_id", ASCENDING), ("_id", ASCENDING)], {"name": "category_id_1__id_1"}),
+    # Sort log terbaru + TTL retensi (index TTL harus single-field)
+    ("admin_logs", [("timestamp", ASCENDING)], {"name": "timestamp_1", **_ttl_option()}),
+    # GET /admin/logs: keyset (timestamp, _id) terbaru dulu, dengan/tanpa filter
+    ("admin_logs", [("timestamp", ASCENDING), ("_id", ASCENDING)], {"name": "timestamp_1__id_1"}),
+    ("admin_logs", [("username", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+     {"name": "username_1_timestamp_1__id_1"}),
+    ("admin_logs", [("action", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+     {"name": "action_1_timestamp_1__id_1"}),
+    # GET /admin/logs?since=, feed live dan export logs bertahap: entry yang
+    # ditulis sejak watermark / cursor (inserted_at, _id)
+    ("admin_logs", [("inserted_at", ASCENDING), ("_id", ASCENDING)], {"name": "inserted_at_1__id_1"}),
+    # Roll-up arsip log per hari
+    ("admin_logs_archive", [("day", ASCENDING)], {"name": "day_1"}),
+    # Rate limit login bersama (utils/rate_limit.py): satu dokumen per IP per
+    # window, dihapus MongoDB setelah expires_at
+    ("rate_limits", [("expires_at", ASCENDING)], {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+]
+
+INDEX_OPTIONS_CONFLICT = (85, 86)  # IndexOptionsConflict, IndexKeySpecsConflict
+
+
+def _sync_ttl(collection, keys, options):
+    """
+    Index dengan nama sama sudah ada tapi expireAfterSeconds berbeda
+    (retensi diubah): ubah lewat collMod tanpa membangun ulang index.
+    MongoDB lama tidak bisa menjadikan index biasa TTL lewat collMod dan
+    TTL tidak bisa dilepas: index dibuat ulang.
+    """
+    name = options["name"]
+    existing = db[collection].index_information().get(name)
+    if existing is None or existing.get("key") != keys:
+        return False
+    if {k: v for k, v in existing.items() if k not in ("v", "key", "ns", "expireAfterSeconds")} != \
+            {k: v for k, v in options.items() if k not in ("name", "expireAfterSeconds")}:
+        return False  # bukan sekadar beda TTL
+
+    ttl = options.get("expireAfterSeconds")
+    if ttl is not None:
+        try:
+            db.command("collMod", collection, index={"name": name, "expireAfterSeconds": ttl})
+            return True
+        except PyMongoError:
+            pass
+    db[collection].drop_index(name)
+    db[collection].create_index(keys, **options)
+    return True
+
+
+def ensure_indexes(collections=None, verbose=True):
+    """
+    Buat semua index di INDEXES (idempoten: index yang sudah ada dilewati
+    MongoDB). `collections` membatasi ke collection tertentu. Return dict
+    nama index -> True jika ada/berhasil, atau pesan error. Satu index
+    yang gagal (misalnya data lama masih duplikat) tidak menghentikan
+    index lainnya.
+    """
+    results = {}
+    for collection, keys, options in INDEXES:
+        if collections is not None and collection not in collections:
+            continue
+        name = options["name"]
+        try:
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                if e.code not in INDEX_OPTIONS_CONFLICT or not _sync_ttl(collection, keys, options):
+                    raise
+            results[name] = True
+            if verbose:
+                print(f"✅ Index {collection}.{name} siap")
+        except PyMongoError as e:
+            results[name] = str(e)
+            if verbose:
+                print(f"❌ Index {collection}.{name} gagal dibuat: {e}")
+    return results
+
+
+def check_connection():
+    """Ping MongoDB (satu round trip). Return True jika server bisa dihubungi"""
+    try:
+        client.admin.command('ping')
+        print("✅ MongoDB connected successfully")
+        return True
+    except ConnectionFailure as e:
+        print(f"❌ MongoDB connection failed: {e}")
+        return False
+
+# Opsional: cek koneksi saat startup (memblokir sampai server menjawab)
+if os.getenv("DB_PING_ON_STARTUP", "false").lower() == "true":
+    if not check_connection():
+        raise ConnectionFailure("MongoDB tidak bisa dihubungi saat startup")
+
+# Opsional: buat index saat startup (satu round trip per index)
+if os.getenv("DB_ENSURE_INDEXES_ON_STARTUP", "false").lower() == "true":
+    ensure_indexes()
+
+if __name__ == "__main__":
+    # python db.py --ensure-indexes  -> buat index lalu keluar (exit 1 jika ada yang gagal)
+    if "--ensure-indexes" in sys.argv[1:]:
+        results = ensure_indexes()
+        sys.exit(0 if all(ok is True for ok in results.values()) else 1)
 
-docs = list(faq_collection.find())
-print("Jumlah FAQ:", len(docs))
\ No newline at end of file
+    check_connection()
+    print("DB name:", db.name)
+    print("Collections:", db.list_collection_names())
+    print("Jumlah FAQ:", faq_collection.estimated_document_count())
\ No newline at end of file
@@ -1,28 +1,52 @@
 from db import db  # ambil instance MongoDB dari db.py
-import json
 import os
+import sys
+
+from services import content_version, restore_service
+from utils import index_artifact
 
 # Path file JSON
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CATEGORIES_FILE = os.path.join(BASE_DIR, "categories.json")
-FAQ_FILE = os.path.join(BASE_DIR, "categories.json")  # ini kalau FAQ masih ikut categories.json
-# Kalau ada faq.json berbeda, ganti pathnya ke faq.json
-# FAQ_FILE = os.path.join(BASE_DIR, "faq.json")
+FAQ_FILE = os.path.join(BASE_DIR, "faq.json")
+FAQ_INDEX_DIR = os.environ.get("FAQ_INDEX_DIR", os.path.join(BASE_DIR, "data", "index"))
+
+# python load_db.py            -> upsert (aman dijalankan berulang, tanpa duplikat)
+# python load_db.py --replace  -> hapus data lama dulu seperti sebelumnya
+REPLACE = "--replace" in sys.argv[1:]
+
+collections = {"categories": db["categories"], "faq": db["faq"]}
+
+
+def load(path, collection):
+    """Import satu file JSON lewat pipeline restore (streaming + bulk upsert)"""
+    if REPLACE:
+        collections[collection].delete_many({})  # hapus data lama
+
+    with open(path, "rb") as f:
+        for event in restore_service.restore(restore_service.iter_text(f), collections, collection=collection):
+            if event["event"] == "progress":
+                print(f"  ... {event['per_collection'][collection]} record diproses")
+
+    for error in event["errors"]:
+        print(f"⚠️ {error}")
+    if event["event"] == "error":
+        print(f"❌ {os.path.basename(path)}: {event['message']}")
+    return event
+
 
 # Load categories.json
-with open(CATEGORIES_FILE, "r", encoding="utf-8") as f:
-    categories_data = json.load(f)
-
-categories_collection = db["categories"]
-categories_collection.delete_many({})  # hapus data lama (opsional)
-categories_collection.insert_many(categories_data)
-print(f"{len(categories_data)} kategori berhasil dimasukkan ke database!")
-
-# Load faq.json / categories.json
-with open(FAQ_FILE, "r", encoding="utf-8") as f:
-    faq_data = json.load(f)
-
-faq_collection = db["faq"]
-faq_collection.delete_many({})  # hapus data lama (opsional)
-faq_collection.insert_many(faq_data)
-print(f"{len(faq_data)} FAQ berhasil dimasukkan ke database!")
\ No newline at end of file
+result = load(CATEGORIES_FILE, "categories")
+print(f"{result['per_collection']['categories']} kategori berhasil dimasukkan ke database! "
+      f"({result['upserted']} baru, {result['modified']} diperbarui, {result['invalid']} tidak valid)")
+
+# Load faq.json
+result = load(FAQ_FILE, "faq")
+print(f"{result['per_collection']['faq']} FAQ berhasil dimasukkan ke database! "
+      f"({result['upserted']} baru, {result['modified']} diperbarui, {result['invalid']} tidak valid)")
+
+# Cache /faq dan /categories di browser/worker harus diperbarui
+content_version.bump("LOAD_DB")
+# Artifact index chatbot dibuat dari FAQ lama: start berikutnya fit ulang
+if index_artifact.invalidate(FAQ_INDEX_DIR):
+    print("🗑️ Artifact index chatbot dihapus, akan dibangun ulang dari database")
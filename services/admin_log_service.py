@@ -0,0 +1,153 @@
+# services/admin_log_service.py
+"""
+Query GET /admin/logs: pagination keyset pada (timestamp, _id) urut
+terbaru dulu, filter username / action / rentang tanggal, dan `since`
+untuk auto-refresh (hanya entry yang lebih baru dari yang sudah dimiliki
+klien). Setiap halaman memakai index compound di db.INDEXES, jadi biaya
+query sebanding dengan satu halaman, bukan seluruh collection.
+
+    GET /admin/logs                                  200 log terbaru (seperti sebelumnya)
+    GET /admin/logs?limit=50&cursor=<X-Next-Cursor>  halaman lebih lama
+    GET /admin/logs?username=owner&action=ADD_FAQ
+    GET /admin/logs?from=2024-01-01&to=2024-01-31    (tanggal "to" inklusif)
+    GET /admin/logs?since=<X-Latest-Cursor>          hanya entry baru
+
+Cursor berbentuk "<timestamp epoch ms>_<ObjectId>".
+
+`since` tidak memakai timestamp entry: audit sink menulis batch dengan
+jeda, beberapa worker flush sendiri-sendiri dan journal bisa diputar ulang
+jauh belakangan, jadi entry bisa masuk setelah entry lain yang timestamp-nya
+lebih baru. X-Latest-Cursor adalah waktu query (watermark) dan `since`
+mencari inserted_at (waktu entry ditulis, diisi audit sink) sejak watermark
+itu dikurangi LOG_SINCE_OVERLAP_SECONDS, untuk batch yang sedang ditulis
+dan selisih jam antar worker. Entry di dalam overlap bisa terkirim lagi:
+klien membuang _id yang sudah dimiliki.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+LOG_PAGE_DEFAULT = 200
+LOG_PAGE_MAX = 500
+LOG_SINCE_OVERLAP_SECONDS = float(os.environ.get("LOG_SINCE_OVERLAP_SECONDS", "30"))
+
+
+# =========================
+# CURSOR
+# =========================
+def encode_cursor(log):
+    ts = log["timestamp"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    # BSON date berpresisi milidetik, jadi nilai ini persis sama dengan yang tersimpan
+    return f"{int(ts.timestamp() * 1000)}_{log['_id']}"
+
+
+def watermark_cursor(now=None):
+    """Cursor `since` untuk entry yang ditulis mulai `now` (default sekarang)"""
+    now = now or datetime.now(timezone.utc)
+    return f"{int(now.timestamp() * 1000)}_{'0' * 24}"
+
+
+def decode_cursor(value, name="cursor"):
+    millis, _, oid = value.partition("_")
+    if not millis.isdigit() or not ObjectId.is_valid(oid):
+        raise ValueError(f"{name} tidak valid")
+    return datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc), ObjectId(oid)
+
+
+def _older_than(ts, oid):
+    return {"$or": [{"timestamp": {"$lt": ts}}, {"timestamp": ts, "_id": {"$lt": oid}}]}
+
+
+def _inserted_since(ts):
+    return {"inserted_at": {"$gte": ts - timedelta(seconds=LOG_SINCE_OVERLAP_SECONDS)}}
+
+
+# =========================
+# PARAMETER
+# =========================
+def _parse_date(value, name, end=False):
+    """ISO date / datetime; tanggal saja sebagai batas "to" berarti sampai akhir hari itu"""
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{name} harus berformat ISO 8601, contoh 2024-01-31 atau 2024-01-31T08:00:00Z")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def parse_log_query(args):
+    """Parameter GET /admin/logs dari query string. Raise ValueError jika tidak valid."""
+    params = {"filter": {}, "limit": LOG_PAGE_DEFAULT, "cursor": None, "since": None}
+
+    for field in ("username", "action"):
+        value = args.get(field, "").strip()
+        if value:
+            # Beberapa nilai dipisah koma: action=ADD_FAQ,EDIT_FAQ
+            values = [v.strip() for v in value.split(",") if v.strip()]
+            params["filter"][field] = values[0] if len(values) == 1 else {"$in": values}
+
+    date_range = {}
+    if args.get("from"):
+        date_range["$gte"] = _parse_date(args["from"], "from")
+    if args.get("to"):
+        date_range["$lt"] = _parse_date(args["to"], "to", end=True)
+    if date_range:
+        params["filter"]["timestamp"] = date_range
+
+    limit = args.get("limit", "").strip()
+    if limit:
+        if not limit.isdigit() or not 0 < int(limit) <= LOG_PAGE_MAX:
+            raise ValueError(f"limit harus bilangan bulat 1-{LOG_PAGE_MAX}")
+        params["limit"] = int(limit)
+
+    if args.get("cursor"):
+        params["cursor"] = decode_cursor(args["cursor"])
+    if args.get("since"):
+        params["since"] = decode_cursor(args["since"], "since")
+
+    return params
+
+
+# =========================
+# QUERY
+# =========================
+def find_logs(params):
+    """
+    (log terbaru dulu dengan _id string, cursor halaman lebih lama atau
+    None, watermark untuk `since` berikutnya atau None untuk halaman lama)
+    """
+    from db import admin_logs_collection
+
+    # Diambil sebelum query: entry yang ditulis selama query tetap ikut `since` berikutnya
+    latest_cursor = watermark_cursor() if params["cursor"] is None else None
+
+    clauses = [params["filter"]] if params["filter"] else []
+    if params["cursor"] is not None:
+        clauses.append(_older_than(*params["cursor"]))
+    if params["since"] is not None:
+        clauses.append(_inserted_since(params["since"][0]))
+    query = {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+
+    limit = params["limit"]
+    logs = list(
+        admin_logs_collection.find(query)
+        .sort([("timestamp", -1), ("_id", -1)])
+        .limit(limit + 1)  # satu ekstra untuk tahu apakah masih ada halaman berikutnya
+    )
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        # Dengan since, sisa entry baru diambil dengan cursor + since yang sama
+        next_cursor = encode_cursor(logs[-1])
+
+    for log in logs:
+        log["_id"] = str(log["_id"])
+    return logs, next_cursor, latest_cursor
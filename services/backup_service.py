@@ -0,0 +1,350 @@
+# services/backup_service.py
+"""
+Export backup secara streaming: cursor MongoDB dibaca per batch, nama
+kategori diambil dari satu map yang di-prefetch, dan JSON ditulis
+sepotong-sepotong lewat generator. Memori tetap datar berapapun ukuran
+collection. Format json identik dengan json.dumps(..., indent=2,
+ensure_ascii=False); format ndjson menulis satu dokumen per baris.
+Export bisa dibatasi/dilanjutkan dengan cursor after_id / since / limit.
+"""
+
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from services import admin_log_service
+
+# Jumlah dokumen per batch cursor dan ukuran potongan yang dikirim ke klien
+BACKUP_BATCH_SIZE = 500
+BACKUP_CHUNK_BYTES = 64 * 1024
+
+BACKUP_GZIP_LEVEL = 6
+
+BACKUP_VERSION = "1.0"
+BACKUP_FORMATS = ("json", "ndjson")
+
+
+# =========================
+# FORMAT RECORD
+# =========================
+def load_category_names():
+    """Map _id kategori -> nama, satu query untuk seluruh export"""
+    from db import categories_collection
+
+    return {
+        c["_id"]: c.get("name", "-")
+        for c in categories_collection.find({}, {"name": 1})
+    }
+
+
+def category_name(category_names, category_id):
+    """Nama kategori dari map (sama seperti lookup ObjectId(category_id) sebelumnya)"""
+    if not category_id:
+        return "-"
+    try:
+        return category_names.get(ObjectId(category_id), "-")
+    except Exception:
+        return "-"
+
+
+def format_category(cat):
+    return {**cat, "_id": str(cat["_id"])}
+
+
+def format_faq(faq, category_names=None):
+    formatted = {
+        "_id": str(faq["_id"]),
+        "question": faq.get("question", ""),
+        "answer": faq.get("answer", ""),
+        "category_id": faq.get("category_id", ""),
+    }
+    if category_names is not None:
+        formatted["category_name"] = category_name(category_names, faq.get("category_id"))
+    return formatted
+
+
+def format_log(log):
+    return {
+        "_id": str(log["_id"]),
+        "username": log.get("username", ""),
+        "role": log.get("role", ""),
+        "action": log.get("action", ""),
+        "detail": log.get("detail", ""),
+        "ip": log.get("ip", ""),
+        "timestamp": log.get("timestamp", "").isoformat() if log.get("timestamp") else "",
+    }
+
+
+# =========================
+# JSON STREAMING
+# =========================
+def _dumps(value, level):
+    """json.dumps indent=2 untuk nilai yang berada pada kedalaman `level`"""
+    text = json.dumps(value, indent=2, ensure_ascii=False, default=str)
+    return text.replace("\n", "\n" + "  " * level)
+
+
+def iter_json_array(records, level=0, counter=None):
+    """
+    Potongan teks array JSON dari iterable record. `counter` (dict) diisi
+    jumlah record di key "count" setelah array selesai.
+    """
+    pad = "  " * (level + 1)
+    count = 0
+    for record in records:
+        yield ("[\n" if count == 0 else ",\n") + pad + _dumps(record, level + 1)
+        count += 1
+    yield "[]" if count == 0 else "\n" + "  " * level + "]"
+    if counter is not None:
+        counter["count"] = count
+
+
+def buffered(chunks, size=BACKUP_CHUNK_BYTES):
+    """Gabungkan potongan kecil supaya tidak ada satu write per dokumen"""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_ndjson(records, counter=None):
+    """Satu dokumen JSON ringkas per baris (NDJSON)"""
+    count = 0
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        count += 1
+    if counter is not None:
+        counter["count"] = count
+
+
+def gzip_chunks(chunks, level=BACKUP_GZIP_LEVEL):
+    """Kompres potongan teks menjadi stream gzip (untuk Content-Encoding: gzip)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = header gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# =========================
+# CURSOR (RESUME / INKREMENTAL)
+# =========================
+def parse_cursor(args, kind=None):
+    """
+    Parameter cursor dari query string:
+      after_id  hanya dokumen dengan _id > after_id (lanjutkan export yang terputus);
+                logs: nilai X-Next-Cursor "<inserted_at epoch ms>_<ObjectId>"
+      since     ISO datetime; logs: ditulis (inserted_at) sejak since, FAQ/kategori:
+                dibuat sejak (waktu di dalam ObjectId)
+      limit     jumlah dokumen maksimal per export
+    Raise ValueError jika format tidak valid.
+
+    Logs diurutkan menurut waktu ditulis, bukan _id / timestamp: audit sink
+    mengisi keduanya saat submit tapi menulisnya belakangan (batch, worker
+    lain, replay journal), jadi entry bisa masuk dengan _id lebih kecil dari
+    cursor yang sudah lewat. Entry yang ditulis kurang dari
+    LOG_SINCE_OVERLAP_SECONDS lalu (batch yang mungkin masih berjalan)
+    menunggu export berikutnya.
+    """
+    cursor = {"after_id": None, "since": None, "limit": 0, "until": None}
+
+    after_id = args.get("after_id")
+    if after_id and kind == "logs":
+        millis = after_id.partition("_")[0]
+        inserted_at, oid = admin_log_service.decode_cursor(after_id, "after_id")
+        # 0 = entry lama tanpa inserted_at (diurutkan paling awal)
+        cursor["after_id"] = (None if millis == "0" else inserted_at, oid)
+    elif after_id:
+        if not ObjectId.is_valid(after_id):
+            raise ValueError("after_id bukan ObjectId yang valid")
+        cursor["after_id"] = ObjectId(after_id)
+
+    since = args.get("since")
+    if since:
+        try:
+            since = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("since harus berformat ISO 8601, contoh 2024-01-31T00:00:00Z")
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        cursor["since"] = since
+
+    limit = args.get("limit")
+    if limit:
+        if not limit.isdigit() or int(limit) <= 0:
+            raise ValueError("limit harus bilangan bulat positif")
+        cursor["limit"] = int(limit)
+
+    if kind == "logs":
+        cursor["until"] = datetime.now(timezone.utc) - timedelta(
+            seconds=admin_log_service.LOG_SINCE_OVERLAP_SECONDS
+        )
+    return cursor
+
+
+def log_cursor(log):
+    """Cursor after_id logs untuk entry ini: <inserted_at epoch ms>_<_id>"""
+    inserted_at = log.get("inserted_at")
+    if inserted_at is None:
+        return f"0_{log['_id']}"
+    if inserted_at.tzinfo is None:
+        inserted_at = inserted_at.replace(tzinfo=timezone.utc)
+    return f"{int(inserted_at.timestamp() * 1000)}_{log['_id']}"
+
+
+def _is_cursor(cursor):
+    return bool(cursor and (cursor["after_id"] or cursor["since"] or cursor["limit"]))
+
+
+def _log_cursor_query(cursor):
+    # $not $gt: entry lama tanpa inserted_at tetap ikut
+    clauses = [{"inserted_at": {"$not": {"$gt": cursor["until"]}}}]
+    if cursor["after_id"] is not None:
+        inserted_at, oid = cursor["after_id"]
+        if inserted_at is None:
+            clauses.append({"$or": [{"inserted_at": None, "_id": {"$gt": oid}},
+                                    {"inserted_at": {"$ne": None}}]})
+        else:
+            clauses.append({"$or": [{"inserted_at": {"$gt": inserted_at}},
+                                    {"inserted_at": inserted_at, "_id": {"$gt": oid}}]})
+    if cursor["since"] is not None:
+        clauses.append({"inserted_at": {"$gte": cursor["since"]}})
+    return {"$and": clauses}
+
+
+def _cursor_query(kind, cursor):
+    if kind == "logs":
+        return _log_cursor_query(cursor)
+    query = {}
+    if cursor["after_id"] is not None:
+        query["_id"] = {"$gt": cursor["after_id"]}
+    if cursor["since"] is not None:
+        query.setdefault("_id", {})["$gte"] = ObjectId.from_datetime(cursor["since"])
+    return query
+
+
+def _cursor_sort(kind):
+    if kind == "logs":
+        return [("inserted_at", 1), ("_id", 1)]
+    return [("_id", 1)]
+
+
+# =========================
+# EXPORT PER COLLECTION
+# =========================
+def _collection(kind):
+    from db import admin_logs_collection, categories_collection, faq_collection
+
+    return {
+        "categories": categories_collection,
+        "faq": faq_collection,
+        "logs": admin_logs_collection,
+    }[kind]
+
+
+PROJECTIONS = {
+    "categories": None,
+    "faq": {"question": 1, "answer": 1, "category_id": 1},
+    "logs": {"username": 1, "role": 1, "action": 1, "detail": 1, "ip": 1, "timestamp": 1},
+}
+
+
+def _find(kind, cursor=None):
+    """
+    Cursor MongoDB untuk export. Tanpa parameter cursor urutannya sama
+    seperti sebelumnya (logs terbaru dulu); dengan cursor _id naik (logs:
+    inserted_at lalu _id) supaya export bisa dilanjutkan dari after_id terakhir.
+    """
+    if _is_cursor(cursor):
+        found = _collection(kind).find(_cursor_query(kind, cursor), PROJECTIONS[kind]).sort(_cursor_sort(kind))
+        if cursor["limit"]:
+            found = found.limit(cursor["limit"])
+    else:
+        found = _collection(kind).find({}, PROJECTIONS[kind])
+        if kind == "logs":
+            found = found.sort("timestamp", -1)
+    return found.batch_size(BACKUP_BATCH_SIZE)
+
+
+def next_cursor(kind, cursor):
+    """
+    after_id untuk halaman berikutnya jika export dibatasi limit dan
+    halaman ini penuh (None jika tidak ada). Dihitung sebelum streaming
+    dimulai karena header harus dikirim lebih dulu.
+    """
+    if not cursor or not cursor["limit"]:
+        return None
+    last = list(
+        _collection(kind).find(_cursor_query(kind, cursor), {"_id": 1, "inserted_at": 1})
+        .sort(_cursor_sort(kind)).skip(cursor["limit"] - 1).limit(1)
+    )
+    if not last:
+        return None
+    return log_cursor(last[0]) if kind == "logs" else str(last[0]["_id"])
+
+
+def iter_records(kind, cursor=None):
+    """Record terformat untuk satu collection (categories, faq, logs)"""
+    if kind == "faq":
+        category_names = load_category_names()
+        return (format_faq(faq, category_names) for faq in _find(kind, cursor))
+    if kind == "logs":
+        return (format_log(log) for log in _find(kind, cursor))
+    return (format_category(cat) for cat in _find(kind, cursor))
+
+
+def export(kind, fmt="json", cursor=None):
+    """Potongan teks export satu collection dalam format json (array) atau ndjson"""
+    records = iter_records(kind, cursor)
+    if fmt == "ndjson":
+        return buffered(iter_ndjson(records))
+    return buffered(iter_json_array(records))
+
+
+def _all_categories():
+    return ({"_id": str(c["_id"]), "name": c.get("name", "")} for c in _find("categories"))
+
+
+def _all_faqs():
+    return (format_faq(faq) for faq in _find("faq"))
+
+
+def export_all(timestamp, fmt="json"):
+    """Backup lengkap: kategori + FAQ, metadata (jumlah) ditulis di akhir"""
+    def chunks():
+        categories, faqs = {}, {}
+        yield "{\n" + f'  "timestamp": {json.dumps(timestamp)},\n  "categories": '
+        yield from iter_json_array(_all_categories(), level=1, counter=categories)
+        yield ',\n  "faqs": '
+        yield from iter_json_array(_all_faqs(), level=1, counter=faqs)
+        yield ',\n  "metadata": ' + _dumps(_metadata(categories, faqs), 1) + "\n}"
+
+    def ndjson_chunks():
+        # Setiap baris diberi "_collection" supaya bisa dipisah lagi saat restore
+        categories, faqs = {}, {}
+        yield from iter_ndjson(
+            ({"_collection": "categories", **c} for c in _all_categories()), counter=categories
+        )
+        yield from iter_ndjson(({"_collection": "faq", **f} for f in _all_faqs()), counter=faqs)
+        yield json.dumps(
+            {"_collection": "metadata", "timestamp": timestamp, **_metadata(categories, faqs)},
+            ensure_ascii=False,
+        ) + "\n"
+
+    return buffered(ndjson_chunks() if fmt == "ndjson" else chunks())
+
+
+def _metadata(categories, faqs):
+    return {
+        "categories_count": categories["count"],
+        "faqs_count": faqs["count"],
+        "backup_version": BACKUP_VERSION,
+    }
@@ -0,0 +1,97 @@
+# services/content_version.py
+"""
+Versi konten FAQ + kategori untuk conditional GET (ETag / Last-Modified).
+
+Satu dokumen di collection "meta" menyimpan counter yang dinaikkan
+setiap kali FAQ atau kategori diubah. Nilainya di-cache per proses
+selama CONTENT_VERSION_TTL detik, jadi request dengan If-None-Match yang
+masih cocok dijawab 304 tanpa query MongoDB sama sekali. Worker lain
+melihat versi baru paling lambat setelah TTL habis; worker yang
+melakukan perubahan langsung memakai versi barunya.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_VERSION_TTL = float(os.environ.get("CONTENT_VERSION_TTL", "2"))
+CONTENT_MAX_AGE = int(os.environ.get("CONTENT_MAX_AGE", "0"))  # max-age Cache-Control (detik)
+
+META_ID = "content_version"
+
+_cached = None  # (version, updated_at, expires_at)
+_lock = threading.Lock()
+
+
+def _meta_collection():
+    from db import db
+
+    return db["meta"]
+
+
+def _store(doc):
+    global _cached
+    version = doc.get("version", 0)
+    # Presisi detik: header Last-Modified / If-Modified-Since tidak punya milidetik
+    # (None jika konten belum pernah diubah sejak fitur ini ada)
+    updated_at = doc.get("updated_at")
+    if updated_at is not None:
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        updated_at = updated_at.replace(microsecond=0)
+    with _lock:
+        _cached = (version, updated_at, time.monotonic() + CONTENT_VERSION_TTL)
+    return version, updated_at
+
+
+def current():
+    """
+    (version, updated_at) dari cache, atau dari MongoDB jika TTL habis.
+    Return None jika MongoDB tidak bisa dibaca (response tanpa cache header).
+    """
+    cached = _cached
+    if cached is not None and time.monotonic() < cached[2]:
+        return cached[0], cached[1]
+    try:
+        doc = _meta_collection().find_one({"_id": META_ID}) or {}
+    except PyMongoError as e:
+        logger.warning("⚠️ Versi konten tidak bisa dibaca: %s", e)
+        return None
+    return _store(doc)
+
+
+def bump(reason="", collection=None):
+    """Naikkan versi konten setelah FAQ / kategori berubah"""
+    try:
+        doc = (collection if collection is not None else _meta_collection()).find_one_and_update(
+            {"_id": META_ID},
+            {"$inc": {"version": 1},
+             "$set": {"updated_at": datetime.now(timezone.utc), "reason": reason}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except PyMongoError as e:
+        # Tanpa bump, worker lain bisa menjawab 304 dengan data lama: buang cache lokal
+        logger.error("❌ Versi konten gagal dinaikkan (%s): %s", reason, e)
+        invalidate()
+        return None
+    return _store(doc)
+
+
+def invalidate():
+    """Paksa pembacaan ulang versi dari MongoDB pada request berikutnya"""
+    global _cached
+    with _lock:
+        _cached = None
+
+
+def etag(version):
+    return f"v{version}"
@@ -1,14 +1,117 @@
-from db import faq_collection
+# services/faq_service.py
+"""
+Query GET /faq: filter kategori, pencarian teks, projection field dan
+pagination keyset (_id naik). Satu halaman hanya membaca dokumen halaman
+itu dari MongoDB; index yang dipakai ada di db.INDEXES (dibuat oleh
+`python db.py --ensure-indexes` / DB_ENSURE_INDEXES_ON_STARTUP).
 
-def get_all_faq():
-    return list(faq_collection.find({}))
+    GET /faq?limit=50                       halaman pertama
+    GET /faq?limit=50&cursor=<X-Next-Cursor> halaman berikutnya
+    GET /faq?category_id=<id>|none          filter kategori
+    GET /faq?q=akta kelahiran               potongan teks di question (tanpa beda huruf besar/kecil)
+    GET /faq?fields=question,category_id    hanya field ini (+ _id)
 
-def add_faq(question, answer, category_id):
-    faq_collection.insert_one({
-        "question": question,
-        "answer": answer,
-        "category_id": category_id
-    })
+Tanpa parameter apapun hasilnya sama seperti sebelumnya (semua FAQ).
+"""
 
-def delete_faq(faq_id):
-    faq_collection.delete_one({"_id": faq_id})
\ No newline at end of file
+import re
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+FAQ_PAGE_MAX = 500
+FAQ_BATCH_SIZE = 500
+
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+# =========================
+# PARAMETER
+# =========================
+def _category_filter(category_id):
+    if category_id == "none":
+        # Sama dengan filter "Tanpa Kategori" di dashboard
+        return {"category_id": {"$in": [None, ""]}}
+    values = [category_id]
+    if category_id.isdigit():
+        values.append(int(category_id))  # category_id angka dari faq.json
+    if ObjectId.is_valid(category_id):
+        values.append(ObjectId(category_id))
+    return {"category_id": values[0] if len(values) == 1 else {"$in": values}}
+
+
+def parse_faq_query(args):
+    """
+    Parameter GET /faq dari query string. Raise ValueError jika tidak valid.
+    """
+    params = {"filter": {}, "q": None, "projection": None, "limit": 0, "cursor": None}
+
+    category_id = args.get("category_id", "").strip()
+    if category_id:
+        params["filter"].update(_category_filter(category_id))
+
+    q = args.get("q", "").strip()
+    if q:
+        params["q"] = q[:200]
+
+    fields = args.get("fields", "").strip()
+    if fields:
+        names = [f.strip() for f in fields.split(",") if f.strip()]
+        invalid = [f for f in names if not FIELD_NAME.match(f)]
+        if invalid:
+            raise ValueError(f"fields tidak valid: {', '.join(invalid)}")
+        params["projection"] = {name: 1 for name in names}
+
+    limit = args.get("limit", "").strip()
+    if limit:
+        if not limit.isdigit() or not 0 < int(limit) <= FAQ_PAGE_MAX:
+            raise ValueError(f"limit harus bilangan bulat 1-{FAQ_PAGE_MAX}")
+        params["limit"] = int(limit)
+
+    cursor = args.get("cursor", "").strip()
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise ValueError("cursor tidak valid")
+        params["cursor"] = ObjectId(cursor)
+
+    return params
+
+
+# =========================
+# QUERY
+# =========================
+def _run(query, params):
+    from db import faq_collection
+
+    found = faq_collection.find(query, params["projection"]).batch_size(FAQ_BATCH_SIZE)
+    if params["limit"] or params["cursor"] is not None:
+        found = found.sort("_id", ASCENDING)
+    if params["limit"]:
+        # Satu dokumen ekstra untuk tahu apakah masih ada halaman berikutnya
+        found = found.limit(params["limit"] + 1)
+    return list(found)
+
+
+def find_faq_page(params):
+    """(daftar FAQ dengan _id string, cursor halaman berikutnya atau None)"""
+    query = dict(params["filter"])
+    if params["cursor"] is not None:
+        query["_id"] = {"$gt": params["cursor"]}
+
+    if params["q"]:
+        # Substring seperti pencarian dashboard sebelumnya ("kt" menemukan "ktp").
+        # Regex tanpa anchor dan tanpa beda huruf besar/kecil tidak bisa memakai
+        # batas index: biayanya O(jumlah FAQ) per query (paling baik scan key
+        # question_1). Cukup untuk ribuan FAQ; jika jauh lebih besar, pakai
+        # prefix berjangkar atau index teks.
+        query["question"] = {"$regex": re.escape(params["q"]), "$options": "i"}
+    docs = _run(query, params)
+
+    next_cursor = None
+    if params["limit"] and len(docs) > params["limit"]:
+        docs = docs[:params["limit"]]
+        next_cursor = str(docs[-1]["_id"])
+
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return docs, next_cursor
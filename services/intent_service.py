@@ -2,8 +2,15 @@
 
 import json
 import os
+import tempfile
+import threading
+import time
 from bson import ObjectId
 
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
 # Tentukan path yang benar
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
@@ -14,13 +21,45 @@ if not os.path.exists(DATA_DIR):
 
 INTENTS_PATH = os.path.join(DATA_DIR, "intents.json")
 
+# Jumlah dokumen FAQ per batch cursor
+FAQ_BATCH_SIZE = 1000
+
+# Regenerasi di background: perubahan beruntun digabung menjadi satu rebuild
+# setelah tidak ada perubahan baru selama INTENTS_DEBOUNCE_SECONDS, paling
+# lambat INTENTS_MAX_DELAY_SECONDS sejak perubahan pertama.
+INTENTS_DEBOUNCE_SECONDS = float(os.environ.get("INTENTS_DEBOUNCE_SECONDS", "2"))
+INTENTS_MAX_DELAY_SECONDS = float(os.environ.get("INTENTS_MAX_DELAY_SECONDS", "10"))
+
+def write_json_atomic(path, data):
+    """Tulis JSON ke file temp di folder yang sama lalu os.replace (pembaca tidak melihat file setengah jadi)"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".intents-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
 def generate_intents_from_db():
     """Generate intents.json from database FAQ"""
     try:
         from db import faq_collection, categories_collection
         
-        # Ambil semua FAQ
-        faqs = list(faq_collection.find({}))
+        # Ambil semua kategori sekali (bukan find_one per FAQ)
+        category_names = {
+            c["_id"]: c.get("name", "Uncategorized")
+            for c in categories_collection.find({}, {"name": 1})
+        }
+        
+        # Stream FAQ dengan projection seperlunya (tidak di-list() sekaligus)
+        faqs = faq_collection.find(
+            {}, {"_id": 0, "question": 1, "answer": 1, "category_id": 1}
+        ).batch_size(FAQ_BATCH_SIZE)
         
         # Group FAQ by category
         intents_dict = {}
@@ -28,12 +67,11 @@ def generate_intents_from_db():
         for faq in faqs:
             category_id = faq.get("category_id")
             
-            # Jika ada category_id, cari nama kategori
+            # Jika ada category_id, cari nama kategori dari map
             if category_id:
                 try:
-                    category = categories_collection.find_one({"_id": ObjectId(category_id)})
-                    category_name = category.get("name", "Uncategorized") if category else "Uncategorized"
-                except:
+                    category_name = category_names.get(ObjectId(category_id), "Uncategorized")
+                except Exception:
                     category_name = "Uncategorized"
             else:
                 category_name = "Uncategorized"
@@ -60,23 +98,122 @@ def generate_intents_from_db():
         
         # Tulis ke file dengan error handling
         try:
-            with open(INTENTS_PATH, "w", encoding="utf-8") as f:
-                json.dump(intents_data, f, indent=2, ensure_ascii=False)
-            print(f"✅ Intents berhasil diperbarui: {len(intents_list)} kategori")
+            write_json_atomic(INTENTS_PATH, intents_data)
+            logger.info("✅ Intents berhasil diperbarui: %d kategori", len(intents_list))
             return True
         except Exception as e:
-            print(f"❌ Gagal menulis file intents.json: {str(e)}")
+            logger.error("❌ Gagal menulis file intents.json: %s", e)
             # Coba alternatif path
             alt_path = os.path.join(BASE_DIR, "intents.json")
             try:
-                with open(alt_path, "w", encoding="utf-8") as f:
-                    json.dump(intents_data, f, indent=2, ensure_ascii=False)
-                print(f"✅ Intents berhasil disimpan di path alternatif: {alt_path}")
+                write_json_atomic(alt_path, intents_data)
+                logger.info("✅ Intents berhasil disimpan di path alternatif: %s", alt_path)
                 return True
             except Exception as e2:
-                print(f"❌ Gagal juga di path alternatif: {str(e2)}")
+                logger.error("❌ Gagal juga di path alternatif: %s", e2)
                 return False
         
     except Exception as e:
-        print(f"❌ Error generate_intents_from_db: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error("❌ Error generate_intents_from_db: %s", e)
+        return False
+
+# =========================
+# WORKER REGENERASI (DEBOUNCE)
+# =========================
+_state_lock = threading.Lock()
+_wake = threading.Event()
+_worker_thread = None
+_requested = 0            # nomor perubahan terakhir yang diminta
+_state = {
+    "generation": 0,      # jumlah rebuild yang sudah selesai
+    "covers": 0,          # nomor perubahan terakhir yang sudah masuk file
+    "status": "idle",     # idle | pending | running | failed
+    "last_reason": "",
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_duration": None,
+    "last_error": None,
+}
+_first_pending_at = None
+_last_request_at = None
+
+def schedule_intents_regeneration(reason=""):
+    """
+    Minta intents.json dibangun ulang di background. Langsung kembali;
+    beberapa permintaan berdekatan hanya menghasilkan satu rebuild.
+    Return nomor permintaan (bandingkan dengan "covers" di status).
+    """
+    global _requested, _first_pending_at, _last_request_at, _worker_thread
+    now = time.monotonic()
+    with _state_lock:
+        _requested += 1
+        _last_request_at = now
+        if _first_pending_at is None:
+            _first_pending_at = now
+        if _state["status"] != "running":
+            _state["status"] = "pending"
+        _state["last_reason"] = reason
+        request_id = _requested
+
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_intents_worker, name="intents-worker", daemon=True)
+            _worker_thread.start()
+
+    _wake.set()
+    return request_id
+
+def get_intents_status():
+    """Status worker regenerasi intents (generation, status, error terakhir)"""
+    with _state_lock:
+        return {**_state, "requested": _requested, "pending": _requested > _state["covers"]}
+
+def _wait_for_quiet_period():
+    """Tunggu sampai tidak ada permintaan baru selama debounce (dibatasi max delay)"""
+    while True:
+        with _state_lock:
+            now = time.monotonic()
+            quiet_until = _last_request_at + INTENTS_DEBOUNCE_SECONDS
+            deadline = _first_pending_at + INTENTS_MAX_DELAY_SECONDS
+            wait = min(quiet_until, deadline) - now
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+def _intents_worker():
+    global _first_pending_at
+    while True:
+        _wake.wait()
+        _wake.clear()
+
+        with _state_lock:
+            if _requested <= _state["covers"]:
+                continue
+
+        _wait_for_quiet_period()
+
+        with _state_lock:
+            target = _requested
+            _first_pending_at = None
+            _state["status"] = "running"
+            _state["last_started_at"] = time.time()
+
+        start = time.perf_counter()
+        ok = generate_intents_from_db()
+
+        with _state_lock:
+            _state["generation"] += 1
+            _state["last_duration"] = round(time.perf_counter() - start, 3)
+            _state["last_finished_at"] = time.time()
+            if ok:
+                _state["covers"] = target
+                _state["last_error"] = None
+            else:
+                _state["last_error"] = "generate_intents_from_db gagal (lihat log)"
+            if _requested > target:
+                # Ada perubahan baru selama rebuild: jalankan lagi
+                _state["status"] = "pending"
+                if _first_pending_at is None:
+                    _first_pending_at = time.monotonic()
+                _wake.set()
+            else:
+                _state["status"] = "idle" if ok else "failed"
@@ -0,0 +1,243 @@
+# services/log_feed.py
+"""
+Feed live admin log untuk dashboard (Server-Sent Events).
+
+Sumber event:
+  - log_admin_action mempublikasikan setiap entry ke pub/sub di proses
+    ini (langsung, sebelum entry selesai ditulis ke MongoDB);
+  - satu watcher per proses menangkap entry dari worker lain: change
+    stream MongoDB jika tersedia (replica set / Atlas), atau query
+    keyset kecil setiap LOG_FEED_POLL_SECONDS selama ada tab yang
+    terhubung.
+
+Biaya MongoDB jadi per proses, bukan per tab dashboard. Entry yang
+datang dari dua sumber dikirim sekali (dedupe berdasarkan _id).
+
+Id event SSE adalah watermark waktu kirim (lihat admin_log_service):
+Last-Event-ID saat menyambung ulang mengirim entry yang ditulis sejak itu,
+termasuk entry yang masuk terlambat dengan timestamp lebih lama.
+
+ENV:
+    LOG_FEED_SOURCE               auto | changestream | poll (default auto)
+    LOG_FEED_POLL_SECONDS         interval watcher mode poll (default 5)
+    LOG_STREAM_MAX_SECONDS        umur satu koneksi SSE; EventSource
+                                  menyambung ulang otomatis (default 55)
+    LOG_STREAM_HEARTBEAT_SECONDS  komentar keep-alive (default 15)
+    LOG_STREAM_MAX_CLIENTS        koneksi SSE per proses; lebih dari ini
+                                  dijawab 503 dan dashboard kembali polling.
+                                  Default GUNICORN_THREADS // 4 dan selalu
+                                  di bawah GUNICORN_THREADS, supaya /chat
+                                  tetap punya thread (1 thread = SSE mati)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from services import admin_log_service
+from utils import pubsub
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
+LOG_FEED_SOURCE = os.environ.get("LOG_FEED_SOURCE", "auto").lower()
+LOG_FEED_POLL_SECONDS = float(os.environ.get("LOG_FEED_POLL_SECONDS", "5"))
+LOG_STREAM_MAX_SECONDS = float(os.environ.get("LOG_STREAM_MAX_SECONDS", "55"))
+LOG_STREAM_HEARTBEAT_SECONDS = float(os.environ.get("LOG_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Setiap koneksi SSE memegang satu thread worker selama LOG_STREAM_MAX_SECONDS
+WORKER_THREADS = max(1, int(os.environ.get("GUNICORN_THREADS", "1")))
+LOG_STREAM_MAX_CLIENTS = min(
+    int(os.environ.get("LOG_STREAM_MAX_CLIENTS", str(WORKER_THREADS // 4))),
+    WORKER_THREADS - 1,
+)
+
+TOPIC = "admin_logs"
+RECENT_IDS = 2000
+BACKLOG_LIMIT = 500
+
+LOG_FIELDS = ("username", "role", "action", "detail", "ip", "user_agent", "endpoint", "method")
+
+_recent = OrderedDict()
+_recent_lock = threading.Lock()
+_watcher = None
+_watcher_lock = threading.Lock()
+_clients = 0
+_clients_lock = threading.Lock()
+source = None  # "changestream" / "poll" setelah watcher berjalan
+
+
+# =========================
+# PUBLISH
+# =========================
+def format_entry(entry):
+    """Entry log -> dict siap JSON dengan bentuk yang sama seperti /admin/logs"""
+    ts = entry.get("timestamp")
+    row = {"_id": str(entry["_id"])}
+    row.update({field: entry.get(field, "") for field in LOG_FIELDS})
+    row["timestamp"] = ts.isoformat() if ts else ""
+    return row
+
+
+def _emit(entry):
+    key = str(entry["_id"])
+    with _recent_lock:
+        if key in _recent:
+            return
+        _recent[key] = True
+        if len(_recent) > RECENT_IDS:
+            _recent.popitem(last=False)
+    pubsub.publish(TOPIC, format_entry(entry))
+
+
+def publish_log(entry):
+    """Dipanggil log_admin_action setelah entry punya _id (audit_sink.submit)"""
+    if pubsub.subscriber_count(TOPIC):
+        _emit(entry)
+
+
+# =========================
+# WATCHER (ENTRY DARI WORKER LAIN)
+# =========================
+def _watch_change_stream(collection):
+    global source
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    with collection.watch(pipeline, max_await_time_ms=1000) as stream:
+        source = "changestream"
+        logger.info("📡 Feed log memakai change stream MongoDB")
+        while stream.alive:
+            change = stream.try_next()
+            if change is not None:
+                _emit(change["fullDocument"])
+
+
+def _poll(collection):
+    global source
+    source = "poll"
+    logger.info("📡 Feed log memakai polling tiap %.0f detik", LOG_FEED_POLL_SECONDS)
+    since = None
+    while True:
+        if not pubsub.subscriber_count(TOPIC):
+            since = None  # tidak ada tab terbuka: tidak ada query
+            time.sleep(LOG_FEED_POLL_SECONDS)
+            continue
+        try:
+            if since is None:
+                since = admin_log_service.watermark_cursor()
+            else:
+                # Entry dalam overlap yang sudah terkirim dibuang _emit (dedupe _id)
+                params = admin_log_service.parse_log_query({"since": since, "limit": str(BACKLOG_LIMIT)})
+                logs, _, since = admin_log_service.find_logs(params)
+                for entry in reversed(logs):
+                    _emit(entry)
+        except PyMongoError as e:
+            logger.warning("⚠️ Polling feed log gagal: %s", e)
+        time.sleep(LOG_FEED_POLL_SECONDS)
+
+
+def _run_watcher():
+    from db import admin_logs_collection
+
+    if LOG_FEED_SOURCE in ("auto", "changestream"):
+        try:
+            _watch_change_stream(admin_logs_collection)
+        except OperationFailure as e:
+            # Standalone MongoDB tidak mendukung change stream
+            logger.info("ℹ️ Change stream tidak tersedia (%s)", e)
+        except PyMongoError as e:
+            logger.warning("⚠️ Change stream feed log terputus: %s", e)
+    _poll(admin_logs_collection)
+
+
+def ensure_watcher():
+    global _watcher
+    if _watcher is not None:
+        return
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_run_watcher, name="log-feed", daemon=True)
+            _watcher.start()
+
+
+# =========================
+# SSE
+# =========================
+def _event(row, event="log", cursor=None):
+    cursor = cursor or admin_log_service.watermark_cursor()
+    return f"id: {cursor}\nevent: {event}\ndata: {json.dumps(row, ensure_ascii=False)}\n\n"
+
+
+def _matches(row, filters):
+    for field, values in filters.items():
+        if values and row.get(field) not in values:
+            return False
+    return True
+
+
+def acquire_client():
+    """Slot koneksi SSE; False jika sudah penuh (klien kembali ke polling)"""
+    global _clients
+    with _clients_lock:
+        if _clients >= LOG_STREAM_MAX_CLIENTS:
+            return False
+        _clients += 1
+        return True
+
+
+def release_client():
+    global _clients
+    with _clients_lock:
+        _clients -= 1
+
+
+def stream(since=None, filters=None):
+    """
+    Generator teks SSE. `since` (cursor) mengirim dulu entry yang
+    terlewat sejak koneksi sebelumnya; `filters` {"username": [...],
+    "action": [...]}. Koneksi ditutup setelah LOG_STREAM_MAX_SECONDS.
+    """
+    filters = filters or {}
+    ensure_watcher()
+    # Subscribe sebelum backlog supaya tidak ada entry yang jatuh di antaranya
+    sub = pubsub.subscribe(TOPIC)
+    try:
+        yield "retry: 2000\n\n"
+        sent = set()
+
+        if since:
+            query = {"since": since, "limit": str(BACKLOG_LIMIT)}
+            for field, values in filters.items():
+                if values:
+                    query[field] = ",".join(values)
+            logs, more, watermark = admin_log_service.find_logs(admin_log_service.parse_log_query(query))
+            if more:
+                # Terlalu banyak entry terlewat: klien sebaiknya memuat ulang daftar
+                yield _event({}, "resync")
+                return
+            for entry in reversed(logs):
+                row = format_entry(entry)
+                sent.add(row["_id"])
+                yield _event(row, cursor=watermark)
+
+        deadline = time.monotonic() + LOG_STREAM_MAX_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = sub.get(timeout=min(LOG_STREAM_HEARTBEAT_SECONDS, remaining))
+            if sub.overflowed:
+                yield _event({}, "resync")
+                return
+            if message is None:
+                yield ": ping\n\n"
+                continue
+            row = message
+            if row["_id"] in sent or not _matches(row, filters):
+                continue
+            yield _event(row)
+    finally:
+        sub.close()
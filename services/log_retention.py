@@ -0,0 +1,244 @@
+# services/log_retention.py
+"""
+Retensi admin log.
+
+Penghapusan rutin dikerjakan MongoDB sendiri lewat TTL index
+admin_logs.timestamp (lihat db.ADMIN_LOG_RETENTION_DAYS), jadi collection
+admin_logs tetap kecil tanpa perlu tombol "hapus logs lama".
+
+Dengan ADMIN_LOG_ARCHIVE=true, log yang melewati masa retensi lebih dulu
+diringkas ke admin_logs_archive: satu dokumen per hari (dipecah per
+ADMIN_LOG_ARCHIVE_CHUNK entry supaya jauh di bawah batas 16 MB) berisi
+entry asli dalam bentuk JSON (bson.json_util) terkompresi zlib, jumlah
+entry dan hitungan per action. Setelah arsip tersimpan, entry dihapus
+dari admin_logs berdasarkan _id.
+
+Roll-up berjalan di thread background setiap ADMIN_LOG_ROLLUP_INTERVAL_HOURS
+(satu worker sekaligus, dijaga lease di collection meta), lewat
+/admin/logs/clear-old, atau manual:
+
+    python -m services.log_retention --rollup
+    python -m services.log_retention --show 2024-01-31
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+from bson import Binary, json_util
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
+ADMIN_LOG_ARCHIVE_CHUNK = int(os.environ.get("ADMIN_LOG_ARCHIVE_CHUNK", "5000"))
+ADMIN_LOG_ROLLUP_INTERVAL_HOURS = float(os.environ.get("ADMIN_LOG_ROLLUP_INTERVAL_HOURS", "6"))
+ARCHIVE_ENCODING = "zlib+json_util"
+
+LEASE_ID = "log_rollup_lease"
+LEASE_SECONDS = 15 * 60
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _collections():
+    from db import db
+
+    return db["admin_logs"], db["admin_logs_archive"], db["meta"]
+
+
+def retention_cutoff(now=None):
+    """Awal hari (UTC) batas retensi; log sebelum ini sudah melewati masa simpan"""
+    from db import ADMIN_LOG_RETENTION_DAYS
+
+    now = now or datetime.now(timezone.utc)
+    day = (now - timedelta(days=ADMIN_LOG_RETENTION_DAYS)).date()
+    return datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+
+
+# =========================
+# ARSIP
+# =========================
+def _archive_part(archive, day, entries):
+    """Simpan satu potongan entry satu hari (upsert: aman diulang setelah crash)"""
+    payload = json_util.dumps(entries).encode("utf-8")
+    archive.replace_one(
+        {"_id": f"{day}:{entries[0]['_id']}"},
+        {
+            "day": day,
+            "count": len(entries),
+            "first_id": entries[0]["_id"],
+            "last_id": entries[-1]["_id"],
+            "actions": dict(Counter(e.get("action", "") for e in entries)),
+            "encoding": ARCHIVE_ENCODING,
+            "size": len(payload),
+            "data": Binary(zlib.compress(payload, 9)),
+            "archived_at": datetime.now(timezone.utc),
+        },
+        upsert=True,
+    )
+
+
+def _rollup_day(logs, archive, start):
+    """Arsipkan lalu hapus semua log pada hari `start`; return jumlah entry"""
+    day = start.date().isoformat()
+    found = (
+        logs.find({"timestamp": {"$gte": start, "$lt": start + timedelta(days=1)}})
+        .sort("_id", ASCENDING)
+        .batch_size(ADMIN_LOG_ARCHIVE_CHUNK)
+    )
+    total = 0
+    chunk = []
+    for entry in found:
+        chunk.append(entry)
+        if len(chunk) >= ADMIN_LOG_ARCHIVE_CHUNK:
+            total += _flush_chunk(logs, archive, day, chunk)
+            chunk = []
+    if chunk:
+        total += _flush_chunk(logs, archive, day, chunk)
+    return total
+
+
+def _flush_chunk(logs, archive, day, chunk):
+    _archive_part(archive, day, chunk)
+    # Hapus berdasarkan _id: entry yang masuk belakangan (replay journal
+    # audit) dengan timestamp hari ini tidak ikut terhapus tanpa diarsip
+    logs.delete_many({"_id": {"$in": [e["_id"] for e in chunk]}})
+    return len(chunk)
+
+
+def rollup_old_logs(now=None):
+    """
+    Arsipkan + hapus semua log sebelum batas retensi, hari demi hari.
+    Return {"archived": n, "days": [..]}.
+    """
+    from db import ADMIN_LOG_RETENTION_DAYS
+
+    result = {"archived": 0, "days": []}
+    if ADMIN_LOG_RETENTION_DAYS <= 0:
+        return result  # retensi dimatikan: simpan semua log
+
+    logs, archive, _ = _collections()
+    cutoff = retention_cutoff(now)
+
+    while True:
+        oldest = logs.find_one({"timestamp": {"$lt": cutoff}}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)])
+        if oldest is None:
+            break
+        ts = oldest["timestamp"]
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        start = datetime.combine(ts.date(), dt_time.min, tzinfo=timezone.utc)
+        count = _rollup_day(logs, archive, start)
+        result["archived"] += count
+        result["days"].append(start.date().isoformat())
+
+    if result["archived"]:
+        logger.info("🗄️ %d admin log diarsipkan (%d hari)", result["archived"], len(result["days"]))
+    return result
+
+
+def clear_old_logs():
+    """
+    Hapus (atau arsipkan, jika ADMIN_LOG_ARCHIVE) log yang melewati masa
+    retensi sekarang juga. Return {"deleted", "archived", "retention_days"},
+    atau None jika roll-up sedang dijalankan worker lain.
+    """
+    from db import ADMIN_LOG_ARCHIVE, ADMIN_LOG_RETENTION_DAYS
+
+    retention_days = ADMIN_LOG_RETENTION_DAYS if ADMIN_LOG_RETENTION_DAYS > 0 else 30
+    if ADMIN_LOG_ARCHIVE and ADMIN_LOG_RETENTION_DAYS > 0:
+        result = run_rollup_once()
+        if result is None:
+            return None
+        return {"deleted": result["archived"], "archived": result["archived"], "retention_days": retention_days}
+
+    logs, _, _ = _collections()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = logs.delete_many({"timestamp": {"$lt": cutoff}}).deleted_count
+    return {"deleted": deleted, "archived": 0, "retention_days": retention_days}
+
+
+def read_archive(day):
+    """Semua entry arsip untuk satu hari ("YYYY-MM-DD"), urut _id"""
+    _, archive, _ = _collections()
+    entries = []
+    for part in archive.find({"day": day}).sort("first_id", ASCENDING):
+        entries.extend(json_util.loads(zlib.decompress(part["data"]).decode("utf-8")))
+    return entries
+
+
+# =========================
+# JADWAL
+# =========================
+def _acquire_lease(meta, owner):
+    """Hanya satu worker yang menjalankan roll-up pada satu waktu"""
+    now = datetime.now(timezone.utc)
+    try:
+        meta.insert_one({"_id": LEASE_ID, "owner": owner, "until": now})
+    except DuplicateKeyError:
+        pass  # dokumen lease sudah ada
+    lease = meta.find_one_and_update(
+        {"_id": LEASE_ID, "until": {"$lte": now}},
+        {"$set": {"owner": owner, "until": now + timedelta(seconds=LEASE_SECONDS)}},
+    )
+    return lease is not None
+
+
+def _release_lease(meta, owner):
+    meta.update_one({"_id": LEASE_ID, "owner": owner}, {"$set": {"until": datetime.now(timezone.utc)}})
+
+
+def run_rollup_once():
+    """Roll-up dengan lease; return hasil roll-up atau None jika worker lain sedang jalan"""
+    _, _, meta = _collections()
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    if not _acquire_lease(meta, owner):
+        return None
+    try:
+        return rollup_old_logs()
+    finally:
+        _release_lease(meta, owner)
+
+
+def _rollup_worker():
+    time.sleep(60)  # jangan bebani startup worker
+    while True:
+        try:
+            run_rollup_once()
+        except PyMongoError as e:
+            logger.warning("⚠️ Roll-up admin log gagal: %s", e)
+        time.sleep(ADMIN_LOG_ROLLUP_INTERVAL_HOURS * 3600)
+
+
+def ensure_rollup_worker():
+    """Jalankan thread roll-up (sekali per proses, hanya jika arsip diaktifkan)"""
+    global _worker
+    if _worker is not None:
+        return
+    from db import ADMIN_LOG_ARCHIVE, ADMIN_LOG_RETENTION_DAYS
+
+    if not ADMIN_LOG_ARCHIVE or ADMIN_LOG_RETENTION_DAYS <= 0:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_rollup_worker, name="log-rollup", daemon=True)
+            _worker.start()
+
+
+if __name__ == "__main__":
+    if "--rollup" in sys.argv[1:]:
+        print(rollup_old_logs())
+    elif "--show" in sys.argv[1:]:
+        for entry in read_archive(sys.argv[sys.argv.index("--show") + 1]):
+            print(json_util.dumps(entry, ensure_ascii=False))
+    else:
+        print("Pakai: python -m services.log_retention --rollup | --show YYYY-MM-DD")
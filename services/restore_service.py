@@ -0,0 +1,382 @@
+# services/restore_service.py
+"""
+Restore / import backup secara streaming.
+
+Format yang diterima (sama dengan output /backup/*):
+  - objek /backup/all  {"timestamp": ..., "categories": [...], "faqs": [...], "metadata": {...}}
+  - array JSON         hasil /backup/faq atau /backup/categories
+  - NDJSON             hasil ?format=ndjson (baris "_collection" dari /backup/all juga dikenali)
+  - salah satu di atas yang di-gzip (dideteksi dari magic byte)
+
+File dibaca sepotong-sepotong dan setiap record diproses begitu selesai
+di-parse, jadi memori tidak bergantung pada ukuran backup. Record yang
+valid di-upsert dengan bulk_write(ordered=False) per RESTORE_CHUNK_SIZE:
+berdasarkan _id jika ada, jika tidak berdasarkan question (FAQ) / name
+(kategori). Restore ulang file yang sama tidak membuat duplikat.
+"""
+
+import codecs
+import gzip
+import json
+import re
+import zlib
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+RESTORE_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+MAX_ERROR_SAMPLES = 20
+
+COLLECTIONS = ("categories", "faq")
+
+# Key objek /backup/all -> collection tujuan
+ALL_BACKUP_KEYS = {"categories": "categories", "faqs": "faq"}
+
+
+class RestoreError(ValueError):
+    """File backup tidak bisa dibaca (bukan JSON / NDJSON yang valid)"""
+
+
+# gzip terpotong (EOFError), gzip rusak (OSError / zlib.error), bukan UTF-8
+READ_ERRORS = (EOFError, OSError, zlib.error, UnicodeDecodeError)
+
+
+# =========================
+# BACA FILE (GZIP + UTF-8)
+# =========================
+def iter_text(fileobj, read_size=READ_SIZE):
+    """Potongan teks dari file upload; gzip dibuka otomatis"""
+    head = fileobj.read(2)
+    if head == b"\x1f\x8b":
+        fileobj = gzip.GzipFile(fileobj=_Prefixed(head, fileobj))
+        head = b""
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    data = head
+    while True:
+        chunk = fileobj.read(read_size)
+        if not chunk:
+            break
+        data += chunk
+        yield decoder.decode(data)
+        data = b""
+    tail = decoder.decode(data, final=True)
+    if tail:
+        yield tail
+
+
+class _Prefixed:
+    """File-like yang mengembalikan byte yang sudah dibaca (magic gzip) lebih dulu"""
+
+    def __init__(self, prefix, fileobj):
+        self._prefix = prefix
+        self._fileobj = fileobj
+
+    def read(self, size=-1):
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._fileobj.read(), b""
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            if len(data) < size:
+                data += self._fileobj.read(size - len(data))
+            return data
+        return self._fileobj.read(size)
+
+
+# =========================
+# PARSER JSON STREAMING
+# =========================
+_decoder = json.JSONDecoder()
+_FIRST_KEY = re.compile(r'\{\s*"((?:[^"\\]|\\.)*)"')
+
+
+class JsonStream:
+    """Parser JSON inkremental di atas potongan teks (tanpa memuat seluruh file)"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Karakter non-spasi berikutnya ("" jika file habis)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise RestoreError(f"JSON tidak valid: diharapkan '{char}'")
+        self.pos += 1
+
+    def first_key(self):
+        """Key pertama objek berikutnya tanpa memindahkan posisi (None jika bukan objek)"""
+        if self.peek() != "{":
+            return None
+        while True:
+            match = _FIRST_KEY.match(self.buf, self.pos)
+            if match:
+                return json.loads(f'"{match.group(1)}"')
+            if len(self.buf) - self.pos > 4096 or not self._fill():
+                return None
+
+    def value(self):
+        """Decode satu nilai JSON lengkap"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                # Angka di ujung buffer bisa saja terpotong: pastikan ada data sesudahnya
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise RestoreError(f"JSON tidak valid: {e.msg}")
+            self._fill()
+
+    def iter_array(self):
+        """Elemen array satu per satu"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise RestoreError("JSON tidak valid: diharapkan ',' atau ']' di dalam array")
+
+    def iter_object_keys(self):
+        """Key objek satu per satu; pemanggil wajib membaca nilainya sebelum lanjut"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise RestoreError("JSON tidak valid: diharapkan ',' atau '}' di dalam objek")
+
+
+def guess_collection(record):
+    """Collection tujuan dari isi record (FAQ punya question, kategori punya name)"""
+    if not isinstance(record, dict):
+        return None
+    if "question" in record or "answer" in record:
+        return "faq"
+    if "name" in record:
+        return "categories"
+    return None
+
+
+def iter_backup_records(chunks, collection=None):
+    """
+    (collection, record) untuk setiap record di file backup. `collection`
+    memaksa tujuan untuk array / NDJSON tanpa "_collection".
+    """
+    stream = JsonStream(chunks)
+    first = stream.peek()
+    if first == "":
+        return
+
+    if first == "[":
+        for record in stream.iter_array():
+            yield collection or guess_collection(record), record
+        if stream.peek() != "":
+            raise RestoreError("JSON tidak valid: ada data setelah array")
+        return
+
+    if first == "{" and stream.first_key() in ("timestamp", "categories", "faqs", "metadata"):
+        # Objek /backup/all: array kategori dan FAQ di-stream, key lain dilewati
+        for key in stream.iter_object_keys():
+            if key in ALL_BACKUP_KEYS and stream.peek() == "[":
+                for record in stream.iter_array():
+                    yield ALL_BACKUP_KEYS[key], record
+            else:
+                stream.value()
+        return
+
+    # NDJSON (atau beberapa objek JSON berurutan)
+    while stream.peek() != "":
+        record = stream.value()
+        if isinstance(record, dict) and "_collection" in record:
+            target = record.pop("_collection")
+            if target == "metadata":
+                continue
+            yield target, record
+        else:
+            yield collection or guess_collection(record), record
+
+
+# =========================
+# VALIDASI
+# =========================
+def _required_text(record, field):
+    value = record.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"'{field}' wajib berupa teks yang tidak kosong")
+    return value
+
+
+def _object_id(record):
+    value = record.get("_id")
+    if value is None or value == "":
+        return None
+    if isinstance(value, dict) and "$oid" in value:
+        value = value["$oid"]
+    if not ObjectId.is_valid(value):
+        raise ValueError("'_id' bukan ObjectId yang valid")
+    return ObjectId(value)
+
+
+def build_operation(collection, record):
+    """UpdateOne upsert untuk satu record, atau ValueError jika tidak valid"""
+    if collection not in COLLECTIONS:
+        raise ValueError("collection tidak dikenali (harus FAQ atau kategori)")
+    if not isinstance(record, dict):
+        raise ValueError("record harus berupa objek JSON")
+
+    oid = _object_id(record)
+
+    if collection == "faq":
+        fields = {
+            "question": _required_text(record, "question"),
+            "answer": _required_text(record, "answer"),
+        }
+        category_id = record.get("category_id")
+        if category_id not in (None, "") and not isinstance(category_id, (str, int)):
+            raise ValueError("'category_id' harus teks atau angka")
+        fields["category_id"] = category_id if category_id != "" else None
+        natural_key = {"question": fields["question"]}
+    else:
+        # Field tambahan kategori (misalnya "id" dari categories.json) ikut disimpan
+        fields = {k: v for k, v in record.items() if k != "_id"}
+        fields["name"] = _required_text(record, "name")
+        natural_key = {"name": fields["name"]}
+
+    return UpdateOne({"_id": oid} if oid else natural_key, {"$set": fields}, upsert=True)
+
+
+# =========================
+# PIPELINE RESTORE
+# =========================
+def restore(chunks, collections, collection=None, dry_run=False, chunk_size=RESTORE_CHUNK_SIZE):
+    """
+    Generator event progres (dict). `collections` memetakan nama collection
+    ("faq", "categories") ke objek collection MongoDB. Event terakhir selalu
+    {"event": "done", ...} atau {"event": "error", ...}.
+    """
+    stats = {
+        "processed": 0,
+        "invalid": 0,
+        "upserted": 0,
+        "modified": 0,
+        "matched": 0,
+        "write_errors": 0,
+        "chunks_written": 0,
+        "per_collection": {name: 0 for name in COLLECTIONS},
+    }
+    errors = []
+    pending = {name: [] for name in COLLECTIONS}
+
+    def flush(name):
+        ops, pending[name] = pending[name], []
+        if not ops or dry_run:
+            return
+        stats["chunks_written"] += 1
+        try:
+            result = collections[name].bulk_write(ops, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            stats["write_errors"] += len(details.get("writeErrors", []))
+            for err in details.get("writeErrors", [])[:MAX_ERROR_SAMPLES - len(errors)]:
+                errors.append({"collection": name, "error": err.get("errmsg", "write error")})
+        stats["upserted"] += details.get("nUpserted", 0)
+        stats["modified"] += details.get("nModified", 0)
+        stats["matched"] += details.get("nMatched", 0)
+
+    def progress(event="progress"):
+        return {"event": event, **stats, "per_collection": dict(stats["per_collection"]),
+                "errors": list(errors), "dry_run": dry_run}
+
+    try:
+        for target, record in iter_backup_records(chunks, collection):
+            stats["processed"] += 1
+            try:
+                op = build_operation(target, record)
+            except ValueError as e:
+                stats["invalid"] += 1
+                if len(errors) < MAX_ERROR_SAMPLES:
+                    errors.append({"record": stats["processed"], "error": str(e)})
+                continue
+
+            pending[target].append(op)
+            stats["per_collection"][target] += 1
+            if len(pending[target]) >= chunk_size:
+                flush(target)
+                yield progress()
+
+        # Kategori dulu supaya FAQ yang merujuknya sudah punya tujuan
+        for name in COLLECTIONS:
+            flush(name)
+    except (RestoreError, *READ_ERRORS) as e:
+        # Record valid yang sudah di-parse tetap disimpan, sama seperti chunk sebelumnya
+        message = str(e) if isinstance(e, RestoreError) else f"File backup tidak bisa dibaca: {e}"
+        try:
+            for name in COLLECTIONS:
+                flush(name)
+        except PyMongoError as write_error:
+            message += f"; gagal menyimpan sisa record: {write_error}"
+        yield _error(progress, message)
+        return
+    except PyMongoError as e:
+        yield _error(progress, f"MongoDB error: {e}")
+        return
+
+    yield progress("done")
+
+
+def _error(progress, message):
+    result = progress("error")
+    result["message"] = message
+    return result
+
+
+def changed(event):
+    """
+    True jika restore (mungkin) mengubah data sehingga index perlu dibangun
+    ulang. Restore yang berhenti karena error setelah ada chunk ditulis
+    dianggap berubah: bulk_write yang gagal bisa sudah menulis sebagian.
+    """
+    if event.get("dry_run") or not event.get("chunks_written"):
+        return False
+    return event.get("event") == "error" or (event.get("upserted", 0) + event.get("modified", 0)) > 0
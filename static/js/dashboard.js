@@ -68,72 +68,228 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     /************** ADMIN LOGS VIEWER **************/
+    const LOG_PAGE_SIZE = 100;
+    const LOG_REFRESH_MS = 15000;
+    let adminLogs = [];
+    let logsNextCursor = null;    // halaman lebih lama
+    let logsLatestCursor = null;  // ?since= untuk auto-refresh
+    let logStream = null;         // EventSource /admin/logs/stream
+    let logStreamFailed = false;  // server menolak stream: pakai polling
+
+    // Filter log dikerjakan server (username, action, rentang tanggal)
+    function logQueryParams() {
+        const params = new URLSearchParams({ limit: LOG_PAGE_SIZE });
+        const filters = {
+            username: document.getElementById("logUserFilter")?.value.trim(),
+            action: document.getElementById("logActionFilter")?.value.trim(),
+            from: document.getElementById("logFromFilter")?.value,
+            to: document.getElementById("logToFilter")?.value
+        };
+        Object.entries(filters).forEach(([key, value]) => {
+            if (value) params.set(key, value);
+        });
+        return params;
+    }
+
+    async function fetchLogs(params) {
+        const res = await fetch(`/admin/logs?${params}`);
+        if (!res.ok) return null;
+        return {
+            logs: await res.json(),
+            next: res.headers.get("X-Next-Cursor"),
+            latest: res.headers.get("X-Latest-Cursor")
+        };
+    }
+
     async function loadAdminLogs() {
         try {
-            const res = await fetch("/admin/logs");
-            if (!res.ok) return;
-            
-            const logs = await res.json();
-            const container = document.getElementById("logsContainer");
-            if (!container) return;
-            
-            container.innerHTML = "";
-            
-            if (logs.length === 0) {
-                container.innerHTML = "<p>Tidak ada log aktivitas.</p>";
-                return;
-            }
-            
-            const table = document.createElement("table");
-            table.className = "logs-table";
-            table.innerHTML = `
-                <thead>
-                    <tr>
-                        <th>Waktu</th>
-                        <th>User</th>
-                        <th>Aksi</th>
-                        <th>Detail</th>
-                        <th>IP</th>
-                    </tr>
-                </thead>
-                <tbody></tbody>
-            `;
-            
-            const tbody = table.querySelector("tbody");
-            
-            logs.forEach(log => {
-                const tr = document.createElement("tr");
-                
-                // Format waktu
-                const timestamp = new Date(log.timestamp);
-                const timeStr = timestamp.toLocaleString("id-ID");
-                
-                // Warna berdasarkan aksi
-                let rowClass = "";
-                if (log.action.includes("DELETE")) rowClass = "delete-action";
-                else if (log.action.includes("EDIT")) rowClass = "edit-action";
-                else if (log.action.includes("ADD")) rowClass = "add-action";
-                
-                tr.className = rowClass;
-                
-                tr.innerHTML = `
-                    <td>${timeStr}</td>
-                    <td><strong>${log.username}</strong><br><small>${log.role}</small></td>
-                    <td><code>${log.action}</code></td>
-                    <td>${log.detail || "-"}</td>
-                    <td><small>${log.ip || "-"}</small></td>
-                `;
-                
-                tbody.appendChild(tr);
-            });
-            
-            container.appendChild(table);
-            
+            const page = await fetchLogs(logQueryParams());
+            if (!page) return;
+
+            adminLogs = page.logs;
+            logsNextCursor = page.next;
+            logsLatestCursor = page.latest;
+            renderAdminLogs();
+
+            // Filter bisa berubah: sambungkan ulang feed live dari posisi terbaru
+            closeLogStream();
+            if (logsVisible()) openLogStream();
         } catch (error) {
             console.error("Gagal memuat logs:", error);
         }
     }
 
+    function logsVisible() {
+        const section = document.getElementById("logs");
+        return section && section.offsetParent !== null && !document.hidden;
+    }
+
+    // Feed live lewat Server-Sent Events; polling hanya jika stream tidak tersedia
+    function openLogStream() {
+        if (!window.EventSource || logStreamFailed || logStream) return;
+
+        const params = new URLSearchParams();
+        const username = document.getElementById("logUserFilter")?.value.trim();
+        const action = document.getElementById("logActionFilter")?.value.trim();
+        if (username) params.set("username", username);
+        if (action) params.set("action", action);
+        if (logsLatestCursor) params.set("since", logsLatestCursor);
+
+        logStream = new EventSource(`/admin/logs/stream?${params}`);
+
+        logStream.addEventListener("log", event => {
+            logsLatestCursor = event.lastEventId || logsLatestCursor;
+            if (mergeNewLogs([JSON.parse(event.data)])) renderAdminLogs();
+        });
+
+        logStream.addEventListener("resync", () => {
+            // Terlalu banyak entry terlewat: muat ulang daftar
+            closeLogStream();
+            loadAdminLogs();
+        });
+
+        logStream.onerror = () => {
+            // CLOSED = ditolak (mis. 503 slot penuh); selain itu EventSource menyambung ulang sendiri
+            if (logStream && logStream.readyState === EventSource.CLOSED) {
+                logStream = null;
+                logStreamFailed = true;
+            }
+        };
+    }
+
+    function closeLogStream() {
+        if (logStream) {
+            logStream.close();
+            logStream = null;
+        }
+    }
+
+    // Dipanggil berkala: stream hanya terbuka selama section logs terlihat
+    function syncLogFeed() {
+        if (!logsVisible()) {
+            closeLogStream();
+            return;
+        }
+        if (logStream) return;
+        if (!logStreamFailed && window.EventSource) {
+            openLogStream();
+        } else {
+            refreshNewLogs();
+        }
+    }
+
+    async function loadOlderLogs() {
+        if (!logsNextCursor) return;
+        const params = logQueryParams();
+        params.set("cursor", logsNextCursor);
+
+        const page = await fetchLogs(params);
+        if (!page) return;
+        adminLogs = adminLogs.concat(page.logs);
+        logsNextCursor = page.next;
+        renderAdminLogs();
+    }
+
+    // Entry dari ?since= / stream bisa berulang (overlap) dan bisa masuk
+    // terlambat dengan timestamp lebih lama: buang _id yang sudah ada lalu urutkan
+    function mergeNewLogs(logs) {
+        const known = new Set(adminLogs.map(l => l._id));
+        const fresh = logs.filter(l => !known.has(l._id));
+        if (fresh.length === 0) return false;
+        adminLogs = fresh.concat(adminLogs).sort((a, b) =>
+            (new Date(b.timestamp) - new Date(a.timestamp)) || b._id.localeCompare(a._id));
+        return true;
+    }
+
+    // Polling cadangan: hanya ambil entry yang ditulis sejak refresh sebelumnya
+    async function refreshNewLogs() {
+        if (!logsVisible()) return;
+        if (!logsLatestCursor) return loadAdminLogs();
+
+        try {
+            const params = logQueryParams();
+            params.set("since", logsLatestCursor);
+
+            const page = await fetchLogs(params);
+            if (!page) return;
+            if (page.next) {
+                // Lebih dari satu halaman entry baru: muat ulang dari awal
+                return loadAdminLogs();
+            }
+            logsLatestCursor = page.latest || logsLatestCursor;
+            if (mergeNewLogs(page.logs)) renderAdminLogs();
+        } catch (error) {
+            console.error("Gagal refresh logs:", error);
+        }
+    }
+
+    setInterval(syncLogFeed, LOG_REFRESH_MS);
+
+    function renderAdminLogs() {
+        const container = document.getElementById("logsContainer");
+        if (!container) return;
+
+        container.innerHTML = "";
+
+        if (adminLogs.length === 0) {
+            container.innerHTML = "<p>Tidak ada log aktivitas.</p>";
+            return;
+        }
+
+        const table = document.createElement("table");
+        table.className = "logs-table";
+        table.innerHTML = `
+            <thead>
+                <tr>
+                    <th>Waktu</th>
+                    <th>User</th>
+                    <th>Aksi</th>
+                    <th>Detail</th>
+                    <th>IP</th>
+                </tr>
+            </thead>
+            <tbody></tbody>
+        `;
+
+        const tbody = table.querySelector("tbody");
+
+        adminLogs.forEach(log => {
+            const tr = document.createElement("tr");
+
+            // Format waktu
+            const timestamp = new Date(log.timestamp);
+            const timeStr = timestamp.toLocaleString("id-ID");
+
+            // Warna berdasarkan aksi
+            let rowClass = "";
+            if (log.action.includes("DELETE")) rowClass = "delete-action";
+            else if (log.action.includes("EDIT")) rowClass = "edit-action";
+            else if (log.action.includes("ADD")) rowClass = "add-action";
+
+            tr.className = rowClass;
+
+            tr.innerHTML = `
+                <td>${timeStr}</td>
+                <td><strong>${log.username}</strong><br><small>${log.role}</small></td>
+                <td><code>${log.action}</code></td>
+                <td>${log.detail || "-"}</td>
+                <td><small>${log.ip || "-"}</small></td>
+            `;
+
+            tbody.appendChild(tr);
+        });
+
+        container.appendChild(table);
+
+        if (logsNextCursor) {
+            const more = document.createElement("button");
+            more.id = "loadOlderLogsBtn";
+            more.textContent = "Muat log lebih lama";
+            more.onclick = loadOlderLogs;
+            container.appendChild(more);
+        }
+    }
+
     // Tambahkan ke DOMContentLoaded
     document.addEventListener("DOMContentLoaded", () => {
         // ... kode lainnya ...
@@ -167,16 +323,27 @@ document.addEventListener("DOMContentLoaded", () => {
                     <button id="exportLogsBtn">📥 Export ke CSV</button>
                     <button id="clearOldLogsBtn" class="danger">🗑️ Hapus Logs Lama (>30 hari)</button>
                 </div>
+                <div class="logs-controls logs-filter">
+                    <input type="text" id="logUserFilter" placeholder="Username">
+                    <input type="text" id="logActionFilter" placeholder="Aksi (mis. ADD_FAQ)">
+                    <input type="date" id="logFromFilter" title="Dari tanggal">
+                    <input type="date" id="logToFilter" title="Sampai tanggal">
+                    <button id="filterLogsBtn">Filter</button>
+                </div>
                 <div id="logsContainer"></div>
             `;
             content.appendChild(logsSection);
             
             // Event listeners untuk logs
             document.getElementById("refreshLogsBtn")?.addEventListener("click", loadAdminLogs);
+            document.getElementById("filterLogsBtn")?.addEventListener("click", loadAdminLogs);
             
             document.getElementById("exportLogsBtn")?.addEventListener("click", async () => {
                 try {
-                    const res = await fetch("/admin/logs");
+                    // Export mengikuti filter yang sedang aktif
+                    const params = logQueryParams();
+                    params.set("limit", 500);
+                    const res = await fetch(`/admin/logs?${params}`);
                     const logs = await res.json();
                     
                     // Convert to CSV
@@ -217,7 +384,8 @@ document.addEventListener("DOMContentLoaded", () => {
                     });
                     
                     if (res.ok) {
-                        alert("Logs lama berhasil dihapus");
+                        const data = await res.json();
+                        alert(data.message || "Logs lama berhasil dihapus");
                         loadAdminLogs();
                     } else {
                         alert("Gagal menghapus logs lama");
@@ -371,10 +539,23 @@ document.addEventListener("DOMContentLoaded", () => {
     let isDirtyEdit = false;
     let faqSearchKeyword = "";
     let faqCategoryFilter = "all";
-
-    async function loadFaq() {
-        const res = await fetch("/faq");
-        faqs = await res.json();
+    let faqNextCursor = null;
+    const FAQ_PAGE_SIZE = 50;
+
+    // Filter dan pencarian dikerjakan server, satu halaman per request
+    async function loadFaq(append = false) {
+        const params = new URLSearchParams({
+            limit: FAQ_PAGE_SIZE,
+            fields: "question,answer,category_id"
+        });
+        if (faqSearchKeyword) params.set("q", faqSearchKeyword);
+        if (faqCategoryFilter !== "all") params.set("category_id", faqCategoryFilter);
+        if (append && faqNextCursor) params.set("cursor", faqNextCursor);
+
+        const res = await fetch(`/faq?${params}`);
+        const page = await res.json();
+        faqs = append ? faqs.concat(page) : page;
+        faqNextCursor = res.headers.get("X-Next-Cursor");
         renderFaq();
     }
 
@@ -424,20 +605,7 @@ document.addEventListener("DOMContentLoaded", () => {
             return;
         }
 
-        const filteredFaqs = faqs.filter(item => {
-            const matchText = item.question.toLowerCase().includes(faqSearchKeyword);
-            let matchCategory = true;
-
-            if (faqCategoryFilter === "none") {
-                matchCategory = !item.category_id;
-            } else if (faqCategoryFilter !== "all") {
-                matchCategory = item.category_id === faqCategoryFilter;
-            }
-
-            return matchText && matchCategory;
-        });
-
-        filteredFaqs.forEach((item) => {
+        faqs.forEach((item) => {
             const div = document.createElement("div");
             div.setAttribute("data-faq-id", item._id);
             
@@ -453,6 +621,14 @@ document.addEventListener("DOMContentLoaded", () => {
             div.querySelector(".editFaqBtn").onclick = () => editFaqById(item._id, div);
             div.querySelector(".delFaqBtn").onclick = () => deleteFaqById(item._id);
         });
+
+        if (faqNextCursor) {
+            const more = document.createElement("button");
+            more.id = "faqLoadMoreBtn";
+            more.textContent = "Muat lebih banyak";
+            more.onclick = () => loadFaq(true);
+            list.appendChild(more);
+        }
     }
 
     function editFaqById(faqId, faqDiv) {
@@ -691,10 +867,10 @@ document.addEventListener("DOMContentLoaded", () => {
         const keywordInput = document.getElementById("faqSearchInput");
         const categorySelect = document.getElementById("faqCategoryFilter");
 
-        if (keywordInput) faqSearchKeyword = keywordInput.value.trim().toLowerCase();
+        if (keywordInput) faqSearchKeyword = keywordInput.value.trim();
         if (categorySelect) faqCategoryFilter = categorySelect.value;
 
-        renderFaq();
+        loadFaq();
     });
     
     document.getElementById("faqResetBtn")?.addEventListener("click", () => {
@@ -707,7 +883,7 @@ document.addEventListener("DOMContentLoaded", () => {
         faqSearchKeyword = "";
         faqCategoryFilter = "all";
 
-        renderFaq();
+        loadFaq();
     });
 
     /************** INTENTS **************/
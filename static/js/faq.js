@@ -2,16 +2,24 @@ const sidebar = document.getElementById("categoryList");
 const faqContent = document.getElementById("faqContent");
 
 let categories = [];
-let faqs = [];
+
+const FAQ_PAGE_SIZE = 100;
 
 // ==============================
 // LOAD DATA DARI SERVER
 // ==============================
 
-async function loadFaq() {
-    const res = await fetch("/faq");
-    faqs = await res.json();
-    console.log("FAQ:", faqs);
+// FAQ diambil per kategori saat kategori dibuka, satu halaman per request
+async function loadFaqPage(categoryId, cursor) {
+    const params = new URLSearchParams({
+        category_id: categoryId,
+        limit: FAQ_PAGE_SIZE,
+        fields: "question,answer"
+    });
+    if (cursor) params.set("cursor", cursor);
+
+    const res = await fetch(`/faq?${params}`);
+    return { faqs: await res.json(), next: res.headers.get("X-Next-Cursor") };
 }
 
 async function loadCategories() {
@@ -40,29 +48,48 @@ function renderSidebar() {
 
         const ul = document.createElement("ul");
         ul.style.display = "none";
-
-        faqs
-            .filter(f => f.category_id === cat._id)
-            .forEach(f => {
-                const liFaq = document.createElement("li");
-                liFaq.textContent = f.question;
-                liFaq.addEventListener("click", e => {
-                    e.stopPropagation();
-                    showFaqDetail(f);
-                });
-                ul.appendChild(liFaq);
-            });
+        let loaded = false;
 
         li.appendChild(ul);
 
-        li.addEventListener("click", () => {
+        li.addEventListener("click", async () => {
             ul.style.display = ul.style.display === "block" ? "none" : "block";
+            if (!loaded) {
+                loaded = true;
+                await appendFaqs(ul, cat._id);
+            }
         });
 
         sidebar.appendChild(li);
     });
 }
 
+async function appendFaqs(ul, categoryId, cursor) {
+    const page = await loadFaqPage(categoryId, cursor);
+
+    page.faqs.forEach(f => {
+        const liFaq = document.createElement("li");
+        liFaq.textContent = f.question;
+        liFaq.addEventListener("click", e => {
+            e.stopPropagation();
+            showFaqDetail(f);
+        });
+        ul.appendChild(liFaq);
+    });
+
+    if (page.next) {
+        const more = document.createElement("li");
+        more.className = "faq-more";
+        more.textContent = "Lihat lebih banyak...";
+        more.addEventListener("click", async e => {
+            e.stopPropagation();
+            more.remove();
+            await appendFaqs(ul, categoryId, page.next);
+        });
+        ul.appendChild(more);
+    }
+}
+
 // ==============================
 // TAMPILKAN FAQ
 // ==============================
@@ -90,8 +117,7 @@ function getCategoryName(category_id) {
 // ==============================
 
 async function initFAQ() {
-    await loadFaq();        // WAJIB dulu
-    await loadCategories(); // baru render
+    await loadCategories(); // FAQ dimuat per kategori saat dibuka
 }
 
 initFAQ();
\ No newline at end of file
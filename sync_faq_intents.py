@@ -3,12 +3,16 @@ from pymongo import MongoClient
 import json
 import os
 
+from services import content_version
+from utils import index_artifact
+
 # ======= CONFIG =======
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = "faq_app"  # ganti sesuai db yang sudah ada
 
 FAQ_FILE = "faq.json"
 INTENTS_FILE = "intents.json"
+FAQ_INDEX_DIR = os.getenv("FAQ_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "index"))
 
 # ======= CONNECT DB =======
 client = MongoClient(MONGO_URI)
@@ -26,6 +30,8 @@ faq_collection.delete_many({})
 
 # ======= INSERT FAQ =======
 faq_collection.insert_many(faq_data)
+content_version.bump("SYNC_FAQ", collection=db["meta"])  # ETag /faq ikut berubah
+index_artifact.invalidate(FAQ_INDEX_DIR)  # artifact index chatbot dibangun ulang dari FAQ baru
 print("FAQ berhasil dimasukkan ke database!")
 
 # ======= GENERATE INTENTS.JSON =======
@@ -1,4 +1,6 @@
-from chatbot_engine import get_response
+from chatbot_engine import get_response, init_engine
+
+init_engine()
 
 print("Chatbot aktif. Ketik 'exit' untuk keluar.")
 
@@ -0,0 +1,73 @@
+# tests/conftest.py
+"""
+Fixture bersama untuk test: MongoDB diganti mongomock, jadi test tidak
+butuh server. Atribut modul db (client, db, *_collection) ditukar saat
+conftest di-import, sebelum app / services meng-import-nya; setiap test
+mulai dengan database kosong.
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/")
+os.environ["FAQ_INDEX_DIR"] = ""  # artifact index di-test tersendiri dengan tmp_path
+os.environ["ENGINE_INIT_MODE"] = "lazy"
+os.environ["RATE_LIMIT_BACKEND"] = "mongo"
+
+import mongomock  # noqa: E402
+import pytest  # noqa: E402
+from mongomock import collection as mongomock_collection  # noqa: E402
+
+import db as db_module  # noqa: E402
+
+# pymongo >= 4.11 mengirim argumen sort ke UpdateOne; mongomock belum mengenalnya
+_add_update = mongomock_collection.BulkOperationBuilder.add_update
+mongomock_collection.BulkOperationBuilder.add_update = (
+    lambda self, *args, sort=None, **kwargs: _add_update(self, *args, **kwargs)
+)
+
+_client = mongomock.MongoClient()
+db_module.client = _client
+db_module.db = _client[db_module.DB_NAME]
+db_module.users_collection = db_module.db["users"]
+db_module.admin_logs_collection = db_module.db["admin_logs"]
+db_module.faq_collection = db_module.db["faq"]
+db_module.categories_collection = db_module.db["categories"]
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    """Database mongomock kosong untuk setiap test"""
+    for name in db_module.db.list_collection_names():
+        db_module.db.drop_collection(name)
+    yield db_module.db
+
+
+class SyncAuditSink:
+    """Pengganti AuditSink untuk test: entry langsung ditulis ke admin_logs"""
+
+    def submit(self, entry):
+        db_module.admin_logs_collection.insert_one(entry)
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "audit_sink", SyncAuditSink())
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    """Test client Flask dengan sesi superadmin"""
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as session:
+        session["user"] = {"id": "1", "username": "owner", "role": "superadmin"}
+    return test_client
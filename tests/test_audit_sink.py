@@ -0,0 +1,74 @@
+import os
+
+from bson import ObjectId, json_util
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from utils.audit_sink import AuditSink
+
+VALIDATION_FAILED = 121
+
+
+class RejectingCollection:
+    """insert_many yang menolak entry action=BAD (seperti validasi dokumen)"""
+
+    def __init__(self, collection, transient=False):
+        self.collection = collection
+        self.transient = transient
+
+    def insert_many(self, docs, ordered=True):
+        if self.transient:
+            raise AutoReconnect("connection reset")
+        good = [d for d in docs if d["action"] != "BAD"]
+        if good:
+            self.collection.insert_many(good, ordered=ordered)
+        errors = [{"index": i, "code": VALIDATION_FAILED, "errmsg": "Document failed validation"}
+                  for i, d in enumerate(docs) if d["action"] == "BAD"]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(good)})
+
+
+def entries(*actions):
+    return [{"_id": ObjectId(), "action": action} for action in actions]
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json_util.loads(line) for line in f]
+
+
+def test_permanent_rejections_go_to_dead_letter(mongo, tmp_path):
+    sink = AuditSink(RejectingCollection(mongo["admin_logs"]), str(tmp_path / "journal.jsonl"))
+    sink._flush(entries("OK", "BAD", "OK"))
+
+    assert mongo["admin_logs"].count_documents({}) == 2
+    assert not os.path.exists(sink.journal_path)
+    dead = read_lines(sink.dead_letter_path)
+    assert [d["entry"]["action"] for d in dead] == ["BAD"]
+    assert dead[0]["error"] == "Document failed validation"
+    assert (sink.written, sink.rejected, sink.spilled) == (2, 1, 0)
+
+
+def test_duplicates_count_as_written(mongo, tmp_path):
+    batch = entries("OK")
+    mongo["admin_logs"].insert_many([dict(e) for e in batch])
+    sink = AuditSink(mongo["admin_logs"], str(tmp_path / "journal.jsonl"))
+    sink._flush(batch)
+
+    assert mongo["admin_logs"].count_documents({}) == 1
+    assert not os.path.exists(sink.dead_letter_path)
+
+
+def test_transient_errors_spill_and_replay_drains_journal(mongo, tmp_path):
+    collection = RejectingCollection(mongo["admin_logs"], transient=True)
+    sink = AuditSink(collection, str(tmp_path / "journal.jsonl"))
+    sink._flush(entries("OK", "BAD"))
+    assert len(read_lines(sink.journal_path)) == 2
+
+    # MongoDB kembali: entry BAD tidak membuat journal tertahan selamanya
+    collection.transient = False
+    sink._replay_journal()
+
+    assert not os.path.exists(sink.journal_path)
+    assert not any(name.startswith("journal.jsonl.replay-") for name in os.listdir(tmp_path))
+    assert mongo["admin_logs"].count_documents({}) == 1
+    assert [d["entry"]["action"] for d in read_lines(sink.dead_letter_path)] == ["BAD"]
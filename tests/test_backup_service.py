@@ -0,0 +1,132 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from services import admin_log_service, backup_service
+from utils.audit_sink import _insert_ignoring_duplicates
+
+
+@pytest.fixture
+def faqs(mongo):
+    category = mongo["categories"].insert_one({"name": "KTP & KK"}).inserted_id
+    docs = [{"_id": ObjectId(), "question": f"pertanyaan {i}", "answer": f"jawaban \"{i}\" é",
+             "category_id": str(category) if i % 2 else None} for i in range(7)]
+    mongo["faq"].insert_many(docs)
+    return docs
+
+
+def test_json_export_matches_json_dumps(faqs):
+    records = list(backup_service.iter_records("faq"))
+    text = "".join(backup_service.export("faq"))
+    assert text == json.dumps(records, indent=2, ensure_ascii=False)
+    assert records[1]["category_name"] == "KTP & KK" and records[0]["category_name"] == "-"
+    assert "".join(backup_service.export("categories")).startswith("[\n  {")
+
+
+def test_empty_collection_exports_empty_array(mongo):
+    assert "".join(backup_service.export("faq")) == "[]"
+    assert "".join(backup_service.export("faq", "ndjson")) == ""
+
+
+def test_ndjson_export_and_small_chunks(faqs):
+    chunks = list(backup_service.buffered(backup_service.iter_ndjson(backup_service.iter_records("faq")), 64))
+    assert len(chunks) > 1
+    lines = "".join(chunks).splitlines()
+    assert [json.loads(line)["question"] for line in lines] == [f["question"] for f in faqs]
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+def test_export_all_counts_in_metadata(faqs, fmt):
+    text = "".join(backup_service.export_all("2024-05-10T12:00:00", fmt))
+    if fmt == "json":
+        data = json.loads(text)
+        assert [len(data["categories"]), len(data["faqs"])] == [1, 7]
+        metadata = data["metadata"]
+    else:
+        rows = [json.loads(line) for line in text.splitlines()]
+        assert [r["_collection"] for r in rows] == ["categories"] + ["faq"] * 7 + ["metadata"]
+        metadata = rows[-1]
+    assert (metadata["categories_count"], metadata["faqs_count"]) == (1, 7)
+
+
+def test_gzip_download(client, faqs):
+    response = client.get("/backup/all?format=ndjson&gzip=1")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Disposition"].endswith(".ndjson")
+    lines = gzip.decompress(response.data).decode("utf-8").splitlines()
+    assert len(lines) == 1 + 7 + 1
+
+
+def test_faq_pages_with_after_id_and_limit(client, faqs):
+    seen, args = [], "limit=3&format=ndjson"
+    while True:
+        response = client.get(f"/backup/faq?{args}")
+        assert response.status_code == 200
+        seen += [json.loads(line)["_id"] for line in response.get_data(as_text=True).splitlines()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        args = f"limit=3&format=ndjson&after_id={cursor}"
+    assert seen == sorted(str(f["_id"]) for f in faqs)
+
+
+def test_since_uses_object_id_time(mongo):
+    old = ObjectId.from_datetime(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    new = ObjectId.from_datetime(datetime(2024, 3, 1, tzinfo=timezone.utc))
+    mongo["categories"].insert_many([{"_id": old, "name": "lama"}, {"_id": new, "name": "baru"}])
+
+    cursor = backup_service.parse_cursor({"since": "2024-02-01T00:00:00Z"}, "categories")
+    assert [c["name"] for c in backup_service.iter_records("categories", cursor)] == ["baru"]
+
+
+@pytest.mark.parametrize("query", ["after_id=xyz", "since=kemarin", "limit=0", "limit=-1", "format=xml"])
+def test_invalid_backup_parameters(client, query):
+    assert client.get(f"/backup/faq?{query}").status_code == 400
+
+
+def log(action, **fields):
+    return {"_id": ObjectId(), "username": "owner", "action": action,
+            "timestamp": datetime.now(timezone.utc), **fields}
+
+
+def log_page(args):
+    cursor = backup_service.parse_cursor(args, "logs")
+    header = backup_service.next_cursor("logs", cursor)
+    return [r["action"] for r in backup_service.iter_records("logs", cursor)], header
+
+
+def test_log_export_resumes_on_insertion_time(mongo, monkeypatch):
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    mongo["admin_logs"].insert_many(
+        [log("LAMA")] + [log(f"A{i}", inserted_at=hour_ago) for i in range(3)]
+    )
+
+    first, after = log_page({"limit": "3"})
+    assert first == ["LAMA", "A0", "A1"]  # entry tanpa inserted_at paling awal
+
+    # Entry dengan _id / timestamp lebih tua dari cursor baru ditulis sekarang (replay journal)
+    late = log("TERLAMBAT", _id=ObjectId.from_datetime(hour_ago - timedelta(hours=1)))
+    late["timestamp"] = hour_ago - timedelta(hours=1)
+    _insert_ignoring_duplicates(mongo["admin_logs"], [late])
+
+    # Masih di dalam LOG_SINCE_OVERLAP_SECONDS: tunggu export berikutnya
+    assert log_page({"after_id": after}) == (["A2"], None)
+
+    monkeypatch.setattr(admin_log_service, "LOG_SINCE_OVERLAP_SECONDS", 0)
+    second, header = log_page({"after_id": after, "limit": "2"})
+    assert second == ["A2", "TERLAMBAT"]
+    assert log_page({"after_id": header}) == ([], None)
+    assert log_page({"since": hour_ago.isoformat(), "limit": "10"})[0] == ["A0", "A1", "A2", "TERLAMBAT"]
+
+
+def test_backup_logs_endpoint_returns_log_cursor(client, mongo):
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    mongo["admin_logs"].insert_many([log(f"A{i}", inserted_at=hour_ago) for i in range(3)])
+
+    response = client.get("/backup/logs?limit=2&format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["X-Next-Cursor"].startswith(f"{int(hour_ago.timestamp() * 1000)}_")
+    assert client.get("/backup/logs?after_id=" + str(ObjectId())).status_code == 400
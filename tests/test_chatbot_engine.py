@@ -0,0 +1,237 @@
+import importlib.util
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+import chatbot_engine as engine
+from services import content_version
+from utils import index_artifact
+from utils.index_artifact import read_artifact
+
+TOPICS = ["ktp", "kk", "paspor", "sim", "npwp", "akta", "skck", "domisili", "pbb", "imb",
+          "bpjs", "nikah", "cerai", "waris", "usaha", "pindah", "datang", "lahir", "mati", "tanah"]
+
+
+def faq(topic, answer=None):
+    return {"_id": ObjectId(), "question": f"bagaimana cara mengurus surat {topic}",
+            "answer": answer or f"jawaban {topic}", "category_id": "umum"}
+
+
+@pytest.fixture
+def reloads(monkeypatch):
+    """request_reload dicatat, tidak menjalankan worker background"""
+    reasons = []
+    monkeypatch.setattr(engine, "request_reload", lambda reason="": reasons.append(reason))
+    return reasons
+
+
+@pytest.fixture
+def loaded(mongo, monkeypatch, reloads):
+    docs = [faq(t) for t in TOPICS]
+    mongo["faq"].insert_many(docs)
+    monkeypatch.setattr(engine, "FAQ_INDEX_DIR", "")
+    engine.load_faq()
+    engine._ready_event.set()
+    return docs
+
+
+def test_incremental_upsert_edit_and_remove(loaded, reloads, monkeypatch):
+    monkeypatch.setattr(engine, "REFIT_OOV_RATIO", 1.0)
+    vectorizer = engine.get_index().vectorizer
+
+    new = faq("paspor", "jawaban paspor baru")
+    new["question"] = "syarat perpanjang paspor"
+    assert engine.upsert_faq(new)
+    assert "jawaban paspor baru" in engine.get_response("syarat perpanjang paspor")
+
+    edited = dict(loaded[0], answer="jawaban ktp diubah")
+    assert engine.upsert_faq(edited)
+    assert "jawaban ktp diubah" in engine.get_response("cara mengurus surat ktp")
+
+    assert engine.remove_faq(loaded[0]["_id"])
+    assert str(loaded[0]["_id"]) not in engine.get_index().positions
+    assert "jawaban ktp" not in engine.get_response("cara mengurus surat ktp")
+
+    # Tidak ada refit: vectorizer yang sama, tanpa reload
+    assert engine.get_index().vectorizer is vectorizer
+    assert reloads == []
+
+
+def test_response_cache_is_keyed_on_index_version(loaded, monkeypatch):
+    monkeypatch.setattr(engine, "REFIT_OOV_RATIO", 1.0)
+    question = "cara mengurus surat ktp"
+    first = engine.get_response(question)
+    hits = engine.get_cache_stats()["hits"]
+    assert engine.get_response(question.upper()) == first  # preprocess_text -> key sama
+    assert engine.get_cache_stats()["hits"] == hits + 1
+
+    # Update index menaikkan versi: jawaban lama di cache tidak terpakai lagi
+    version = engine.get_index().version
+    engine.upsert_faq(dict(loaded[0], answer="jawaban ktp terbaru"))
+    assert engine.get_index().version > version
+    assert "jawaban ktp terbaru" in engine.get_response(question)
+
+
+def test_drift_schedules_refit(loaded, reloads):
+    new = faq("x")
+    new["question"] = "formulir legalisir ijazah sekolah menengah"
+    engine.upsert_faq(new)
+    assert reloads and "vocabulary" in reloads[0]
+
+
+def test_change_ratio_schedules_refit(loaded, reloads, monkeypatch):
+    monkeypatch.setattr(engine, "REFIT_OOV_RATIO", 1.0)
+    for doc in loaded[:int(len(loaded) * engine.REFIT_CHANGE_RATIO)]:
+        engine.upsert_faq(dict(doc, answer="baru"))
+    assert reloads == []
+    engine.upsert_faq(dict(loaded[-1], answer="baru"))
+    assert reloads and "berubah" in reloads[0]
+
+
+class Down:
+    """Koleksi FAQ saat MongoDB putus"""
+
+    def find(self, *args, **kwargs):
+        raise AutoReconnect("down")
+
+    find_one = count_documents = find
+
+
+def test_reload_keeps_live_index_when_mongo_is_down(loaded, monkeypatch):
+    live = engine.get_index()
+    monkeypatch.setattr(engine, "faq_collection", Down())
+
+    assert engine.reload_chatbot() is False
+    assert engine.get_index() is live
+    assert "jawaban ktp" in engine.get_response("cara mengurus surat ktp")
+    assert engine._pending_ops is None
+
+
+def test_first_boot_falls_back_to_dummy_faq(monkeypatch):
+    monkeypatch.setattr(engine, "faq_collection", Down())
+    engine.load_faq()
+    assert engine.get_index().is_dummy
+
+
+def test_artifact_written_from_incremental_snapshot(mongo, tmp_path, monkeypatch, reloads):
+    monkeypatch.setattr(engine, "FAQ_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(engine, "REFIT_OOV_RATIO", 1.0)
+    docs = [faq(t) for t in TOPICS]
+    mongo["faq"].insert_many(docs)
+    engine.load_faq()
+    first = engine.current_version(str(tmp_path))
+    assert first == engine.get_index().artifact_version
+
+    # Update tidak membaca MongoDB lagi dan tidak menjadwalkan refit
+    monkeypatch.setattr(engine, "fetch_faq", lambda: pytest.fail("update inkremental tidak boleh fetch"))
+    assert engine.upsert_faq(dict(docs[1], answer="jawaban kk diubah"))
+    second = engine.current_version(str(tmp_path))
+    assert second != first
+    assert engine.get_index().artifact_version == second
+    assert reloads == []
+
+    # Worker lain memasang artifact baru dan melihat perubahan yang sama
+    engine._publish(engine.FaqIndex([]))
+    assert engine.load_index_artifact()
+    assert "jawaban kk diubah" in engine.get_response("cara mengurus surat kk")
+
+
+def worker(name, index_dir, reasons, ready=True):
+    """Instance modul engine terpisah, seperti satu worker gunicorn"""
+    spec = importlib.util.spec_from_file_location(name, engine.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.FAQ_INDEX_DIR = str(index_dir)
+    module.REFIT_OOV_RATIO = 1.0
+    module.request_reload = lambda reason="": reasons.append(reason)
+    if ready:
+        module._ready_event.set()
+    return module
+
+
+def test_two_workers_do_not_overwrite_each_others_updates(mongo, tmp_path):
+    reasons = []
+    mongo["faq"].insert_many([faq(t) for t in TOPICS])
+    a = worker("engine_worker_a", tmp_path, reasons)
+    b = worker("engine_worker_b", tmp_path, reasons)
+    a.load_faq()
+    assert b.load_index_artifact()
+
+    x, y = faq("ktp", "jawaban x"), faq("kk", "jawaban y")
+    x["question"], y["question"] = "syarat surat ktp hilang", "syarat surat kk hilang"
+    assert a.upsert_faq(x)
+    # Worker B belum poll artifact baru: update-nya tetap harus dimulai dari versi A
+    assert b.get_index().artifact_version != engine.current_version(str(tmp_path))
+    assert b.upsert_faq(y)
+    assert b.remove_faq(x["_id"]) and a.upsert_faq(dict(y, answer="jawaban y diubah"))
+
+    ids = read_artifact(str(tmp_path))["ids"]
+    assert str(x["_id"]) not in ids and str(y["_id"]) in ids
+    assert len(ids) == len(TOPICS) + 1
+    b.sync_index_artifact()
+    assert "jawaban y diubah" in b.get_response("syarat surat kk hilang")
+    assert reasons == []
+
+
+def test_reload_refetches_when_another_worker_wrote_during_fit(mongo, tmp_path):
+    reasons = []
+    mongo["faq"].insert_many([faq(t) for t in TOPICS])
+    a = worker("engine_worker_a", tmp_path, reasons)
+    b = worker("engine_worker_b", tmp_path, reasons)
+    a.load_faq()
+    assert b.load_index_artifact()
+
+    late = faq("ktp", "jawaban terlambat")
+    late["question"] = "syarat surat ktp hilang"
+    fetch = a.fetch_faq
+
+    def fetch_then_edit():
+        rows = fetch()
+        if not mongo["faq"].find_one({"_id": late["_id"]}):
+            # Admin di worker B menambah FAQ setelah A selesai membaca koleksi
+            mongo["faq"].insert_one(late)
+            b.upsert_faq(late)
+        return rows
+
+    a.fetch_faq = fetch_then_edit
+    a.reload_chatbot()
+    assert str(late["_id"]) in a.get_index().positions
+    assert str(late["_id"]) in read_artifact(str(tmp_path))["ids"]
+
+
+def test_boot_reuses_artifact_only_while_mongo_is_unchanged(mongo, tmp_path):
+    mongo["faq"].insert_many([faq(t) for t in TOPICS])
+    worker("engine_build", tmp_path, []).load_faq()
+    built = engine.current_version(str(tmp_path))
+
+    fresh = worker("engine_boot_same", tmp_path, [], ready=False)
+    fresh.fetch_faq = lambda: pytest.fail("artifact masih sesuai, tidak perlu fit ulang")
+    fresh.init_engine()
+    assert fresh.get_index().artifact_version == built
+
+    # FAQ diubah selama aplikasi mati (load_db / restore / edit manual)
+    added = faq("tanah", "jawaban sertifikat tanah")
+    added["question"] = "syarat sertifikat tanah"
+    mongo["faq"].insert_one(added)
+    content_version.bump("LOAD_DB", collection=mongo["meta"])
+
+    stale = worker("engine_boot_changed", tmp_path, [], ready=False)
+    stale.init_engine()
+    assert str(added["_id"]) in stale.get_index().positions
+    assert engine.current_version(str(tmp_path)) != built
+
+
+def test_invalidated_artifact_schedules_refit(mongo, tmp_path):
+    mongo["faq"].insert_many([faq(t) for t in TOPICS])
+    running = worker("engine_running", tmp_path, [])
+    running.load_faq()
+    woken = []
+    running._wake_worker = woken.append
+    running.FAQ_INDEX_POLL_SECONDS = 0
+
+    assert index_artifact.invalidate(str(tmp_path))
+    assert engine.current_version(str(tmp_path)) is None
+    running._poll_index_artifact()
+    assert woken == ["reload"]
+    assert not index_artifact.invalidate(str(tmp_path))
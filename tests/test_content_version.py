@@ -0,0 +1,66 @@
+import pytest
+from pymongo.errors import AutoReconnect
+
+from services import content_version, faq_service
+
+
+@pytest.fixture(autouse=True)
+def fresh_version():
+    content_version.invalidate()
+    yield
+    content_version.invalidate()
+
+
+def test_matching_etag_returns_304_without_querying(client, mongo, monkeypatch):
+    mongo["faq"].insert_one({"question": "q", "answer": "a", "category_id": None})
+    first = client.get("/faq")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"v')
+
+    monkeypatch.setattr(faq_service, "find_faq_page", lambda params: pytest.fail("304 tidak boleh query FAQ"))
+    cached = client.get("/faq", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == etag
+
+
+def test_mutation_changes_etag(client, mongo):
+    etag = client.get("/categories").headers["ETag"]
+
+    assert client.post("/categories", json={"name": "KTP"}).status_code == 200
+
+    response = client.get("/categories", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [c["name"] for c in response.get_json()] == ["KTP"]
+
+
+def test_if_modified_since(client):
+    content_version.bump("TEST")
+    last_modified = client.get("/categories").headers["Last-Modified"]
+
+    assert client.get("/categories", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/categories", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+
+
+def test_other_workers_see_bump_after_ttl(mongo, monkeypatch):
+    before, _ = content_version.current()
+    # Worker lain menaikkan versi langsung di MongoDB
+    mongo["meta"].update_one({"_id": content_version.META_ID}, {"$inc": {"version": 1}}, upsert=True)
+    assert content_version.current()[0] == before  # masih dari cache lokal
+
+    version, updated_at, _ = content_version._cached
+    monkeypatch.setattr(content_version, "_cached", (version, updated_at, 0.0))  # TTL cache habis
+    assert content_version.current()[0] == before + 1
+
+
+def test_unreadable_version_serves_without_validators(client, monkeypatch):
+    class Down:
+        def find_one(self, *args, **kwargs):
+            raise AutoReconnect("down")
+
+    monkeypatch.setattr(content_version, "_meta_collection", lambda: Down())
+    response = client.get("/categories")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
@@ -0,0 +1,13 @@
+import db
+
+
+def test_ensure_indexes_is_idempotent(mongo):
+    first = db.ensure_indexes(verbose=False)
+    assert first == db.ensure_indexes(verbose=False)
+    assert set(first) == {options["name"] for _, _, options in db.INDEXES}
+
+
+def test_restore_natural_keys_are_indexed(mongo):
+    db.ensure_indexes(["faq", "categories"], verbose=False)
+    assert "question_1" in mongo["faq"].index_information()
+    assert "name_1" in mongo["categories"].index_information()
@@ -0,0 +1,63 @@
+import pytest
+from bson import ObjectId
+
+from services import faq_service
+
+
+def find(**args):
+    return faq_service.find_faq_page(faq_service.parse_faq_query(args))
+
+
+@pytest.fixture
+def faqs(mongo):
+    category = ObjectId()
+    docs = [
+        {"question": "Cara membuat KTP baru", "answer": "bawa KK", "category_id": str(category)},
+        {"question": "Syarat cetak ulang ktp", "answer": "surat kehilangan", "category_id": str(category)},
+        {"question": "Biaya akta (kelahiran)?", "answer": "gratis", "category_id": 3},
+        {"question": "Jam layanan kelurahan", "answer": "KTP dilayani pagi", "category_id": None},
+    ]
+    mongo["faq"].insert_many(docs)
+    return category
+
+
+def questions(docs):
+    return sorted(d["question"] for d in docs)
+
+
+def test_q_matches_substring_of_question_case_insensitive(faqs):
+    assert questions(find(q="KTP")[0]) == ["Cara membuat KTP baru", "Syarat cetak ulang ktp"]
+    # Potongan kata juga cocok ("kt" ada di "ktp" dan "akta")
+    assert len(find(q="kt")[0]) == 3
+    # Hanya question yang dicari, bukan answer
+    assert "Jam layanan kelurahan" not in questions(find(q="ktp")[0])
+    # Karakter regex diperlakukan sebagai teks biasa
+    assert questions(find(q="(kelahiran)?")[0]) == ["Biaya akta (kelahiran)?"]
+
+
+def test_category_filter(faqs):
+    assert len(find(category_id=str(faqs))[0]) == 2
+    assert questions(find(category_id="3")[0]) == ["Biaya akta (kelahiran)?"]
+    assert questions(find(category_id="none")[0]) == ["Jam layanan kelurahan"]
+
+
+def test_keyset_pages_and_projection(faqs):
+    seen, cursor = [], None
+    while True:
+        args = {"limit": "3", "fields": "question"}
+        if cursor:
+            args["cursor"] = cursor
+        docs, cursor = find(**args)
+        assert all(set(d) == {"_id", "question"} for d in docs)
+        seen.extend(d["_id"] for d in docs)
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 4
+    assert seen == sorted(seen)
+
+
+@pytest.mark.parametrize("args", [{"limit": "0"}, {"limit": "501"}, {"cursor": "x"},
+                                  {"fields": "question,$where"}])
+def test_invalid_parameters(args):
+    with pytest.raises(ValueError):
+        faq_service.parse_faq_query(args)
@@ -0,0 +1,96 @@
+import importlib
+import json
+import threading
+import time
+
+import pytest
+from bson import ObjectId
+
+from services import intent_service as intent_module
+
+
+@pytest.fixture
+def intents(monkeypatch, tmp_path):
+    """Modul intent_service dengan state worker baru dan debounce pendek"""
+    monkeypatch.setenv("INTENTS_DEBOUNCE_SECONDS", "0.05")
+    monkeypatch.setenv("INTENTS_MAX_DELAY_SECONDS", "5")
+    module = importlib.reload(intent_module)
+    monkeypatch.setattr(module, "INTENTS_PATH", str(tmp_path / "intents.json"))
+    yield module
+    monkeypatch.delenv("INTENTS_DEBOUNCE_SECONDS")
+    monkeypatch.delenv("INTENTS_MAX_DELAY_SECONDS")
+    importlib.reload(intent_module)
+
+
+def wait_for(module, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = module.get_intents_status()
+        if condition(status):
+            return status
+        time.sleep(0.01)
+    pytest.fail(f"status tidak tercapai: {module.get_intents_status()}")
+
+
+def test_burst_of_changes_is_one_rebuild(intents, monkeypatch):
+    calls = []
+    monkeypatch.setattr(intents, "generate_intents_from_db", lambda: calls.append(1) or True)
+
+    ids = [intents.schedule_intents_regeneration(f"EDIT_FAQ {i}") for i in range(20)]
+    assert ids == list(range(1, 21))
+    assert intents.get_intents_status()["pending"]
+
+    status = wait_for(intents, lambda s: s["status"] == "idle")
+    assert calls == [1]
+    assert (status["generation"], status["covers"], status["pending"]) == (1, 20, False)
+    assert status["last_reason"] == "EDIT_FAQ 19"
+
+
+def test_change_during_rebuild_runs_again(intents, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_generate():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(intents, "generate_intents_from_db", slow_generate)
+    intents.schedule_intents_regeneration("ADD_FAQ")
+    assert started.wait(5)
+    intents.schedule_intents_regeneration("EDIT_FAQ")
+    assert intents.get_intents_status()["status"] == "running"
+    release.set()
+
+    status = wait_for(intents, lambda s: s["generation"] == 2 and s["status"] == "idle")
+    assert len(calls) == 2 and status["covers"] == 2
+
+
+def test_failure_is_reported_and_cleared_by_next_success(intents, monkeypatch):
+    results = [False, True]
+    monkeypatch.setattr(intents, "generate_intents_from_db", lambda: results.pop(0))
+
+    intents.schedule_intents_regeneration("ADD_FAQ")
+    failed = wait_for(intents, lambda s: s["status"] == "failed")
+    assert failed["pending"] and failed["last_error"]
+
+    intents.schedule_intents_regeneration("ADD_FAQ")
+    ok = wait_for(intents, lambda s: s["status"] == "idle")
+    assert ok["last_error"] is None and not ok["pending"]
+
+
+def test_generate_groups_faq_by_category(intents, mongo):
+    category = mongo["categories"].insert_one({"name": "KTP"}).inserted_id
+    mongo["faq"].insert_many([
+        {"question": "syarat ktp", "answer": "bawa KK", "category_id": str(category)},
+        {"question": "jam buka", "answer": "08.00", "category_id": None},
+        {"question": "kategori hilang", "answer": "-", "category_id": str(ObjectId())},
+    ])
+
+    assert intents.generate_intents_from_db()
+    with open(intents.INTENTS_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    by_tag = {i["tag"]: i for i in data["intents"]}
+    assert by_tag["KTP"]["patterns"] == ["syarat ktp"]
+    assert by_tag["Uncategorized"]["responses"] == ["08.00", "-"]
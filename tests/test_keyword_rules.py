@@ -0,0 +1,84 @@
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+from utils.keyword_rules import DEFAULT_ADJUSTMENTS, load_keyword_rules
+
+KEYWORD_BARU = ["baru", "bikin", "pertama"]
+KEYWORD_CETAK_ULANG = ["hilang", "rusak", "cetak ulang"]
+
+
+def legacy_adjustment(user_text, faq_question):
+    """keyword_adjustment versi if-chain sebelum rule dijadikan tabel"""
+    u = user_text.lower()
+    q = faq_question.lower()
+    score = 0.0
+    if any(k in u for k in KEYWORD_BARU):
+        if "baru" in q:
+            score += 0.05
+        if "cetak ulang" in q or "hilang" in q:
+            score -= 0.10
+    if any(k in u for k in KEYWORD_CETAK_ULANG):
+        if "cetak ulang" in q or "hilang" in q:
+            score += 0.05
+        if "baru" in q:
+            score -= 0.10
+    return score
+
+
+USER_TEXTS = [" ".join(words) for n in range(3) for words in itertools.combinations(
+    ["Bikin", "ktp", "RUSAK", "pertama", "cetak ulang", "hilang", "baru"], n)]
+FAQ_QUESTIONS = ["cara buat ktp", "syarat KTP baru", "cetak ulang ktp", "ktp hilang",
+                 "ktp baru atau cetak ulang", "Hilang dan baru", ""]
+
+
+def test_default_table_matches_legacy_if_chain():
+    rules = load_keyword_rules()
+    pairs = list(itertools.product(USER_TEXTS, FAQ_QUESTIONS))
+    expected = [legacy_adjustment(u, q) for u, q in pairs]
+
+    assert [rules.adjustment(u, q) for u, q in pairs] == pytest.approx(expected)
+    # Jalur vektor (dipakai _answer_batch) memberi hasil yang sama
+    vectorised = rules.adjust(rules.query_flags([u for u, _ in pairs]),
+                              rules.faq_flags([q for _, q in pairs]))
+    assert vectorised == pytest.approx(expected)
+
+
+def test_all_matching_rules_add_up():
+    rules = load_keyword_rules()
+    # Query "baru" + "hilang" dan FAQ "baru" + "hilang": keempat rule aktif
+    assert rules.adjustment("ktp baru hilang", "ktp baru hilang") == pytest.approx(0.05 - 0.10 + 0.05 - 0.10)
+    assert rules.max_span == pytest.approx(0.10 + 0.20)
+
+
+def test_rules_file_overrides_only_given_tables(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"adjustments": DEFAULT_ADJUSTMENTS + [
+        {"query": "baru", "faq": "baru", "delta": 0.05},  # rule ganda dijumlahkan
+    ]}))
+    rules = load_keyword_rules(str(path))
+    default = load_keyword_rules()
+
+    assert rules.query_features == default.query_features
+    assert rules.adjustment("bikin ktp", "ktp baru") == pytest.approx(0.10)
+    assert rules.signature != default.signature
+
+
+def test_flag_shapes_with_empty_input():
+    rules = load_keyword_rules()
+    assert rules.query_flags([]).shape == (0, 2)
+    assert rules.faq_flags([None]).tolist() == [[False, False]]
+    assert np.asarray(rules.adjust(rules.query_flags([]), rules.faq_flags([]))).shape == (0,)
+
+
+def test_adjustment_decides_between_similar_faqs():
+    import chatbot_engine as engine
+
+    index = engine.build_index(list(engine.DUMMY_FAQ))
+    lost = engine._answer(index, engine.preprocess_text("ktp saya hilang, cetak ulang ktp"))
+    new = engine._answer(index, engine.preprocess_text("syarat bikin ktp baru"))
+
+    assert lost.startswith("📌 Untuk cetak ulang KTP")
+    assert new.startswith("📌 Syarat KTP baru")
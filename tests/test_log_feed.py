@@ -0,0 +1,142 @@
+import importlib
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from services import admin_log_service, log_feed
+from utils import pubsub
+from utils.audit_sink import _insert_ignoring_duplicates
+
+
+@pytest.fixture
+def reload_feed(monkeypatch):
+    def load(**env):
+        for name in ("GUNICORN_THREADS", "LOG_STREAM_MAX_CLIENTS"):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(log_feed)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(log_feed)
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, 0),                                                          # 1 thread: SSE mati
+    ({"GUNICORN_THREADS": "8"}, 2),
+    ({"GUNICORN_THREADS": "8", "LOG_STREAM_MAX_CLIENTS": "20"}, 7),   # selalu < jumlah thread
+    ({"GUNICORN_THREADS": "16", "LOG_STREAM_MAX_CLIENTS": "3"}, 3),
+])
+def test_stream_cap_stays_below_thread_count(reload_feed, env, expected):
+    assert reload_feed(**env).LOG_STREAM_MAX_CLIENTS == expected
+
+
+def test_clients_over_cap_are_refused(reload_feed):
+    feed = reload_feed(GUNICORN_THREADS="8")
+    assert feed.acquire_client() and feed.acquire_client()
+    assert not feed.acquire_client()
+    feed.release_client()
+    assert feed.acquire_client()
+
+
+# =========================
+# GENERATOR SSE
+# =========================
+def row(username="owner", action="ADD_FAQ"):
+    return {"_id": ObjectId(), "timestamp": datetime.now(timezone.utc),
+            "username": username, "action": action, "detail": ""}
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """Tanpa thread watcher; heartbeat instan supaya generator tidak menunggu"""
+    monkeypatch.setattr(log_feed, "ensure_watcher", lambda: None)
+    monkeypatch.setattr(log_feed, "LOG_STREAM_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(log_feed, "LOG_STREAM_MAX_SECONDS", 5)
+    monkeypatch.setattr(log_feed, "_recent", log_feed.OrderedDict())
+    return log_feed
+
+
+def events(chunks, kind):
+    return [c for c in chunks if f"event: {kind}\n" in c]
+
+
+def test_live_entries_are_filtered_and_deduplicated(feed):
+    gen = feed.stream(None, {"action": ["EDIT_FAQ"]})
+    assert next(gen).startswith("retry:")
+    assert pubsub.subscriber_count(feed.TOPIC) == 1
+
+    skipped, wanted = row(action="ADD_FAQ"), row(action="EDIT_FAQ")
+    feed.publish_log(skipped)
+    feed.publish_log(wanted)
+    feed.publish_log(wanted)  # dari watcher juga: dikirim sekali
+
+    chunk = next(gen)
+    assert f'"_id": "{wanted["_id"]}"' in chunk
+    assert chunk.startswith("id: ")
+    assert next(gen) == ": ping\n\n"
+    gen.close()
+    assert pubsub.subscriber_count(feed.TOPIC) == 0
+
+
+def test_overflowed_subscriber_gets_resync(feed, monkeypatch):
+    real_subscribe = pubsub.subscribe
+    monkeypatch.setattr(pubsub, "subscribe", lambda topic: real_subscribe(topic, maxsize=2))
+    gen = feed.stream()
+    next(gen)
+    for _ in range(3):
+        feed.publish_log(row())
+
+    chunks = list(gen)
+    assert len(events(chunks, "resync")) == 1
+    assert events(chunks, "log") == []
+    assert pubsub.subscriber_count(feed.TOPIC) == 0
+
+
+def test_since_sends_backlog_once_before_live_entries(feed, mongo):
+    since = admin_log_service.watermark_cursor()
+    late = row(action="RESTORE_BACKUP")
+    _insert_ignoring_duplicates(mongo["admin_logs"], [late, row(action="ADD_FAQ")])
+
+    gen = feed.stream(since, {"action": ["RESTORE_BACKUP"]})
+    assert next(gen).startswith("retry:")
+    backlog = next(gen)
+    assert f'"_id": "{late["_id"]}"' in backlog
+    # Cursor event backlog = watermark find_logs, dipakai sebagai Last-Event-ID
+    admin_log_service.decode_cursor(backlog.split("\n")[0][len("id: "):])
+
+    feed.publish_log(late)  # watcher menangkap entry yang sama
+    assert next(gen) == ": ping\n\n"
+    gen.close()
+
+
+def test_since_with_too_many_missed_entries_asks_for_resync(feed, mongo, monkeypatch):
+    monkeypatch.setattr(feed, "BACKLOG_LIMIT", 2)
+    since = admin_log_service.watermark_cursor()
+    _insert_ignoring_duplicates(mongo["admin_logs"], [row() for _ in range(3)])
+
+    chunks = list(feed.stream(since))
+    assert len(events(chunks, "resync")) == 1
+    assert events(chunks, "log") == []
+    assert pubsub.subscriber_count(feed.TOPIC) == 0
+
+
+def test_stream_endpoint_refuses_over_cap_and_releases_slot(feed, client, monkeypatch):
+    monkeypatch.setattr(feed, "LOG_STREAM_MAX_CLIENTS", 1)
+    monkeypatch.setattr(feed, "LOG_STREAM_MAX_SECONDS", 0)
+    monkeypatch.setattr(feed, "_clients", 0)
+
+    assert client.get("/admin/logs/stream?since=bad").status_code == 400
+    assert feed._clients == 0
+
+    first = client.get("/admin/logs/stream", buffered=False)
+    assert first.status_code == 200
+    assert first.mimetype == "text/event-stream"
+    refused = client.get("/admin/logs/stream")
+    assert refused.status_code == 503
+
+    first.close()
+    assert feed._clients == 0
+    assert client.get("/admin/logs/stream").status_code == 200
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+import db
+from services import log_retention
+
+NOW = datetime(2024, 5, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def log(days_ago, action="ADD_FAQ", hours=0):
+    return {"_id": ObjectId(), "timestamp": NOW - timedelta(days=days_ago, hours=hours),
+            "username": "owner", "action": action, "detail": "é"}
+
+
+@pytest.fixture
+def archive_on(monkeypatch):
+    monkeypatch.setattr(db, "ADMIN_LOG_RETENTION_DAYS", 30)
+    monkeypatch.setattr(db, "ADMIN_LOG_ARCHIVE", True)
+
+
+@pytest.mark.parametrize("retention, archive, grace, expected", [
+    (30, False, 7, 30 * 86400),
+    (30, True, 7, 37 * 86400),
+    (0, True, 7, 0),
+])
+def test_ttl_seconds(monkeypatch, retention, archive, grace, expected):
+    monkeypatch.setattr(db, "ADMIN_LOG_RETENTION_DAYS", retention)
+    monkeypatch.setattr(db, "ADMIN_LOG_ARCHIVE", archive)
+    monkeypatch.setattr(db, "ADMIN_LOG_ARCHIVE_GRACE_DAYS", grace)
+    assert db.admin_log_ttl_seconds() == expected
+    assert db._ttl_option() == ({"expireAfterSeconds": expected} if expected else {})
+
+
+class CommandDb:
+    """db mongomock dengan command() pymongo (collMod) yang dicatat atau ditolak"""
+
+    def __init__(self, database, fail=False):
+        self.database = database
+        self.fail = fail
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.database[name]
+
+    def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+        if self.fail:
+            raise OperationFailure("collMod tidak didukung")
+        return {"ok": 1}
+
+
+def test_changed_retention_uses_coll_mod(mongo, monkeypatch):
+    keys = [("timestamp", 1)]
+    mongo["admin_logs"].create_index(keys, name="timestamp_1", expireAfterSeconds=30 * 86400)
+    fake = CommandDb(mongo)
+    monkeypatch.setattr(db, "db", fake)
+
+    assert db._sync_ttl("admin_logs", keys, {"name": "timestamp_1", "expireAfterSeconds": 10 * 86400})
+    assert fake.commands == [(("collMod", "admin_logs"),
+                              {"index": {"name": "timestamp_1", "expireAfterSeconds": 10 * 86400}})]
+    # Index lain dengan nama sama tapi key berbeda tidak disentuh
+    assert not db._sync_ttl("admin_logs", [("action", 1)], {"name": "timestamp_1", "expireAfterSeconds": 1})
+
+
+def test_changed_retention_rebuilds_index_when_coll_mod_fails(mongo, monkeypatch):
+    keys = [("timestamp", 1)]
+    mongo["admin_logs"].create_index(keys, name="timestamp_1", expireAfterSeconds=30 * 86400)
+    monkeypatch.setattr(db, "db", CommandDb(mongo, fail=True))
+
+    assert db._sync_ttl("admin_logs", keys, {"name": "timestamp_1", "expireAfterSeconds": 10 * 86400})
+    assert mongo["admin_logs"].index_information()["timestamp_1"]["expireAfterSeconds"] == 10 * 86400
+
+
+def test_rollup_archives_old_days_and_keeps_recent(mongo, archive_on, monkeypatch):
+    monkeypatch.setattr(log_retention, "ADMIN_LOG_ARCHIVE_CHUNK", 2)
+    old = [log(40, "ADD_FAQ"), log(40, "EDIT_FAQ", hours=1), log(40, "ADD_FAQ", hours=2), log(35, "LOGIN")]
+    recent = [log(1), log(29)]
+    mongo["admin_logs"].insert_many(old + recent)
+
+    result = log_retention.rollup_old_logs(NOW)
+    assert result["archived"] == 4
+    day = (NOW - timedelta(days=40)).date().isoformat()
+    assert result["days"] == [day, (NOW - timedelta(days=35)).date().isoformat()]
+    assert {d["_id"] for d in mongo["admin_logs"].find()} == {r["_id"] for r in recent}
+
+    # Tiga entry satu hari dipecah per ADMIN_LOG_ARCHIVE_CHUNK, isi tetap utuh
+    parts = list(mongo["admin_logs_archive"].find({"day": day}))
+    assert sorted(p["count"] for p in parts) == [1, 2]
+    assert sum((p["actions"].get("ADD_FAQ", 0) for p in parts)) == 2
+    archived = log_retention.read_archive(day)
+    assert [e["_id"] for e in archived] == sorted(e["_id"] for e in old[:3])
+    assert archived[0]["detail"] == "é"
+
+    assert log_retention.rollup_old_logs(NOW) == {"archived": 0, "days": []}
+
+
+def test_late_entry_for_archived_day_is_archived_on_next_run(mongo, archive_on):
+    mongo["admin_logs"].insert_one(log(40))
+    log_retention.rollup_old_logs(NOW)
+
+    late = log(40, "RESTORE_BACKUP")  # replay journal audit setelah roll-up
+    mongo["admin_logs"].insert_one(late)
+    assert log_retention.rollup_old_logs(NOW)["archived"] == 1
+    day = (NOW - timedelta(days=40)).date().isoformat()
+    assert late["_id"] in [e["_id"] for e in log_retention.read_archive(day)]
+
+
+def test_retention_disabled_keeps_everything(mongo, monkeypatch):
+    monkeypatch.setattr(db, "ADMIN_LOG_RETENTION_DAYS", 0)
+    mongo["admin_logs"].insert_one(log(400))
+    assert log_retention.rollup_old_logs(NOW) == {"archived": 0, "days": []}
+    assert mongo["admin_logs"].count_documents({}) == 1
+
+
+def test_clear_old_logs_without_archive_deletes(mongo, monkeypatch):
+    monkeypatch.setattr(db, "ADMIN_LOG_ARCHIVE", False)
+    mongo["admin_logs"].insert_many([
+        {"_id": ObjectId(), "timestamp": datetime.now(timezone.utc) - timedelta(days=days)} for days in (1, 31, 60)
+    ])
+    assert log_retention.clear_old_logs() == {"deleted": 2, "archived": 0, "retention_days": 30}
+    assert mongo["admin_logs"].count_documents({}) == 1
+
+
+def test_clear_old_logs_respects_rollup_lease(client, mongo, archive_on):
+    mongo["admin_logs"].insert_one(
+        {"_id": ObjectId(), "timestamp": datetime.now(timezone.utc) - timedelta(days=45), "action": "X"}
+    )
+    mongo["meta"].insert_one({"_id": log_retention.LEASE_ID, "owner": "worker lain",
+                              "until": datetime.now(timezone.utc) + timedelta(minutes=5)})
+    assert client.post("/admin/logs/clear-old").status_code == 409
+
+    mongo["meta"].update_one({"_id": log_retention.LEASE_ID},
+                             {"$set": {"until": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+    response = client.post("/admin/logs/clear-old")
+    assert response.get_json()["archived_count"] == 1
+    assert mongo["admin_logs_archive"].count_documents({}) == 1
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import metrics
+
+
+def test_histogram_buckets_are_cumulative_per_label():
+    hist = metrics.Histogram("test_seconds", "Durasi test", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        hist.observe(value, stage="score")
+    hist.observe(0.2, stage='a"b')
+
+    lines = hist.collect()
+    assert lines[:2] == ["# HELP test_seconds Durasi test", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="score",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="score",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="score",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{stage="score"} 4.05' in lines
+    assert 'test_seconds_count{stage="score"} 4' in lines
+    assert 'test_seconds_count{stage="a\\"b"} 1' in lines  # label di-escape
+
+
+def test_timer_records_even_when_block_raises():
+    hist = metrics.Histogram("test_timer_seconds", "Durasi", ["stage"])
+    with pytest.raises(ValueError):
+        with metrics.timer(hist, stage="format"):
+            raise ValueError("gagal")
+    assert 'test_timer_seconds_count{stage="format"} 1' in hist.collect()
+
+
+def test_registry_returns_the_same_histogram():
+    first = metrics.histogram("test_registry_seconds", "Durasi", ["x"])
+    assert metrics.histogram("test_registry_seconds", "lain", ["y"]) is first
+    assert "# TYPE test_registry_seconds histogram" in metrics.render()
+
+
+def test_mongo_listener_records_outcome():
+    listener = metrics.MongoCommandMetrics()
+    listener.succeeded(SimpleNamespace(duration_micros=1500, command_name="find"))
+    listener.failed(SimpleNamespace(duration_micros=2000, command_name="insert"))
+
+    lines = metrics.MONGO_COMMAND_SECONDS.collect()
+    assert any(l.startswith('mongo_command_seconds_count{command="find",endpoint="-",outcome="ok"}')
+               for l in lines)
+    assert any(l.startswith('mongo_command_seconds_count{command="insert",endpoint="-",outcome="error"}')
+               for l in lines)
+
+
+def test_metrics_endpoint(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    client.get("/metrics")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="metrics_endpoint",method="GET",status="200"}' in body
+    assert "chatbot_stage_seconds" in body
+
+    monkeypatch.setattr(app_module, "METRICS_TOKEN", "rahasia")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer rahasia"}).status_code == 200
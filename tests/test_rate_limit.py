@@ -0,0 +1,77 @@
+import threading
+
+from pymongo.errors import AutoReconnect
+
+from utils.rate_limit import MemoryRateLimiter, MongoRateLimiter, create_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_window():
+    clock = Clock()
+    limiter = MemoryRateLimiter(5, 60, clock=clock)
+
+    assert [limiter.hit("ip") for _ in range(6)] == [True] * 5 + [False]
+    clock.now += 12  # satu token kembali setiap 60 / 5 detik
+    assert [limiter.hit("ip"), limiter.hit("ip")] == [True, False]
+    assert limiter.hit("ip lain")
+
+
+def test_memory_is_bounded_by_lru_eviction():
+    limiter = MemoryRateLimiter(1, 60, maxsize=100)
+    for i in range(10000):
+        limiter.hit(f"10.0.{i // 256}.{i % 256}")
+
+    stats = limiter.stats()
+    assert stats["keys"] == 100
+    assert stats["evictions"] == 9900
+
+
+def test_mongo_limit_is_shared_between_workers(mongo):
+    workers = [MongoRateLimiter(mongo["rate_limits"], "login", 5, 3600) for _ in range(3)]
+
+    results = [workers[i % 3].hit("1.2.3.4") for i in range(7)]
+    assert results == [True] * 5 + [False] * 2
+    doc = mongo["rate_limits"].find_one()
+    assert doc["count"] == 7
+    assert "expires_at" in doc
+
+
+def test_mongo_concurrent_hits_are_counted_atomically(mongo):
+    limiter = MongoRateLimiter(mongo["rate_limits"], "login", 20, 3600)
+    allowed = []
+    threads = [threading.Thread(target=lambda: allowed.append(limiter.hit("ip"))) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert allowed.count(True) == 20
+
+
+def test_mongo_errors_fall_back_to_memory():
+    class Down:
+        def find_one_and_update(self, *args, **kwargs):
+            raise AutoReconnect("down")
+
+    limiter = MongoRateLimiter(Down(), "login", 2, 60)
+    assert [limiter.hit("ip") for _ in range(3)] == [True, True, False]
+
+
+def test_create_limiter_backend_selection(mongo):
+    assert isinstance(create_limiter("login", 5, 60, collection=mongo["rate_limits"]), MongoRateLimiter)
+    assert isinstance(create_limiter("login", 5, 60), MemoryRateLimiter)
+    assert isinstance(create_limiter("login", 5, 60, collection=mongo["rate_limits"], backend="memory"),
+                      MemoryRateLimiter)
+
+
+def test_login_endpoint_returns_429(app_module, mongo):
+    client = app_module.app.test_client()
+    codes = [client.post("/admin/login", json={"username": "x", "password": "y"}).status_code
+             for _ in range(app_module.LOGIN_RATE_LIMIT + 1)]
+    assert codes == [401] * app_module.LOGIN_RATE_LIMIT + [429]
@@ -0,0 +1,111 @@
+import gzip
+import io
+import json
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from services import restore_service
+
+
+def chunks(data, size=7):
+    """iter_text dengan potongan kecil supaya batas chunk ikut teruji"""
+    return restore_service.iter_text(io.BytesIO(data), read_size=size)
+
+
+def run(data, mongo, **kwargs):
+    collections = {"faq": mongo["faq"], "categories": mongo["categories"]}
+    return list(restore_service.restore(chunks(data), collections, **kwargs))
+
+
+def faq(i):
+    return {"question": f"pertanyaan {i}", "answer": f"jawaban {i}", "category_id": None}
+
+
+def test_parses_all_backup_formats():
+    records = [faq(1), faq(2)]
+    array = json.dumps(records).encode()
+    ndjson = "\n".join(json.dumps({"_collection": "faq", **r}) for r in records).encode()
+    full = json.dumps({"timestamp": "x", "categories": [{"name": "KTP"}], "faqs": records, "metadata": {}}).encode()
+
+    assert [c for c, _ in restore_service.iter_backup_records(chunks(array))] == ["faq", "faq"]
+    assert [r["question"] for _, r in restore_service.iter_backup_records(chunks(ndjson))] == [
+        "pertanyaan 1", "pertanyaan 2"]
+    assert [c for c, _ in restore_service.iter_backup_records(chunks(gzip.compress(full)))] == [
+        "categories", "faq", "faq"]
+
+
+def test_restore_upserts_and_is_idempotent(mongo):
+    data = json.dumps([faq(i) for i in range(5)]).encode()
+
+    first = run(data, mongo, chunk_size=2)
+    assert first[-1]["event"] == "done"
+    assert first[-1]["upserted"] == 5
+    assert restore_service.changed(first[-1])
+
+    again = run(data, mongo, chunk_size=2)
+    assert again[-1]["upserted"] == 0
+    assert mongo["faq"].count_documents({}) == 5
+    assert not restore_service.changed(again[-1])
+
+
+def test_dry_run_writes_nothing(mongo):
+    events = run(json.dumps([faq(1), {"question": ""}]).encode(), mongo, dry_run=True)
+    assert events[-1]["event"] == "done"
+    assert events[-1]["invalid"] == 1
+    assert mongo["faq"].count_documents({}) == 0
+    assert not restore_service.changed(events[-1])
+
+
+@pytest.mark.parametrize("data", [
+    gzip.compress(json.dumps([faq(i) for i in range(6)]).encode())[:-20],  # gzip terpotong
+    json.dumps([faq(i) for i in range(6)]).encode()[:-30] + b"\xff\xfe",   # bukan UTF-8
+    json.dumps([faq(i) for i in range(6)]).encode()[:-3],                  # JSON terpotong
+])
+def test_unreadable_file_ends_with_error_event(mongo, data):
+    events = run(data, mongo, chunk_size=2)
+    last = events[-1]
+    assert last["event"] == "error"
+    assert last["message"]
+    # Chunk yang sudah ditulis tetap ada dan restore dianggap mengubah data
+    assert mongo["faq"].count_documents({}) == last["upserted"] > 0
+    assert restore_service.changed(last)
+
+
+def test_mongo_error_ends_with_error_event(mongo):
+    class Failing:
+        def __init__(self, collection):
+            self.collection = collection
+            self.calls = 0
+
+        def bulk_write(self, ops, ordered=True):
+            self.calls += 1
+            if self.calls > 1:
+                raise AutoReconnect("timeout")
+            return self.collection.bulk_write(ops, ordered=ordered)
+
+    collections = {"faq": Failing(mongo["faq"]), "categories": mongo["categories"]}
+    data = json.dumps([faq(i) for i in range(6)]).encode()
+    events = list(restore_service.restore(chunks(data), collections, chunk_size=2))
+
+    assert events[-1]["event"] == "error"
+    assert "timeout" in events[-1]["message"]
+    assert mongo["faq"].count_documents({}) == 2
+    assert restore_service.changed(events[-1])
+
+
+def test_restore_endpoint_rebuilds_after_partial_failure(client, app_module, monkeypatch, mongo):
+    calls = []
+    monkeypatch.setattr(app_module, "refresh_chatbot", lambda: calls.append("refresh"))
+    monkeypatch.setattr(app_module, "schedule_intents_regeneration", lambda reason: calls.append(reason))
+    # Beberapa chunk RESTORE_CHUNK_SIZE sudah ditulis sebelum byte rusak terbaca
+    records = [{**faq(i), "answer": "jawaban " * 100} for i in range(600)]
+    data = json.dumps(records).encode()[:-100] + b"\xff"
+
+    response = client.post("/restore", data=data, content_type="application/octet-stream")
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert events[-1]["event"] == "error"
+    assert mongo["faq"].count_documents({}) > 0
+    assert calls == ["refresh", "RESTORE"]
+    assert mongo["admin_logs"].find_one({"action": "RESTORE_BACKUP"}) is not None
@@ -0,0 +1,49 @@
+from utils.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 0, "maxsize": 10, "ttl": 5, "hits": 1, "misses": 1,
+                             "evictions": 1, "hit_ratio": 0.5}
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" sekarang yang paling lama tidak dipakai
+    cache.set("c", 3)
+
+    assert cache.get("b", "hilang") == "hilang"
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_set_refreshes_ttl_and_zero_size_disables_cache():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4
+    cache.set("a", 2)
+    clock.now = 8
+    assert cache.get("a") == 2
+
+    disabled = TTLCache(maxsize=0)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None
+    assert disabled.stats()["size"] == 0
@@ -0,0 +1,261 @@
+# utils/audit_sink.py
+"""
+Sink audit log admin yang tidak memblokir request.
+
+log_admin_action hanya memasukkan entry ke queue di memori. Satu thread
+background mengumpulkan entry lalu menulis dengan insert_many jika batch
+penuh (AUDIT_BATCH_SIZE) atau sudah AUDIT_FLUSH_SECONDS berlalu.
+
+Jika MongoDB tidak bisa dihubungi, batch ditulis ke journal lokal
+append-only (JSON lines, format bson.json_util) dan diputar ulang
+setelah MongoDB kembali. Setiap entry sudah punya _id sejak masuk queue,
+jadi replay yang terulang tidak membuat duplikat.
+
+Setiap entry diberi inserted_at saat benar-benar ditulis (termasuk saat
+replay): dasar `since` di /admin/logs, karena urutan tulis tidak sama
+dengan urutan timestamp.
+
+Hanya error sementara (koneksi, timeout) yang masuk journal. Entry yang
+ditolak MongoDB secara permanen (misalnya validasi dokumen) tidak akan
+pernah berhasil diulang: entry itu ditulis ke file dead-letter
+(<journal>.dead) supaya journal tetap bisa kosong.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_SECONDS = float(os.environ.get("AUDIT_FLUSH_SECONDS", "1"))
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_RETRY_SECONDS = float(os.environ.get("AUDIT_RETRY_SECONDS", "30"))  # jeda cek replay journal
+
+DUPLICATE_KEY = 11000
+
+
+def _insert_ignoring_duplicates(collection, docs):
+    """
+    insert_many yang menganggap _id yang sudah ada sebagai sukses. Return
+    daftar (entry, pesan error) yang ditolak permanen; entry lain sudah
+    tersimpan (ordered=False). Error sementara tetap di-raise.
+    """
+    inserted_at = datetime.now(timezone.utc)
+    for doc in docs:
+        doc["inserted_at"] = inserted_at
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if e.details.get("writeConcernErrors"):
+            raise  # belum tentu tersimpan di replica: ulangi lewat journal
+        return [
+            (docs[err["index"]], err.get("errmsg", "write error"))
+            for err in e.details.get("writeErrors", [])
+            if err.get("code") != DUPLICATE_KEY
+        ]
+    return []
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class AuditSink:
+    def __init__(self, collection, journal_path, batch_size=AUDIT_BATCH_SIZE,
+                 flush_seconds=AUDIT_FLUSH_SECONDS, queue_size=AUDIT_QUEUE_SIZE,
+                 retry_seconds=AUDIT_RETRY_SECONDS):
+        self.collection = collection
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.retry_seconds = retry_seconds
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._journal_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_replay = 0.0
+        self.dead_letter_path = f"{journal_path}.dead"
+        self.written = 0
+        self.spilled = 0
+        self.rejected = 0
+
+    # ---------- API ----------
+    def submit(self, entry):
+        """Masukkan satu entry audit (tidak pernah menunggu MongoDB)"""
+        entry.setdefault("_id", ObjectId())
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Queue penuh (MongoDB lambat/mati lama): langsung ke journal
+            self._spill([entry])
+
+    def stop(self, timeout=10):
+        """Hentikan thread setelah queue dikosongkan (dipanggil saat exit)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "spilled": self.spilled,
+            "rejected": self.rejected,
+            "journal_pending": os.path.exists(self.journal_path)
+            or os.path.exists(f"{self.journal_path}.replay-{os.getpid()}"),
+        }
+
+    # ---------- thread ----------
+    def _ensure_started(self):
+        # Thread dibuat saat entry pertama (setelah fork worker gunicorn)
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        # Sisa journal dari proses sebelumnya
+        self._adopt_orphans()
+        self._replay_journal()
+
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif time.monotonic() - self._last_replay >= self.retry_seconds:
+                self._replay_journal()
+
+    def _collect(self):
+        """Ambil entry sampai batch penuh atau flush_seconds habis"""
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        try:
+            rejected = _insert_ignoring_duplicates(self.collection, batch)
+            self.written += len(batch) - len(rejected)
+            self._dead_letter(rejected)
+        except PyMongoError as e:
+            logger.warning("⚠️ Audit log ke MongoDB gagal (%s), %d entry ditulis ke journal", e, len(batch))
+            self._spill(batch)
+            return
+
+        # MongoDB hidup lagi: putar ulang journal jika ada
+        if os.path.exists(self.journal_path):
+            self._replay_journal()
+
+    # ---------- journal ----------
+    def _dead_letter(self, rejected):
+        """Simpan entry yang ditolak permanen (tidak diulang) beserta alasannya"""
+        if not rejected:
+            return
+        logger.error("❌ %d entry audit ditolak MongoDB, disimpan di %s: %s",
+                     len(rejected), self.dead_letter_path, rejected[0][1])
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for entry, error in rejected:
+                    f.write(json_util.dumps({"error": error, "entry": entry}) + "\n")
+        self.rejected += len(rejected)
+
+    def _spill(self, entries):
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json_util.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(entries)
+
+    def _adopt_orphans(self):
+        """Gabungkan file replay milik proses yang sudah mati ke journal aktif"""
+        directory = os.path.dirname(self.journal_path) or "."
+        prefix = os.path.basename(self.journal_path) + ".replay-"
+        try:
+            names = [n for n in os.listdir(directory) if n.startswith(prefix)]
+        except OSError:
+            return
+
+        for name in names:
+            pid = name[len(prefix):]
+            if not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            path = os.path.join(directory, name)
+            with self._journal_lock:
+                try:
+                    with open(path, "r", encoding="utf-8") as src:
+                        content = src.read()
+                except OSError:
+                    continue  # sudah diambil worker lain
+                with open(self.journal_path, "a", encoding="utf-8") as dst:
+                    dst.write(content if content.endswith("\n") or not content else content + "\n")
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # worker lain juga mengambilnya; _id mencegah duplikat
+
+    def _replay_journal(self):
+        """Tulis ulang isi journal ke MongoDB; journal tetap ada jika gagal"""
+        self._last_replay = time.monotonic()
+        # Rename dulu (atomik) supaya entry baru masuk ke journal yang bersih
+        replay_path = f"{self.journal_path}.replay-{os.getpid()}"
+        with self._journal_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.journal_path):
+                    return
+                os.replace(self.journal_path, replay_path)
+
+        entries = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json_util.loads(line))
+                except ValueError:
+                    # Baris terpotong (proses mati saat menulis)
+                    if line.strip():
+                        logger.warning("⚠️ Baris journal audit rusak dilewati")
+
+        rejected = []
+        try:
+            for i in range(0, len(entries), self.batch_size):
+                rejected += _insert_ignoring_duplicates(self.collection, entries[i:i + self.batch_size])
+        except PyMongoError as e:
+            logger.warning("⚠️ Replay journal audit belum bisa: %s", e)
+            return
+
+        # Replay yang terputus di tengah diulang utuh; entry yang ditolak akan
+        # ditolak lagi dan baru dicatat ke dead-letter saat replay selesai
+        self._dead_letter(rejected)
+        os.remove(replay_path)
+        self.written += len(entries) - len(rejected)
+        logger.info("✅ %d entry audit dari journal ditulis ke MongoDB", len(entries))
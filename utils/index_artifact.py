@@ -0,0 +1,247 @@
+# utils/index_artifact.py
+"""
+Artifact index FAQ di disk, dibagi ke semua worker gunicorn lewat mmap.
+
+Layout (satu folder per versi, tidak pernah ditulis ulang):
+
+    <base_dir>/CURRENT              -> nama versi aktif
+    <base_dir>/.lock                -> lock antar proses untuk writer (artifact_lock)
+    <base_dir>/<versi>/manifest.json
+    <base_dir>/<versi>/vocabulary.json, ids.json
+    <base_dir>/<versi>/idf.npy
+    <base_dir>/<versi>/emb_{data,indices,indptr}.npy    (CSR per FAQ)
+    <base_dir>/<versi>/post_{data,indices,indptr}.npy   (inverted index)
+    <base_dir>/<versi>/rows.jsonl + rows_offsets.npy    (row store)
+    <base_dir>/<versi>/keyword_flags.npy                (flag fitur keyword per FAQ)
+
+Array dibuka dengan np.load(mmap_mode="r") sehingga halaman memori
+dipakai bersama lewat page cache, bukan disalin ke tiap worker.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada flock, cukup satu proses
+    fcntl = None
+
+import numpy as np
+from scipy import sparse
+
+ARTIFACT_FORMAT = 2
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+ROW_FIELDS = ("_id", "question", "answer", "category_id")
+
+
+class ArtifactRows(Sequence):
+    """Row store read-only: satu baris JSON per FAQ, di-decode saat diakses"""
+
+    def __init__(self, path, offsets):
+        self._offsets = offsets
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("row index out of range")
+        return json.loads(self._mm[int(self._offsets[i]):int(self._offsets[i + 1])])
+
+
+def current_version(base_dir):
+    """Nama versi artifact aktif, atau None jika belum ada"""
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+@contextmanager
+def artifact_lock(base_dir):
+    """
+    Lock eksklusif antar proses (flock pada <base_dir>/.lock). Writer yang
+    membaca CURRENT, menerapkan perubahan lalu menulis versi baru harus
+    memegang lock ini, supaya dua worker tidak saling menimpa versi.
+    Tanpa base_dir atau fcntl tidak mengunci apa pun.
+    """
+    if not base_dir or fcntl is None:
+        yield
+        return
+
+    os.makedirs(base_dir, exist_ok=True)
+    with open(os.path.join(base_dir, LOCK_FILE), "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def invalidate(base_dir):
+    """
+    Hapus pointer CURRENT setelah FAQ diubah di luar aplikasi: proses
+    berikutnya fit ulang dari MongoDB. Folder versi dibiarkan untuk worker
+    yang masih me-mmap-nya. Return True jika ada CURRENT yang dihapus.
+    """
+    if not base_dir:
+        return False
+    with artifact_lock(base_dir):
+        try:
+            os.remove(os.path.join(base_dir, CURRENT_FILE))
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def _save_csr(path, prefix, matrix):
+    np.save(os.path.join(path, f"{prefix}_data.npy"), matrix.data)
+    np.save(os.path.join(path, f"{prefix}_indices.npy"), matrix.indices)
+    np.save(os.path.join(path, f"{prefix}_indptr.npy"), matrix.indptr)
+
+
+def _load_csr(path, prefix, shape):
+    arrays = [
+        np.load(os.path.join(path, f"{prefix}_{name}.npy"), mmap_mode="r")
+        for name in ("data", "indices", "indptr")
+    ]
+    return sparse.csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+def write_artifact(base_dir, rows, vocabulary, idf, embeddings, postings, keyword_flags,
+                   params=None, drift=None, source=None, keep=3):
+    """
+    Tulis satu versi artifact lalu jadikan aktif. Folder versi ditulis di
+    temp dulu dan CURRENT diganti dengan os.replace, jadi pembaca tidak
+    pernah melihat artifact setengah jadi. Return nama versi.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".build-", dir=base_dir)
+
+    try:
+        digest = hashlib.sha1()
+        offsets = [0]
+        with open(os.path.join(tmp_dir, "rows.jsonl"), "wb") as f:
+            for row in rows:
+                line = json.dumps(
+                    {k: row.get(k) for k in ROW_FIELDS}, ensure_ascii=False, default=str
+                ).encode("utf-8") + b"\n"
+                f.write(line)
+                digest.update(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(os.path.join(tmp_dir, "rows_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+        terms = sorted(vocabulary, key=vocabulary.get)
+        with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp_dir, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump([str(row.get("_id")) for row in rows], f)
+
+        np.save(os.path.join(tmp_dir, "idf.npy"), np.asarray(idf))
+        # Snapshot inkremental dan hasil refit bisa punya row yang sama tapi
+        # vocabulary/IDF berbeda: keduanya harus menjadi versi yang berbeda
+        digest.update(json.dumps(terms, ensure_ascii=False).encode("utf-8"))
+        digest.update(np.ascontiguousarray(idf, dtype=np.float64).tobytes())
+        _save_csr(tmp_dir, "emb", embeddings)
+        _save_csr(tmp_dir, "post", postings)
+        np.save(os.path.join(tmp_dir, "keyword_flags.npy"), np.asarray(keyword_flags, dtype=bool))
+
+        version = f"v{time.strftime('%Y%m%d%H%M%S')}-{digest.hexdigest()[:8]}"
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "version": version,
+            "created_at": time.time(),
+            "count": len(offsets) - 1,
+            "vocabulary_size": len(terms),
+            "params": params or {},
+            # Statistik update inkremental sejak fit terakhir, diteruskan ke worker lain
+            "drift": drift,
+            # Sidik jari koleksi FAQ saat fit, dicek ulang saat boot
+            "source": source,
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        final_dir = os.path.join(base_dir, version)
+        if os.path.exists(final_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            os.rename(tmp_dir, final_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Ganti pointer CURRENT secara atomik
+    fd, tmp_current = tempfile.mkstemp(prefix=".current-", dir=base_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(base_dir, CURRENT_FILE))
+
+    _prune_versions(base_dir, keep, version)
+    return version
+
+
+def _prune_versions(base_dir, keep, active):
+    """Hapus versi lama; file yang masih di-mmap worker lain tetap valid (POSIX)"""
+    versions = sorted(
+        d for d in os.listdir(base_dir)
+        if d.startswith("v") and os.path.isdir(os.path.join(base_dir, d))
+    )
+    for old in versions[:-keep] if keep > 0 else []:
+        if old != active:
+            shutil.rmtree(os.path.join(base_dir, old), ignore_errors=True)
+
+
+def read_artifact(base_dir, version=None):
+    """
+    Buka artifact (default: versi CURRENT) secara read-only.
+    Return dict berisi manifest, vocabulary, idf, embeddings, postings,
+    keyword_flags, rows dan ids, atau None jika artifact tidak ada / formatnya berbeda.
+    """
+    version = version or current_version(base_dir)
+    if not version:
+        return None
+
+    path = os.path.join(base_dir, version)
+    try:
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except OSError:
+        return None
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        return None
+
+    with open(os.path.join(path, "vocabulary.json"), "r", encoding="utf-8") as f:
+        terms = json.load(f)
+    with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+        ids = json.load(f)
+
+    count, n_terms = manifest["count"], len(terms)
+    offsets = np.load(os.path.join(path, "rows_offsets.npy"), mmap_mode="r")
+
+    return {
+        "manifest": manifest,
+        "vocabulary": {t: i for i, t in enumerate(terms)},
+        "idf": np.load(os.path.join(path, "idf.npy"), mmap_mode="r"),
+        "embeddings": _load_csr(path, "emb", (count, n_terms)),
+        "postings": _load_csr(path, "post", (n_terms, count)),
+        "keyword_flags": np.load(os.path.join(path, "keyword_flags.npy"), mmap_mode="r"),
+        "rows": ArtifactRows(os.path.join(path, "rows.jsonl"), offsets),
+        "ids": ids,
+    }
@@ -0,0 +1,102 @@
+# utils/keyword_rules.py
+
+import hashlib
+import json
+
+import numpy as np
+
+# =========================
+# TABEL RULE DEFAULT (sama seperti model pertama)
+# =========================
+# Fitur query: nama -> frasa yang dicari di pertanyaan user
+DEFAULT_QUERY_FEATURES = {
+    "baru": ["baru", "bikin", "pertama"],
+    "cetak_ulang": ["hilang", "rusak", "cetak ulang"],
+}
+
+# Fitur FAQ: nama -> frasa yang dicari di pertanyaan FAQ (dihitung sekali saat build index)
+DEFAULT_FAQ_FEATURES = {
+    "baru": ["baru"],
+    "cetak_ulang": ["cetak ulang", "hilang"],
+}
+
+# Penyesuaian skor jika fitur query dan fitur FAQ sama-sama aktif
+DEFAULT_ADJUSTMENTS = [
+    {"query": "baru", "faq": "baru", "delta": 0.05},
+    {"query": "baru", "faq": "cetak_ulang", "delta": -0.10},
+    {"query": "cetak_ulang", "faq": "cetak_ulang", "delta": 0.05},
+    {"query": "cetak_ulang", "faq": "baru", "delta": -0.10},
+]
+
+
+class KeywordRules:
+    """
+    Rule keyword adjustment dalam bentuk tabel:
+    skor tambahan = flag_query @ W @ flag_faq, dengan W[fitur query, fitur FAQ] = delta.
+    Flag FAQ dihitung sekali per index, flag query sekali per pertanyaan.
+    """
+
+    def __init__(self, query_features, faq_features, adjustments):
+        self.query_features = {k: [p.lower() for p in v] for k, v in query_features.items()}
+        self.faq_features = {k: [p.lower() for p in v] for k, v in faq_features.items()}
+        self.query_names = list(self.query_features)
+        self.faq_names = list(self.faq_features)
+
+        self.weights = np.zeros((len(self.query_names), len(self.faq_names)))
+        for rule in adjustments:
+            q = self.query_names.index(rule["query"])
+            f = self.faq_names.index(rule["faq"])
+            self.weights[q, f] += float(rule["delta"])
+
+        self.signature = hashlib.sha1(json.dumps(
+            [self.query_features, self.faq_features, self.weights.tolist()], sort_keys=True
+        ).encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def max_span(self):
+        """Selisih terbesar yang mungkin antara dua skor adjustment"""
+        return float(self.weights[self.weights > 0].sum() - self.weights[self.weights < 0].sum())
+
+    @staticmethod
+    def _flags(text, features):
+        return [any(p in text for p in phrases) for phrases in features.values()]
+
+    def query_flags(self, texts):
+        """Flag fitur query (jumlah teks x jumlah fitur query)"""
+        return np.array(
+            [self._flags(t.lower(), self.query_features) for t in texts], dtype=bool
+        ).reshape(len(texts), len(self.query_names))
+
+    def faq_flags(self, questions):
+        """Flag fitur FAQ (jumlah FAQ x jumlah fitur FAQ)"""
+        return np.array(
+            [self._flags((q or "").lower(), self.faq_features) for q in questions], dtype=bool
+        ).reshape(len(questions), len(self.faq_names))
+
+    def adjust(self, query_flags, faq_flags):
+        """
+        Adjustment untuk pasangan (query, FAQ) sejajar: query_flags dan faq_flags
+        punya jumlah baris yang sama. Satu operasi vektor untuk semua kandidat.
+        """
+        return ((query_flags @ self.weights) * faq_flags).sum(axis=1)
+
+    def adjustment(self, user_text, faq_question):
+        """Adjustment untuk satu pasangan teks"""
+        return float(self.adjust(self.query_flags([user_text]), self.faq_flags([faq_question]))[0])
+
+
+def load_keyword_rules(path=None):
+    """
+    Rule dari file JSON (jika path diisi) dengan key opsional
+    "query_features", "faq_features", "adjustments"; sisanya pakai default.
+    """
+    config = {}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    return KeywordRules(
+        config.get("query_features", DEFAULT_QUERY_FEATURES),
+        config.get("faq_features", DEFAULT_FAQ_FEATURES),
+        config.get("adjustments", DEFAULT_ADJUSTMENTS),
+    )
@@ -0,0 +1,110 @@
+# utils/log_pipeline.py
+"""
+Logging non-blocking: logger hanya memasukkan record ke queue di memori,
+satu thread background (QueueListener) yang menulis ke stdout. Request
+tidak pernah menunggu pipe log yang lambat; jika queue penuh, record
+dibuang dan dihitung (lihat dropped_records()).
+
+    from utils.log_pipeline import get_logger, SAMPLED
+    logger = get_logger(__name__)
+    logger.info("✅ Index siap")
+    logger.info("📊 Max similarity: %.3f", score, extra=SAMPLED)  # hanya sebagian ditulis
+
+ENV:
+    LOG_LEVEL        level minimum (default INFO)
+    LOG_SAMPLE_RATE  proporsi record bertanda SAMPLED yang ditulis (default 0.01)
+    LOG_QUEUE_SIZE   kapasitas queue sebelum record dibuang (default 10000)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# extra=SAMPLED menandai baris per request yang boleh di-sampling
+SAMPLED = {"sampled": True}
+
+_listener = None
+_handler = None
+_setup_lock = threading.Lock()
+_dropped = 0
+
+
+class SamplingFilter(logging.Filter):
+    """Loloskan record bertanda sampled hanya dengan peluang `rate`"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sampled", False):
+            return random.random() < self.rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler yang membuang record saat queue penuh, bukan menunggu"""
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+def setup_logging():
+    """Pasang pipeline queue di root logger (sekali per proses)"""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        _handler = NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+        _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        # Tulis sisa queue sebelum proses keluar
+        atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Hentikan writer background setelah queue dikosongkan"""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            logging.getLogger().removeHandler(_handler)
+            _listener.stop()
+            _listener = None
+            _handler = None
+
+
+def get_logger(name):
+    """Logger yang menulis lewat pipeline queue"""
+    setup_logging()
+    return logging.getLogger(name)
+
+
+def dropped_records():
+    """Jumlah record yang dibuang karena queue penuh"""
+    return _dropped
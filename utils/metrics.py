@@ -0,0 +1,171 @@
+# utils/metrics.py
+"""
+Histogram latency sederhana dengan output format teks Prometheus.
+
+    STAGE_SECONDS = histogram("chatbot_stage_seconds", "Durasi tahap chatbot", ["stage"])
+    with timer(STAGE_SECONDS, stage="score"):
+        ...
+    render()  # -> teks untuk endpoint /metrics
+
+Nilai disimpan per proses: dengan beberapa worker gunicorn, setiap scrape
+/metrics menunjukkan worker yang kebetulan menjawab (label "pid" membantu
+membedakannya). Tidak butuh dependency tambahan.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from pymongo import monitoring
+
+# Bucket default (detik): 0.5 ms sampai 10 s
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """Histogram kumulatif dengan label, aman dipakai banyak thread"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [counts per bucket, +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        value = float(value)
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def collect(self):
+        """Baris teks Prometheus untuk histogram ini"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = [(k, list(s[0]), s[1], s[2]) for k, s in sorted(self._series.items())]
+
+        for key, counts, total, value_sum in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_number(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {value_sum!r}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Ambil histogram terdaftar dengan nama ini, atau daftarkan yang baru"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, documentation, labelnames, buckets)
+        return _registry[name]
+
+
+@contextmanager
+def timer(hist, **labels):
+    """Catat durasi blok with ke histogram (juga saat terjadi exception)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - start, **labels)
+
+
+def render():
+    """Semua metrik terdaftar dalam format teks Prometheus"""
+    with _registry_lock:
+        hists = list(_registry.values())
+    lines = [
+        "# HELP process_info Proses yang menjawab scrape ini",
+        "# TYPE process_info gauge",
+        f'process_info{{pid="{os.getpid()}"}} 1',
+    ]
+    for hist in hists:
+        lines.extend(hist.collect())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# MONGODB COMMAND TIMING
+# =========================
+MONGO_COMMAND_SECONDS = histogram(
+    "mongo_command_seconds",
+    "Durasi command MongoDB per endpoint Flask",
+    ["command", "endpoint", "outcome"],
+)
+
+
+def _current_endpoint():
+    """Endpoint Flask yang sedang diproses di thread ini ("-" jika di luar request)"""
+    try:
+        from flask import has_request_context, request
+    except ImportError:
+        return "-"
+    if has_request_context():
+        return request.endpoint or "-"
+    return "-"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Listener pymongo: catat durasi setiap command. Event dikirim di thread
+    yang menjalankan query, jadi endpoint Flask bisa dibaca langsung.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(
+            event.duration_micros / 1e6,
+            command=event.command_name, endpoint=_current_endpoint(), outcome="ok",
+        )
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(
+            event.duration_micros / 1e6,
+            command=event.command_name, endpoint=_current_endpoint(), outcome="error",
+        )
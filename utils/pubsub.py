@@ -0,0 +1,97 @@
+# utils/pubsub.py
+"""
+Pub/sub sederhana di dalam proses: publisher tidak pernah menunggu
+subscriber. Setiap subscriber punya queue sendiri; jika penuh (klien
+lambat), pesan tertua dibuang dan subscription ditandai `overflowed`
+supaya klien bisa sinkron ulang.
+
+    sub = subscribe("admin_logs")
+    try:
+        msg = sub.get(timeout=15)   # None jika timeout
+    finally:
+        sub.close()
+
+    publish("admin_logs", {...})
+"""
+
+import queue
+import threading
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscription:
+    def __init__(self, broker, topic, maxsize):
+        self._broker = broker
+        self.topic = topic
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _put(self, message):
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                self.overflowed = True
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Pesan berikutnya, atau None jika timeout habis"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        sub = Subscription(self, topic, maxsize)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._topics.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[sub.topic]
+
+    def publish(self, topic, message):
+        """Kirim ke semua subscriber topic; return jumlah subscriber"""
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        for sub in subs:
+            sub._put(message)
+        return len(subs)
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return len(self._topics.get(topic, ()))
+
+
+_broker = Broker()
+
+
+def subscribe(topic, maxsize=SUBSCRIBER_QUEUE_SIZE):
+    return _broker.subscribe(topic, maxsize)
+
+
+def publish(topic, message):
+    return _broker.publish(topic, message)
+
+
+def subscriber_count(topic):
+    return _broker.subscriber_count(topic)
@@ -0,0 +1,146 @@
+# utils/rate_limit.py
+"""
+Rate limiter dengan backend yang bisa dipilih.
+
+  - MemoryRateLimiter: token bucket per key di memori proses. Jumlah key
+    dibatasi (LRU), jadi memori tetap kecil walaupun ada credential
+    stuffing dari ribuan IP. Batas berlaku per worker.
+  - MongoRateLimiter: fixed window bersama untuk semua worker/instance.
+    Satu dokumen per (key, window) di-$inc secara atomik; dokumen dihapus
+    MongoDB lewat TTL index pada expires_at (lihat db.INDEXES). Jika
+    MongoDB error, limiter memakai MemoryRateLimiter sebagai cadangan.
+
+    limiter = create_limiter("login", limit=5, window=60, collection=db["rate_limits"])
+    if not limiter.hit(ip):
+        return 429
+
+ENV:
+    RATE_LIMIT_BACKEND    memory | mongo (default mongo jika collection diberikan)
+    RATE_LIMIT_MAX_KEYS   jumlah key maksimum backend memory (default 10000)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from utils.log_pipeline import get_logger
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "mongo").lower()
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "10000"))
+
+
+# =========================
+# MEMORY (TOKEN BUCKET)
+# =========================
+class MemoryRateLimiter:
+    """
+    Token bucket: kapasitas `limit`, terisi kembali `limit` token per
+    `window` detik. Key yang paling lama tidak dipakai dibuang jika lebih
+    dari `maxsize`; key yang dibuang sama dengan bucket penuh, jadi
+    eviction tidak pernah memblokir klien yang sah.
+    """
+
+    backend = "memory"
+
+    def __init__(self, limit, window, maxsize=RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._rate = limit / window
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> (token, waktu update)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key):
+        """Pakai satu token; False jika key sudah melewati batas"""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.limit, now))
+            tokens = min(self.limit, tokens + (now - updated) * self._rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return allowed
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.backend, "keys": len(self._buckets),
+                    "maxsize": self.maxsize, "evictions": self.evictions}
+
+
+# =========================
+# MONGODB (FIXED WINDOW)
+# =========================
+class MongoRateLimiter:
+    """
+    Fixed window bersama: maksimal `limit` hit per key dalam setiap
+    window `window` detik, dihitung di MongoDB sehingga sama untuk semua
+    worker. Satu round trip (find_one_and_update upsert) per hit.
+    """
+
+    backend = "mongo"
+
+    def __init__(self, collection, name, limit, window, fallback=None):
+        self.collection = collection
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.fallback = fallback or MemoryRateLimiter(limit, window)
+        self._warned_at = 0.0
+
+    def _doc_id(self, key, start):
+        return f"{self.name}:{key}:{start}"
+
+    def hit(self, key):
+        now = time.time()
+        start = int(now // self.window) * self.window
+        doc_id = self._doc_id(key, start)
+        update = {
+            "$inc": {"count": 1},
+            "$setOnInsert": {
+                # TTL index expires_at (expireAfterSeconds=0) membersihkan window lama
+                "expires_at": datetime.fromtimestamp(start + self.window, tz=timezone.utc) + timedelta(seconds=60),
+            },
+        }
+        try:
+            try:
+                doc = self.collection.find_one_and_update(
+                    {"_id": doc_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # Dua worker meng-upsert window baru bersamaan: ulangi sebagai update biasa
+                doc = self.collection.find_one_and_update(
+                    {"_id": doc_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+                )
+        except PyMongoError as e:
+            # Peringatan paling banyak sekali per window, bukan sekali per request
+            if now - self._warned_at >= self.window:
+                self._warned_at = now
+                logger.warning("⚠️ Rate limit %s memakai memori lokal: %s", self.name, e)
+            return self.fallback.hit(key)
+        return doc["count"] <= self.limit
+
+    def stats(self):
+        return {"backend": self.backend, "fallback": self.fallback.stats()}
+
+
+def create_limiter(name, limit, window, collection=None, backend=None):
+    """Limiter sesuai RATE_LIMIT_BACKEND; tanpa collection selalu memory"""
+    backend = (backend or RATE_LIMIT_BACKEND).lower()
+    if backend == "mongo" and collection is not None:
+        return MongoRateLimiter(collection, name, limit, window)
+    if backend not in ("memory", "mongo"):
+        logger.warning("⚠️ RATE_LIMIT_BACKEND=%s tidak dikenal, memakai memory", backend)
+    return MemoryRateLimiter(limit, window)